@@ -1,18 +1,30 @@
-import asyncio
-import os
+import time
+script_started = time.perf_counter()  # before the imports, so the first run's profile includes them
 import streamlit as st
-from datetime import datetime, date, timedelta
-from textwrap import dedent
-from agno.agent import Agent
-from agno.tools.mcp import MCPTools
-from agno.models.perplexity import Perplexity  # Imported Perplexity
-from mcp import ClientSession, StdioServerParameters
-from mcp.client.stdio import stdio_client
+from datetime import datetime, timedelta
 from dotenv import load_dotenv
+load_dotenv()  # before the local modules below read their settings from the environment
+from app_profile import RerunProfile
+from background_loop import BackgroundLoop, get_background_loop
+from gazetteer import Gazetteer, get_gazetteer as load_gazetteer
+from llm_clients import CLIENT_IDLE_TTL, get_client_registry
+from mcp_pool import MCPServerPool
+from model_router import AUTO_MODEL_ID, get_model_router
+from result_cache import SearchResultCache, canonical_search_key, ttl_for_params
+from hotel_agent import (
+    build_advanced_query, build_hotel_model, build_quick_query, is_cacheable_result, is_error_result,
+    validate_search_params,
+)
+from prefetch import SpeculativePrefetcher
+from rate_limit import limiter_stats
+from search_coalescer import SearchCoalescer
+from search_history import DEFAULT_DB_PATH as HISTORY_DB_PATH, SearchHistory
+from tracing import Trace, span_label, summarize_spans
 import base64
 import json
+import sqlite3
+import uuid
 from typing import Optional, Dict, Any
-load_dotenv()
 
 # Page config
 st.set_page_config(
@@ -22,6 +34,91 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Process-wide event loop that outlives reruns, shared by every Streamlit session
+@st.cache_resource(show_spinner=False)
+def get_event_loop() -> BackgroundLoop:
+    return get_background_loop()
+
+# Warm pool of Airbnb MCP servers, living on the shared event loop
+@st.cache_resource(show_spinner=False)
+def get_mcp_pool() -> MCPServerPool:
+    pool = MCPServerPool()
+    get_event_loop().submit(pool.start())
+    return pool
+
+# Identical searches running at the same time, in any session, share one agent run
+@st.cache_resource(show_spinner=False)
+def get_search_coalescer() -> SearchCoalescer:
+    return SearchCoalescer()
+
+# Finished search results, keyed on the normalized query and parameters
+@st.cache_resource(show_spinner=False)
+def get_result_cache() -> SearchResultCache:
+    return SearchResultCache()
+
+# Background prefetches of the Airbnb results an Advanced Search is about to need
+@st.cache_resource(show_spinner=False)
+def get_prefetcher() -> SpeculativePrefetcher:
+    return SpeculativePrefetcher(get_mcp_pool())
+
+# Past searches, kept on disk so they can be re-opened without a new agent run
+@st.cache_resource(show_spinner=False)
+def get_search_history() -> Optional[SearchHistory]:
+    if not HISTORY_DB_PATH:
+        return None
+    try:
+        return SearchHistory()
+    except (OSError, sqlite3.Error):
+        # An unwritable history location only costs the history panel
+        return None
+
+# One Perplexity model per model settings and key; the agent stack is imported on the first search.
+# Bounded and expiring like the pooled clients, so models holding idle tenants' keys are let go
+@st.cache_resource(show_spinner=False, max_entries=32, ttl=CLIENT_IDLE_TTL)
+def get_hotel_model(model_id: str, temperature: float, api_key: str, search_mode: str):
+    # The search mode only matters to Auto, which routes Quick and Advanced Searches to different model sizes
+    return build_hotel_model({'model_id': model_id, 'temperature': temperature, 'search_mode': search_mode}, api_key)
+
+# Script run times, shown in the sidebar to keep reruns fast
+@st.cache_resource(show_spinner=False)
+def get_rerun_profile() -> RerunProfile:
+    return RerunProfile()
+
+# Offline place list behind location autocomplete and canonical location IDs
+@st.cache_resource(show_spinner=False)
+def get_gazetteer() -> Gazetteer:
+    return load_gazetteer()
+
+def _pick_location(key: str) -> None:
+    choice = st.session_state.get(f"{key}_suggestion")
+    if choice:
+        st.session_state[key] = choice
+
+def location_input(label: str, key: str, **kwargs) -> tuple[str, Optional[str]]:
+    """A location field with gazetteer suggestions; returns the canonical location and its ID (None if unknown)."""
+    st.session_state.setdefault(key, "Mumbai, India")
+    text = st.text_input(label, key=key, **kwargs)
+    place = gazetteer.resolve(text)
+    if place is not None:
+        st.caption(f"📍 {place.display_name}")
+        return place.display_name, place.id
+    suggestions = gazetteer.suggest(text)
+    if suggestions:
+        st.pills("Did you mean", [p.display_name for p in suggestions], key=f"{key}_suggestion",
+                 on_change=_pick_location, args=(key,), label_visibility="collapsed")
+    elif text.strip():
+        st.caption("Not in the offline gazetteer; searched as typed")
+    return " ".join(text.split()), None
+
+event_loop = get_event_loop()
+gazetteer = get_gazetteer()
+mcp_pool = get_mcp_pool()
+result_cache = get_result_cache()
+search_coalescer = get_search_coalescer()
+search_history = get_search_history()
+prefetcher = get_prefetcher()
+rerun_profile = get_rerun_profile()
+
 # CSS for better styling (omitted for brevity)
 
 # Header
@@ -39,9 +136,8 @@ with st.sidebar:
     )
     
     if api_key:
-        # CHANGED: Set Perplexity-specific environment variable
-        os.environ["PERPLEXITY_API_KEY"] = api_key
-    
+        # The key is passed to each search explicitly, never through the process-wide environment,
+        # so concurrent sessions with different keys cannot pick up each other's
         st.divider()
     
     # Model Configuration
@@ -54,8 +150,11 @@ with st.sidebar:
             "llama-3-sonar-small-32k-online",
             "llama-3-8b-instruct",
             "llama-3-70b-instruct",
+            AUTO_MODEL_ID,
         ],
-        help="Select the Perplexity AI model for processing queries"
+        format_func=lambda m: "⚡ Auto (fastest healthy model)" if m == AUTO_MODEL_ID else m,
+        help="Select the Perplexity AI model for processing queries. Auto picks a small model for Quick Search "
+             "and a large one for Advanced Search, by recent latency, and fails over when a model errors or times out."
     )
     
     temperature = st.slider(
@@ -66,6 +165,12 @@ with st.sidebar:
         help="Lower values = more focused, Higher values = more creative"
     )
 
+    output_format = st.selectbox(
+        "Output Format",
+        ["Structured JSON (rendered locally)", "Markdown (written by the model)"],
+        help="Structured JSON asks the model for compact hotel data and builds the result layout locally, which is much faster"
+    )
+
     st.divider()
     
     # Advanced Settings
@@ -86,6 +191,26 @@ with st.sidebar:
         help="Maximum number of hotels to return per search"
     )
 
+    stream_results = st.toggle(
+        "Stream results",
+        value=True,
+        help="Show the answer as it is generated, with live progress for each tool call"
+    )
+
+    bypass_cache = st.toggle(
+        "Bypass result cache",
+        value=False,
+        help="Always run a fresh search instead of reusing a recent identical one"
+    )
+    speculative_prefetch = st.toggle(
+        "Speculative prefetch",
+        value=False,
+        help="While the Advanced Search form is unchanged for a moment, start fetching its Airbnb listings "
+             "in the background so the search is faster when you run it (direct search only)"
+    )
+    cache_stats_placeholder = st.empty()
+    history_placeholder = st.empty()
+
     st.markdown("---")
     st.markdown("Built with ❤️ by Nilesh Gode")
 
@@ -98,9 +223,9 @@ with tab1:
     
     col1, col2 = st.columns([2, 1])
     with col1:
-        location = st.text_input(
-            "📍 Location", 
-            value="Mumbai, India",
+        location, location_id = location_input(
+            "📍 Location",
+            "quick_location",
             placeholder="Enter city, state, or region",
             help="Enter the destination where you want to find hotels"
         )
@@ -110,16 +235,7 @@ with tab1:
             ["Find Hotels", "Best Deals", "Luxury Hotels", "Budget Options", "Custom Query"]
         )
     
-    if search_type == "Find Hotels":
-        base_query = f"Find available hotels in {location}"
-    elif search_type == "Best Deals":
-        base_query = f"Find hotels with best deals and discounts in {location}"
-    elif search_type == "Luxury Hotels":
-        base_query = f"Find luxury and premium hotels in {location}"
-    elif search_type == "Budget Options":
-        base_query = f"Find budget-friendly and affordable hotels in {location}"
-    else:
-        base_query = ""
+    base_query = build_quick_query(location, search_type)
     
     quick_query = st.text_area(
         "🗣️ Your Query",
@@ -135,9 +251,9 @@ with tab2:
     
     col1, col2, col3 = st.columns(3)
     with col1:
-        adv_location = st.text_input(
-            "📍 Destination", 
-            value="Mumbai, India",
+        adv_location, adv_location_id = location_input(
+            "📍 Destination",
+            "adv_location",
             help="City, state, or specific area"
         )
     with col2:
@@ -182,20 +298,19 @@ with tab2:
         ["WiFi", "Pool", "Gym", "Spa", "Restaurant", "Bar", "Parking", "Pet Friendly", 
          "Business Center", "Airport Shuttle", "Room Service", "Concierge"]
     )
+
+    direct_search = st.toggle(
+        "⚡ Direct search (fast path)",
+        value=True,
+        help="Send these filters straight to the Airbnb tools, filter and rank locally, "
+             "and use the AI model only for a final summary"
+    )
     
-    adv_query_parts = [f"Find hotels in {adv_location}"]
-    if checkin_date and checkout_date:
-        adv_query_parts.append(f"for dates {checkin_date} to {checkout_date}")
-    guest_info = []
-    if adults > 1: guest_info.append(f"{adults} adults")
-    if children > 0: guest_info.append(f"{children} children")
-    if infants > 0: guest_info.append(f"{infants} infants")
-    if pets > 0: guest_info.append(f"{pets} pets")
-    if guest_info: adv_query_parts.append(f"for {', '.join(guest_info)}")
-    if room_type != "Any": adv_query_parts.append(f"preferably {room_type.lower()}")
-    if star_rating != "Any": adv_query_parts.append(f"with {star_rating.lower()}")
-    if amenities: adv_query_parts.append(f"with amenities: {', '.join(amenities)}")
-    advanced_query = " ".join(adv_query_parts)
+    advanced_query = build_advanced_query({
+        'location': adv_location, 'checkin': checkin_date, 'checkout': checkout_date,
+        'adults': adults, 'children': children, 'infants': infants, 'pets': pets,
+        'room_type': room_type, 'star_rating': star_rating, 'amenities': amenities
+    })
     
     st.text_area(
         "Generated Query",
@@ -204,193 +319,11 @@ with tab2:
         help="This query will be sent to the AI agent"
     )
 
-# Response templates (unchanged)
-def get_response_template(search_mode: str, search_params: Dict[str, Any] = None) -> str:
-    # Function content remains the same...
-    if search_mode == "Quick Search":
-        return f"""
-        **QUICK SEARCH RESPONSE FORMAT:**
-        ## 🏨 Quick Hotel Results
-        ### 📍 Search Summary
-        - **Location:** [location]
-        - **Hotels Found:** [number]
-        - **Search Type:** [search type from dropdown]
-        ### 🏨 Hotel List
-        For each hotel, use this format:
-        **🏨 [Hotel Name]** ⭐ [rating]/5
-        - 📍 **Location:** [address/area]
-        - 💰 **Price:** $[price]/night
-        - 🔗 **Book Now:** [booking link if available]
-        - ✨ **Top Features:** [2-3 key amenities]
-        - 📞 **Quick Info:** [phone or website]
-        ---
-        ### 🎯 Top Recommendations
-        - **Best Deal:** [hotel name] - $[price]
-        - **Highest Rated:** [hotel name] - [rating]⭐
-        - **Prime Location:** [hotel name]
-        ### 📞 Quick Actions
-        - Click booking links for instant reservations
-        - Call hotels directly for special rates
-        - Use advanced search for more filtering options
-        """
-    elif search_mode == "Advanced Search":
-        return f"""
-        **ADVANCED SEARCH RESPONSE FORMAT:**
-        ## 🎯 Advanced Hotel Search Results
-        ### 📊 Detailed Search Summary
-        - **Location:** [location]
-        - **Check-in:** [checkin date] | **Check-out:** [checkout date]
-        - **Guests:** [adults] adults, [children] children, [infants] infants, [pets] pets
-        - **Room Type:** [room preference]
-        - **Star Rating:** [star requirement]
-        - **Amenities:** [selected amenities]
-        - **Total Results:** [number] hotels found
-        ### 🏨 Detailed Hotel Listings
-        For each hotel, use this COMPREHENSIVE format:
-        ---
-        ## 🏨 [Hotel Name]
-        | **Property Details** | **Information** |
-        |---------------------|-----------------|
-        | ⭐ **Rating** | [rating]/5 stars ([number] reviews) |
-        | 📍 **Full Address** | [complete address with postal code] |
-        | 💰 **Nightly Rate** | $[price] per night (taxes: $[tax amount]) |
-        | 🏠 **Room Types** | [available room categories] |
-        | 📏 **Distance** | [km from city center] • [km from airport] |
-        | 🔗 **Booking Links** | [direct booking URL] |
-        | 📞 **Contact** | [phone] • [website] |
-        **✨ Complete Amenities List:**
-        - 🏊 **Recreation:** [pool, gym, spa details]
-        - 🍽️ **Dining:** [restaurant, bar, room service info]
-        - 🚗 **Transport:** [parking, shuttle services]
-        - 💼 **Business:** [meeting rooms, business center]
-        - 🐕 **Pet Policy:** [pet-friendly details]
-        - 🌐 **Connectivity:** [WiFi, internet details]
-        - 🛎️ **Services:** [concierge, laundry, etc.]
-        **📋 Booking Details:**
-        - **Check-in:** [time] | **Check-out:** [time]
-        - **Cancellation:** [detailed policy]
-        - **Payment:** [accepted methods]
-        - **Breakfast:** [inclusion/cost details]
-        - **Parking:** [availability/cost]
-        - **Extra Beds:** [policy and cost]
-        **🎯 Match Analysis:**
-        - **Budget Match:** [how it fits your budget]
-        - **Amenity Match:** [matches X of Y requested amenities]
-        - **Location Score:** [proximity ratings]
-        - **Guest Rating:** [recent review highlights]
-        **💡 Booking Recommendations:**
-        - **Best for:** [specific use case]
-        - **Special Offers:** [current promotions]
-        - **Booking Tips:** [best rates, timing advice]
-        [REPEAT FOR EACH HOTEL]
-        ### 📈 Comparison Summary
-        | Hotel | Rating | Price | Key Features | Booking Link |
-        |-------|--------|-------|--------------|--------------|
-        | [Hotel 1] | [rating]⭐ | $[price] | [top 2 features] | [link] |
-        | [Hotel 2] | [rating]⭐ | $[price] | [top 2 features] | [link] |
-        ### 🏆 Final Recommendations
-        - **Best Overall Value:** [hotel name and detailed reason]
-        - **Luxury Choice:** [hotel name and luxury features]
-        - **Budget Winner:** [hotel name and savings details]
-        - **Location Champion:** [hotel name and location benefits]
-        - **Amenity Leader:** [hotel name and standout amenities]
-        """
-    return ""
-
-async def run_hotel_agent(message: str, search_params: Dict[str, Any] = None) -> str:
-    # CHANGED: Updated the API key error message for Perplexity
-    if not api_key:
-        return "❌ **Error**: Perplexity API key not provided. Please enter your API key in the sidebar."
-    
-    try:
-        server_params = StdioServerParameters(
-            command="npx",
-            args=["-y", "@openbnb/mcp-server-airbnb", "--ignore-robots-txt"],
-        )
-        
-        async with stdio_client(server_params) as (read, write):
-            async with ClientSession(read, write) as session:
-                mcp_tools = MCPTools(session=session)
-                await mcp_tools.initialize()
-                
-                search_mode = search_params.get('search_mode', 'Quick Search') if search_params else 'Quick Search'
-                response_template = get_response_template(search_mode, search_params)
-                
-                agent = Agent(
-                    tools=[mcp_tools],
-                    instructions=dedent(f"""\
-                        You are an advanced Hotel Finder assistant powered by comprehensive Airbnb data through MCP tools.
-                        Your goal is to help users find the best hotels based on their preferences and requirements.
-                        
-                        **CURRENT SEARCH MODE: {search_mode}**
-                        **USER QUERY TO PROCESS:** "{message}"
-                        {response_template}
-                        **CRITICAL REQUIREMENTS:**
-                        - Process the user query: "{message}" according to the {search_mode} format.
-                        - Follow the EXACT format specified.
-                        - Always use MCP tools to get real data before responding.
-                        - MUST include direct Airbnb booking links whenever available.
-                    """),
-                    markdown=True,
-                    show_tool_calls=True,
-                    # CHANGED: The model parameter is now instantiated with Perplexity
-                    model=Perplexity(
-                        id=search_params.get('model_id', 'llama-3-sonar-large-32k-online') if search_params else model_id,
-                        api_key=api_key,
-                        temperature=search_params.get('temperature', 0.3) if search_params else temperature
-                    )
-                )
-                
-                response = await agent.arun(message)
-                return response.content
-                
-    except asyncio.TimeoutError:
-        return "⏰ **Timeout Error**: The hotel search took too long. Please try again with a more specific query or increase the timeout in settings."
-    except Exception as e:
-        error_msg = str(e)
-        if "API rate limit" in error_msg.lower():
-            return "🚦 **Rate Limit Error**: Too many requests. Please wait a moment before searching again."
-        elif "authentication" in error_msg.lower():
-            return "🔐 **Authentication Error**: Please check your API tokens and try again."
-        elif "network" in error_msg.lower() or "connection" in error_msg.lower():
-            return "🌐 **Network Error**: Unable to connect to hotel services. Please check your internet connection."
-        else:
-            return f"❌ **Unexpected Error**: {error_msg}\n\nPlease try again or contact support if the issue persists."
-
-# The rest of the script (validation, search execution, results display) remains unchanged.
-# --- OMITTED FOR BREVITY BUT IS THE SAME AS ORIGINAL ---
-
-# Helper function to validate search parameters (unchanged)
-def validate_search_params(params: Dict[str, Any], search_mode: str = "Advanced Search") -> tuple[bool, str]:
-    if search_mode == "Advanced Search":
-        return validate_advanced_search_params(params)
-    else:
-        return validate_quick_search_params(params)
-
-def validate_advanced_search_params(params: Dict[str, Any]) -> tuple[bool, str]:
-    location = params.get('location', '').strip()
-    if not location: return False, "Location is required for hotel search"
-    if len(location) < 2: return False, "Location must be at least 2 characters long"
-    if params.get('checkin') and params.get('checkout'):
-        try:
-            checkin = datetime.strptime(params['checkin'], '%Y-%m-%d').date()
-            checkout = datetime.strptime(params['checkout'], '%Y-%m-%d').date()
-            if checkin >= checkout: return False, "Check-out date must be after check-in date"
-            if checkin < date.today(): return False, "Check-in date cannot be in the past"
-        except ValueError: return False, "Invalid date format. Use YYYY-MM-DD"
-    if params.get('adults', 1) < 1: return False, "At least 1 adult is required"
-    return True, "Advanced search parameters are valid"
-
-def validate_quick_search_params(params: Dict[str, Any]) -> tuple[bool, str]:
-    location = params.get('location', '').strip()
-    if not location: return False, "Location is required for hotel search"
-    if len(location) < 2: return False, "Location must be at least 2 characters long"
-    return True, "Quick search parameters are valid"
-
 if 'active_search_tab' not in st.session_state: st.session_state.active_search_tab = "Quick Search"
 
 query_to_execute = ""
-search_parameters = {'timeout': request_timeout, 'max_results': max_results, 'model_id': model_id, 'temperature': temperature}
+search_parameters = {'timeout': request_timeout, 'max_results': max_results, 'model_id': model_id, 'temperature': temperature,
+                     'output_format': 'json' if output_format.startswith("Structured") else 'markdown'}
 
 if advanced_query.strip():
     query_to_execute = advanced_query
@@ -398,16 +331,19 @@ if advanced_query.strip():
     search_parameters['search_mode'] = "Advanced Search"
     st.session_state.active_search_tab = "Advanced Search"
     search_parameters.update({
-        'location': adv_location, 'checkin': checkin_date.strftime('%Y-%m-%d') if checkin_date else None,
+        'location': adv_location, 'location_id': adv_location_id,
+        'checkin': checkin_date.strftime('%Y-%m-%d') if checkin_date else None,
         'checkout': checkout_date.strftime('%Y-%m-%d') if checkout_date else None,
-        'adults': adults, 'children': children, 'infants': infants, 'pets': pets, 'ignoreRobotsText': True
+        'adults': adults, 'children': children, 'infants': infants, 'pets': pets, 'ignoreRobotsText': True,
+        'room_type': room_type, 'star_rating': star_rating, 'amenities': amenities,
+        'pipeline': 'direct' if direct_search else 'agent'
     })
 elif quick_query.strip():
     query_to_execute = quick_query
     search_mode = "Quick Search"
     search_parameters['search_mode'] = "Quick Search"
     st.session_state.active_search_tab = "Quick Search"
-    search_parameters.update({'location': location, 'ignoreRobotsText': True})
+    search_parameters.update({'location': location, 'location_id': location_id, 'search_type': search_type, 'ignoreRobotsText': True})
 else:
     st.warning("⚠️ Please enter a search query in one of the tabs above")
     query_to_execute = ""
@@ -415,6 +351,11 @@ else:
 if query_to_execute:
     active_mode = st.session_state.get('active_search_tab', 'Unknown')
 
+# Every rerun reports the current form; the prefetcher waits for it to settle and drops stale work
+if 'session_id' not in st.session_state: st.session_state.session_id = uuid.uuid4().hex
+prefetch_params = search_parameters if speculative_prefetch and query_to_execute and validate_search_params(search_parameters, search_mode)[0] else None
+event_loop.submit(prefetcher.schedule(st.session_state.session_id, prefetch_params))
+
 col1, col2, col3 = st.columns([2, 1, 1])
 with col1:
     execute_search = st.button("🔍 Execute Hotel Search", type="primary", use_container_width=True, disabled=not query_to_execute.strip())
@@ -425,6 +366,79 @@ with col2:
 with col3:
     export_results = st.button("📊 Export Results", use_container_width=True, disabled='search_results' not in st.session_state)
 
+def run_streaming_search(query: str, search_params: Dict[str, Any], search_mode: str, cache_key: str,
+                         trace: Optional[Trace] = None, model=None) -> str:
+    """Render a search token by token, driving the status box from real agent events."""
+    status = st.status(f"🔍 Executing {search_mode.lower()}... Waiting for a hotel data server", expanded=False)
+    errors, timed_out = [], []
+
+    def tokens():
+        for event in event_loop.stream(search_coalescer.stream(cache_key, query, search_params, pool=mcp_pool,
+                                                               api_key=api_key, model=model, trace=trace)):
+            kind = event['event']
+            if kind == 'token':
+                yield event['content']
+            elif kind == 'coalesced':
+                status.update(label="🔗 Joining an identical search already in progress...")
+            elif kind == 'server_ready':
+                status.update(label="Connected to hotel data provider")
+            elif kind == 'tools_listed':
+                status.write(f"🧰 Tools available: {', '.join(event['tools'])}")
+            elif kind == 'tool_started':
+                status.update(label=f"Running {event['tool']}...")
+                status.write(f"▶️ {event['tool']} started")
+            elif kind == 'tool_finished':
+                status.write(f"✅ {event['tool']} finished")
+            elif kind == 'first_token':
+                status.update(label="Writing results...")
+            elif kind == 'deadline_exceeded':
+                timed_out.append(True)
+                yield event['content']
+            elif kind == 'error':
+                errors.append(event['content'])
+
+    stream_area = st.empty()
+    with stream_area.container():
+        streamed = st.write_stream(tokens())
+    stream_area.empty()
+    if errors:
+        status.update(label="Search failed", state="error")
+        return errors[-1]
+    if timed_out:
+        status.update(label="Time budget reached, showing partial results", state="error")
+    else:
+        status.update(label="Search completed!", state="complete")
+    return streamed if isinstance(streamed, str) else "".join(str(part) for part in streamed)
+
+def render_timing_waterfall(spans: list) -> None:
+    """Collapsible per-phase timeline of a search, for diagnosing slow ones."""
+    summary = summarize_spans(spans)
+    with st.expander(f"⏱️ Timing breakdown ({summary['total_ms'] / 1000:.1f}s)", expanded=False):
+        st.caption(f"{summary['llm_turns']} LLM turns • {summary['tool_calls']} tool calls • "
+                   f"{summary['input_tokens']:,} input tokens ({summary['cached_input_tokens']:,} cached, "
+                   f"{summary['uncached_input_tokens']:,} uncached) • {summary['output_tokens']:,} output tokens")
+        if summary['tool_result_tokens']:
+            st.caption(f"Tool results compacted from ~{summary['tool_result_tokens']:,} to "
+                       f"~{summary['compacted_tool_result_tokens']:,} tokens before reaching the model")
+        rows = [{'phase': f"{i + 1:02d}. {span_label(s)}", 'start_ms': s['start_ms'],
+                 'end_ms': s['start_ms'] + s['duration_ms'], 'duration_ms': s['duration_ms'],
+                 'input_tokens': s.get('input_tokens'), 'cached_tokens': s.get('cached_tokens'),
+                 'output_tokens': s.get('output_tokens'),
+                 'error': s.get('error')} for i, s in enumerate(spans)]
+        st.vega_lite_chart({
+            'data': {'values': rows},
+            'mark': {'type': 'bar', 'cornerRadius': 2},
+            'encoding': {
+                'y': {'field': 'phase', 'type': 'nominal', 'sort': None, 'title': None},
+                'x': {'field': 'start_ms', 'type': 'quantitative', 'title': 'ms since search start'},
+                'x2': {'field': 'end_ms'},
+                'color': {'field': 'error', 'type': 'nominal', 'legend': None},
+                'tooltip': [{'field': 'phase'}, {'field': 'duration_ms', 'format': ',.0f'},
+                            {'field': 'input_tokens'}, {'field': 'cached_tokens'}, {'field': 'output_tokens'}],
+            },
+        }, use_container_width=True)
+        st.dataframe(rows, hide_index=True, use_container_width=True)
+
 if execute_search:
     if not api_key: st.error("❌ Please enter your Perplexity API key in the sidebar") # CHANGED for Perplexity
     elif not query_to_execute.strip(): st.error("❌ Please enter a search query")
@@ -433,29 +447,112 @@ if execute_search:
         if not is_valid:
             st.error(f"❌ **Validation Error**: {validation_message}")
             st.stop()
-        with st.spinner(f"🔍 Executing {search_mode.lower()}... This may take a moment."):
+        cache_key = canonical_search_key(query_to_execute, search_parameters)
+        cached = None if bypass_cache else result_cache.get(cache_key)
+        if cached is not None:
+            st.session_state['search_results'] = {
+                'query': query_to_execute, 'mode': search_mode, 'result': cached['result'],
+                'timestamp': cached['timestamp'], 'parameters': search_parameters, 'cached': True
+            }
+        else:
+            trace = Trace()
             try:
-                progress_bar = st.progress(0)
-                status_text = st.empty()
-                status_text.text("Initializing hotel search engine..."); progress_bar.progress(20)
-                status_text.text("Connecting to hotel data providers..."); progress_bar.progress(40)
-                status_text.text("Processing your query..."); progress_bar.progress(60)
-                result = asyncio.run(run_hotel_agent(query_to_execute, search_parameters))
-                progress_bar.progress(80)
-                status_text.text("Formatting results..."); progress_bar.progress(100)
-                status_text.text("Search completed!")
+                model = get_hotel_model(model_id, temperature, api_key, search_mode)
+                if stream_results:
+                    result = run_streaming_search(query_to_execute, search_parameters, search_mode, cache_key, trace, model)
+                else:
+                    with st.spinner(f"🔍 Executing {search_mode.lower()}... This may take a moment."):
+                        result = event_loop.run(search_coalescer.run(cache_key, query_to_execute, search_parameters,
+                                                                     pool=mcp_pool, api_key=api_key, model=model, trace=trace))
+                timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
                 st.session_state['search_results'] = {
                     'query': query_to_execute, 'mode': search_mode, 'result': result,
-                    'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"), 'parameters': search_parameters
+                    'timestamp': timestamp, 'parameters': search_parameters, 'cached': False,
+                    'timings': trace.to_list()
                 }
-                progress_bar.empty(); status_text.empty()
+                if is_cacheable_result(result):
+                    result_cache.set(cache_key, {'result': result, 'timestamp': timestamp}, ttl_for_params(search_parameters))
+                if search_history is not None and not is_error_result(result):
+                    search_history.add(query_to_execute, search_parameters, result, trace.to_list())
             except Exception as e:
                 st.error(f"❌ **Execution Error**: {str(e)}")
 
 if 'search_results' in st.session_state:
     st.markdown("---"); st.markdown("### 📋 Search Results")
     results_data = st.session_state['search_results']
+    if results_data.get('cached'):
+        st.caption(f"⚡ Served from cache (originally searched {results_data['timestamp']})")
+    elif results_data.get('history'):
+        st.caption(f"🕘 Re-opened from search history (originally searched {results_data['timestamp']})")
     st.markdown(results_data['result'])
+    if results_data.get('timings'):
+        render_timing_waterfall(results_data['timings'])
     if export_results:
         export_data = {'search_query': results_data['query'], 'search_mode': results_data['mode'], 'timestamp': results_data['timestamp'], 'results': results_data['result'], 'parameters': results_data['parameters']}
+        if results_data.get('timings'):
+            export_data['timings'] = {'summary': summarize_spans(results_data['timings']), 'spans': results_data['timings']}
         st.download_button(label="📁 Download Results as JSON", data=json.dumps(export_data, indent=2), file_name=f"hotel_search_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json", mime="application/json")
+
+# Cache statistics are filled in last so they include this run's lookup
+with cache_stats_placeholder.container():
+    cache_stats = result_cache.stats()
+    st.caption(f"🗄️ Result cache: {cache_stats['hits']} hits • {cache_stats['misses']} misses • {cache_stats['hit_rate']:.0%} hit rate")
+    tool_stats = mcp_pool.tool_cache.stats()
+    st.caption(f"🧰 Tool cache: {tool_stats['hits']} hits • {tool_stats['misses']} misses • {tool_stats['coalesced']} deduplicated")
+    for limiter in limiter_stats():
+        st.caption(f"🚦 {limiter['name']}: limit {limiter['limit']} • {limiter['in_flight']} running • "
+                   f"{limiter['queued']} queued • {limiter['throttled']} throttled • {limiter['retries']} retries")
+    breaker = mcp_pool.breaker.stats()
+    breaker_state = {'closed': "healthy", 'open': f"open, retrying in {breaker['retry_in']:.0f}s", 'half_open': "probing"}
+    st.caption(f"🔌 Airbnb circuit: {breaker_state[breaker['state']]} • {breaker['opens']} trips • {breaker['rejected']} calls failed fast")
+    if mcp_pool.latencies is not None:
+        hedging = mcp_pool.latencies.stats()
+        st.caption(f"🪞 Hedged tool calls: {hedging['hedged']} sent • {hedging['hedge_wins']} answered first")
+    if speculative_prefetch:
+        prefetch_stats = prefetcher.stats()
+        st.caption(f"🔮 Prefetches: {prefetch_stats['completed']} completed • {prefetch_stats['pending']} pending • "
+                   f"{prefetch_stats['cancelled']} cancelled as the form changed")
+    clients = get_client_registry().stats()
+    if clients['created']:
+        st.caption(f"🔐 LLM connections: {clients['tenants']} pooled {'HTTP/2' if clients['http2'] else 'HTTP/1.1'} "
+                   f"clients • {clients['in_flight']} calls in flight • {clients['evicted']} closed when idle")
+    if model_id == AUTO_MODEL_ID:
+        routing = get_model_router().stats()
+        models = " • ".join(f"{m}: " + ("—" if r['p50_ms'] is None else f"p50 {r['p50_ms']} ms")
+                            + ("" if r['healthy'] else " (cooling down)") for m, r in routing['models'].items())
+        st.caption(f"🧭 Model router: {routing['failovers']} failovers • {models}")
+    st.caption(f"🔗 Coalesced searches: {search_coalescer.coalesced} joined a run in flight • {search_coalescer.in_flight()} running now")
+    profile = rerun_profile.stats()
+    if profile['first_run_ms'] is not None:
+        reruns = (f"reruns p50 {profile['p50_ms']:.0f} ms, p95 {profile['p95_ms']:.0f} ms over {profile['reruns']}"
+                  if profile['reruns'] else "no reruns yet")
+        agent_stack = "loaded" if profile['deferred_loaded']['agno'] else "not loaded yet"
+        st.caption(f"🧪 Script: first run {profile['first_run_ms']:.0f} ms • {reruns} • agent stack {agent_stack}")
+
+# The history panel is filled in last so it already lists this run's search
+if search_history is not None:
+    with history_placeholder.container():
+        with st.expander("🕘 Search History", expanded=False):
+            history_filter = st.text_input("Find past searches", key='history_filter',
+                                           placeholder="e.g. Goa pool", help="Matches words in past queries and results")
+            entries = search_history.search(history_filter) if history_filter.strip() else search_history.recent()
+            if not entries:
+                st.caption("No matching searches" if history_filter.strip() else "No past searches yet")
+            for entry in entries:
+                searched_at = datetime.fromtimestamp(entry['created_at'])
+                label = f"{entry['location'] or entry['query'][:40]} • {searched_at:%d %b %H:%M}"
+                if st.button(label, key=f"history_{entry['id']}", use_container_width=True,
+                             help=entry.get('snippet') or entry['query']):
+                    past = search_history.get(entry['id'])
+                    if past is not None:
+                        st.session_state['search_results'] = {
+                            'query': past['query'], 'mode': past['mode'], 'result': past['result'],
+                            'timestamp': searched_at.strftime("%Y-%m-%d %H:%M:%S"), 'parameters': past['parameters'],
+                            'cached': False, 'history': True, 'timings': past['timings']
+                        }
+                        st.rerun()
+            history_stats = search_history.stats()
+            st.caption(f"{history_stats['entries']} saved • kept {history_stats['max_age_days']:g} days, "
+                       f"at most {history_stats['max_entries']:,}")
+
+rerun_profile.record(script_started)
@@ -0,0 +1,46 @@
+import sys
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+# Packages that should only be imported once a search runs
+DEFERRED_PACKAGES = ("agno", "openai", "mcp")
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1))))]
+
+
+def deferred_packages_loaded() -> Dict[str, bool]:
+    return {name: name in sys.modules for name in DEFERRED_PACKAGES}
+
+
+class RerunProfile:
+    """Wall time of each run of the Streamlit script, shared by all sessions.
+
+    The first run includes importing the app's modules; later reruns find
+    them in ``sys.modules`` and only pay for executing the script itself.
+    """
+
+    def __init__(self, window: int = 200):
+        self.first_run_ms: Optional[float] = None
+        self._samples: deque = deque(maxlen=window)
+
+    def record(self, started: float) -> None:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if self.first_run_ms is None:
+            self.first_run_ms = elapsed_ms
+        else:
+            self._samples.append(elapsed_ms)
+
+    def stats(self) -> Dict[str, Any]:
+        samples = list(self._samples)
+        return {
+            'first_run_ms': self.first_run_ms,
+            'reruns': len(samples),
+            'last_ms': samples[-1] if samples else None,
+            'p50_ms': percentile(samples, 50) if samples else None,
+            'p95_ms': percentile(samples, 95) if samples else None,
+            'deferred_loaded': deferred_packages_loaded(),
+        }
@@ -0,0 +1,103 @@
+import asyncio
+import concurrent.futures
+import queue
+import threading
+from typing import Any, AsyncIterator, Awaitable, Iterator, Optional
+
+_STREAM_END = object()
+
+
+class BackgroundLoop:
+    """A process-wide asyncio event loop running on a dedicated daemon thread.
+
+    Streamlit executes the script on a fresh thread for every rerun, so any
+    async resource created with ``asyncio.run`` dies with that rerun. Work
+    submitted here runs on one long-lived loop instead, which lets MCP
+    sessions, HTTP clients and caches persist between searches and lets
+    many user sessions run concurrently.
+    """
+
+    def __init__(self, name: str = "hotel-finder-loop"):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_forever, name=name, daemon=True)
+        self._thread.start()
+
+    def _run_forever(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro: Awaitable) -> concurrent.futures.Future:
+        """Schedule a coroutine on the loop and return a thread-safe future."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Awaitable, timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the loop and block the calling thread for its result.
+
+        On timeout the coroutine is cancelled before the error is raised.
+        """
+        if self.in_loop_thread():
+            raise RuntimeError("BackgroundLoop.run() cannot be called from the loop's own thread")
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    async def run_async(self, coro: Awaitable) -> Any:
+        """Await a coroutine on the background loop from another event loop."""
+        return await asyncio.wrap_future(self.submit(coro))
+
+    def stream(self, agen: AsyncIterator) -> Iterator:
+        """Drive an async generator on the loop and yield its items to the calling thread.
+
+        Exceptions raised by the generator are re-raised in the caller. If the
+        caller stops iterating early, the generator is cancelled.
+        """
+        items: "queue.Queue" = queue.Queue()
+
+        async def pump():
+            try:
+                async for item in agen:
+                    items.put(item)
+            except Exception as e:
+                items.put(_StreamError(e))
+            finally:
+                items.put(_STREAM_END)
+
+        future = self.submit(pump())
+        try:
+            while True:
+                item = items.get()
+                if item is _STREAM_END:
+                    break
+                if isinstance(item, _StreamError):
+                    raise item.error
+                yield item
+        finally:
+            future.cancel()
+
+    def in_loop_thread(self) -> bool:
+        return threading.current_thread() is self._thread
+
+    def stop(self) -> None:
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=5)
+
+
+class _StreamError:
+    def __init__(self, error: Exception):
+        self.error = error
+
+
+_background_loop: Optional[BackgroundLoop] = None
+_background_loop_lock = threading.Lock()
+
+
+def get_background_loop() -> BackgroundLoop:
+    """Return the shared background loop, starting it on first use."""
+    global _background_loop
+    with _background_loop_lock:
+        if _background_loop is None:
+            _background_loop = BackgroundLoop()
+        return _background_loop
@@ -0,0 +1,185 @@
+"""Headless batch runner for hotel searches.
+
+Reads search specs from a JSONL file, one ``search_parameters``-shaped object
+per line (as built by the Streamlit app), validates them, and runs them
+concurrently through the same agent pipeline. Results are appended to an
+output JSONL file as they finish, so an interrupted run can be resumed by
+running the same command again; specs that already have a successful result
+are skipped.
+
+Example spec line:
+    {"search_mode": "Quick Search", "location": "Goa, India", "search_type": "Best Deals"}
+
+Usage:
+    python batch_search.py specs.jsonl -o results.jsonl --workers 4
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+
+from dotenv import load_dotenv
+load_dotenv()  # before the local modules below read their settings from the environment
+
+from gazetteer import get_gazetteer
+from hotel_agent import (
+    DEFAULT_MODEL_ID, DEFAULT_TEMPERATURE, build_search_query, format_agent_error, is_cacheable_result,
+    is_error_result, run_hotel_agent, validate_search_params,
+)
+from mcp_pool import MCPServerPool
+from result_cache import SearchResultCache, canonical_search_key, ttl_for_params
+from tracing import Trace, summarize_spans
+
+# Defaults mirror the sidebar settings of the Streamlit app
+SPEC_DEFAULTS = {
+    'timeout': 60,
+    'max_results': 20,
+    'model_id': DEFAULT_MODEL_ID,
+    'temperature': DEFAULT_TEMPERATURE,
+    'output_format': 'json',
+    'search_mode': 'Quick Search',
+    'ignoreRobotsText': True,
+}
+# Form fields the app always sends, at their default values, so batch results share its cache keys
+MODE_DEFAULTS = {
+    'Quick Search': {'search_type': 'Find Hotels'},
+    'Advanced Search': {'children': 0, 'infants': 0, 'pets': 0, 'room_type': 'Any', 'star_rating': 'Any',
+                        'amenities': [], 'pipeline': 'direct'},
+}
+
+
+def load_specs(path: str) -> List[Dict[str, Any]]:
+    specs = []
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                spec = json.loads(line)
+            except json.JSONDecodeError as e:
+                print(f"Skipping line {line_no}: invalid JSON ({e})", file=sys.stderr)
+                continue
+            if not isinstance(spec, dict):
+                print(f"Skipping line {line_no}: not a JSON object", file=sys.stderr)
+                continue
+            spec['_line'] = line_no
+            specs.append(spec)
+    return specs
+
+
+def completed_ids(path: str) -> Set[str]:
+    """IDs that already have a successful result in the output file."""
+    done: Set[str] = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A crash can leave a truncated last line; that spec is simply rerun
+                continue
+            if record.get('status') == 'ok':
+                done.add(record['id'])
+    return done
+
+
+def prepare(spec: Dict[str, Any]) -> tuple[str, str, Dict[str, Any]]:
+    fields = {k: v for k, v in spec.items() if k not in ('id', 'query', '_line')}
+    search_mode = fields.get('search_mode', SPEC_DEFAULTS['search_mode'])
+    params = {**SPEC_DEFAULTS, **MODE_DEFAULTS.get(search_mode, {}), **fields}
+    if isinstance(params.get('location'), str):
+        # Same spelling and cache key as the app for every way of writing a known place
+        params['location'], params['location_id'] = get_gazetteer().canonical_location(params['location'])
+    query = spec.get('query') or build_search_query(params)
+    spec_id = spec.get('id') or canonical_search_key(query, params)
+    return spec_id, query, params
+
+
+async def run_batch(specs: List[Dict[str, Any]], output_path: str, workers: int,
+                    api_key: Optional[str], result_cache: Optional[SearchResultCache]) -> Dict[str, int]:
+    counts = {'ok': 0, 'partial': 0, 'error': 0, 'invalid': 0, 'skipped': 0}
+    done = completed_ids(output_path)
+    pool = MCPServerPool(size=workers)
+    semaphore = asyncio.Semaphore(workers)
+
+    with open(output_path, "a", encoding="utf-8") as out:
+        def write(record: Dict[str, Any]) -> None:
+            out.write(json.dumps(record, default=str) + "\n")
+            out.flush()
+            counts[record['status']] += 1
+            print(f"[{record['status']}] {record['id'][:12]} {record['query'][:70]}", file=sys.stderr)
+
+        async def run_one(spec: Dict[str, Any]) -> None:
+            try:
+                spec_id, query, params = prepare(spec)
+                if spec_id in done:
+                    counts['skipped'] += 1
+                    return
+                record = {'id': spec_id, 'line': spec['_line'], 'query': query, 'parameters': params}
+                is_valid, message = validate_search_params(params, params['search_mode'])
+            except (TypeError, ValueError, AttributeError) as e:
+                # Wrongly typed fields (e.g. "adults": "2") fail this spec, not the whole batch
+                raw = {k: v for k, v in spec.items() if k != '_line'}
+                spec_id = str(spec.get('id') or hashlib.sha256(json.dumps(raw, sort_keys=True, default=str).encode()).hexdigest())
+                write({'id': spec_id, 'line': spec['_line'], 'query': str(spec.get('query') or ""), 'parameters': raw,
+                       'status': 'invalid', 'result': f"Invalid spec: {e}"})
+                return
+            if not is_valid or not query.strip():
+                write({**record, 'status': 'invalid', 'result': message if not is_valid else "Empty query"})
+                return
+            async with semaphore:
+                trace = Trace()
+                started = time.perf_counter()
+                try:
+                    result = await run_hotel_agent(query, params, pool=pool, api_key=api_key, trace=trace)
+                except Exception as e:
+                    result = format_agent_error(e)
+                elapsed = time.perf_counter() - started
+            if is_error_result(result):
+                status = 'error'
+            elif not is_cacheable_result(result):
+                status = 'partial'
+            else:
+                status = 'ok'
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            if status == 'ok' and result_cache is not None:
+                result_cache.set(canonical_search_key(query, params), {'result': result, 'timestamp': timestamp},
+                                 ttl_for_params(params))
+            write({**record, 'status': status, 'result': result, 'timestamp': timestamp, 'elapsed_s': round(elapsed, 2),
+                   'timings': summarize_spans(trace.to_list())})
+
+        try:
+            # Warm the servers up front so start-up does not eat into the first searches' budgets
+            await pool.start()
+            await asyncio.gather(*(run_one(spec) for spec in specs))
+        finally:
+            await pool.close()
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run hotel searches from a JSONL file without the Streamlit UI.")
+    parser.add_argument("specs", help="Input JSONL file of search specs")
+    parser.add_argument("-o", "--output", default="batch_results.jsonl", help="Output JSONL file (appended to)")
+    parser.add_argument("-w", "--workers", type=int, default=4, help="Searches to run at once (also the MCP pool size)")
+    parser.add_argument("--cache-db", default=os.getenv("HOTEL_RESULT_CACHE_DB"),
+                        help="SQLite result cache to fill so the app can serve these searches instantly")
+    args = parser.parse_args()
+
+    api_key = os.getenv("PERPLEXITY_API_KEY")
+    if not api_key:
+        parser.error("PERPLEXITY_API_KEY is not set")
+    result_cache = SearchResultCache(db_path=args.cache_db) if args.cache_db else None
+    counts = asyncio.run(run_batch(load_specs(args.specs), args.output, max(1, args.workers), api_key, result_cache))
+    print(", ".join(f"{k}: {v}" for k, v in counts.items()))
+
+
+if __name__ == "__main__":
+    main()
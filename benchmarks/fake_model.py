@@ -0,0 +1,210 @@
+"""Deterministic stand-in for the Perplexity model used by the benchmarks.
+
+Plays the tool-use conversation a real model has with the Airbnb server:
+search the requested location, fetch details for the first few listings
+(in one batched call when the agent offers the batch tool), then answer
+in whichever format the agent's instructions ask for. Think
+time and per-chunk streaming delay are configurable so LLM latency can be
+modelled without calling an API.
+"""
+import asyncio
+import hashlib
+import json
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Iterator, List
+
+from agno.models.base import Model
+from agno.models.message import Message
+from agno.models.response import ModelResponse
+
+from listings import listing_details_fields
+
+_LOCATION_RE = re.compile(r"\bin (.+?)(?: for dates | for | with | that | rated |$)")
+CHUNK_CHARS = 48
+BATCH_DETAILS_TOOL = "airbnb_listing_details_batch"
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+# Stands in for the provider's prompt cache: every message prefix sent so far
+_seen_prefixes: set = set()
+
+
+def _cached_prefix_tokens(messages: List[Message]) -> int:
+    """Tokens of the longest leading run of messages already sent in an earlier request."""
+    digest, total, cached, hit = hashlib.sha256(), 0, 0, True
+    for message in messages:
+        digest.update(f"{message.role}\0{message.content}\0".encode())
+        total += _estimate_tokens(str(message.content or ""))
+        key = digest.hexdigest()
+        hit = hit and key in _seen_prefixes
+        if hit:
+            cached = total
+        _seen_prefixes.add(key)
+    return cached
+
+
+def _tool_names(tools: Any) -> List[str]:
+    return [(t.get('function') or {}).get('name', '') for t in tools or [] if isinstance(t, dict)]
+
+
+def _tool_call(call_id: str, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    return {'id': call_id, 'type': "function", 'function': {'name': name, 'arguments': json.dumps(arguments)}}
+
+
+@dataclass
+class FakeHotelModel(Model):
+    id: str = "fake-hotel-model"
+    name: str = "FakeHotelModel"
+    provider: str = "Benchmark"
+
+    # Delay before each turn's first token, and between streamed chunks
+    think_ms: float = 300.0
+    chunk_ms: float = 5.0
+    # Listings the model asks details for after searching
+    details_per_search: int = 3
+
+    def _plan(self, messages: List[Message], tools: Any = None) -> ModelResponse:
+        """Decide the next turn from the conversation so far."""
+        system = next((str(m.content) for m in messages if m.role == 'system'), "")
+        # The query is the user turn's first line; the search's limits follow it
+        user = next((str(m.content) for m in reversed(messages) if m.role == 'user'), "").split("\n", 1)[0]
+        tool_results = [str(m.content) for m in messages if m.role == 'tool']
+        usage = {'input_tokens': sum(_estimate_tokens(str(m.content or "")) for m in messages),
+                 'cached_tokens': _cached_prefix_tokens(messages)}
+
+        if not tools:
+            # Summarizing results the pipeline already fetched
+            content = ("**Best value:** the top listing balances price and rating. "
+                       "**Most comfortable:** the highest rated option. " * 3).strip()
+            usage['output_tokens'] = _estimate_tokens(content)
+            return ModelResponse(role="assistant", content=content, response_usage=usage)
+
+        if not tool_results:
+            match = _LOCATION_RE.search(user)
+            location = match.group(1).strip() if match else user
+            usage['output_tokens'] = 20
+            return ModelResponse(role="assistant", tool_calls=[
+                _tool_call("call_search", "airbnb_search", {'location': location, 'ignoreRobotsText': True})],
+                response_usage=usage)
+
+        listings = self._listings(tool_results[0])
+        if len(tool_results) == 1 and listings and self.details_per_search:
+            wanted = listings[:self.details_per_search]
+            if BATCH_DETAILS_TOOL in _tool_names(tools):
+                # As instructed, one batched call rather than one call per listing
+                usage['output_tokens'] = 15 + 5 * len(wanted)
+                return ModelResponse(role="assistant", tool_calls=[_tool_call(
+                    "call_details", BATCH_DETAILS_TOOL, {'ids': [listing['id'] for listing in wanted]})],
+                    response_usage=usage)
+            usage['output_tokens'] = 15 * self.details_per_search
+            return ModelResponse(role="assistant", tool_calls=[
+                _tool_call(f"call_details_{i}", "airbnb_listing_details", {'id': listing['id'], 'ignoreRobotsText': True})
+                for i, listing in enumerate(wanted)], response_usage=usage)
+
+        details = [d for text in tool_results[1:] for d in self._details(text)]
+        if "STRUCTURED RESPONSE FORMAT" in system:
+            content = self._json_answer(user, listings, details)
+        else:
+            content = self._markdown_answer(user, listings)
+        usage['output_tokens'] = _estimate_tokens(content)
+        return ModelResponse(role="assistant", content=content, response_usage=usage)
+
+    @staticmethod
+    def _listings(text: str) -> List[Dict[str, Any]]:
+        try:
+            return json.loads(text).get('searchResults', [])
+        except (ValueError, AttributeError):
+            return []
+
+    @staticmethod
+    def _details(text: str) -> List[Dict[str, Any]]:
+        """Listing fields per listing in a single or batched, raw or compacted details result."""
+        try:
+            payload = json.loads(text)
+            entries = payload.get('listings', [payload])
+        except (ValueError, AttributeError):
+            return [{}]
+        return [(listing_details_fields(json.dumps(entry)) or {}) if 'details' in entry else entry for entry in entries]
+
+    @staticmethod
+    def _summary(listing: Dict[str, Any]) -> Dict[str, Any]:
+        if 'demandStayListing' not in listing:
+            # Already compacted to the answer's fields
+            return {key: listing.get(key) for key in ('id', 'name', 'rating', 'reviews', 'price', 'link', 'area')}
+        rating_label = listing.get('avgRatingA11yLabel', "")
+        numbers = re.findall(r"[\d.]+", rating_label)
+        price_label = listing.get('structuredDisplayPrice', {}).get('primaryLine', {}).get('accessibilityLabel', "")
+        price = re.search(r"[\d,]+", price_label)
+        return {
+            'id': listing.get('id'),
+            'name': listing['demandStayListing']['description']['name']['localizedStringWithTranslationPreference'],
+            'rating': float(numbers[0]) if numbers else None,
+            'reviews': int(numbers[2]) if len(numbers) > 2 else None,
+            'price': float(price.group().replace(",", "")) if price else None,
+            'link': listing.get('url'),
+            'area': listing.get('structuredContent', {}).get('secondaryLine'),
+        }
+
+    def _json_answer(self, user: str, listings: List[Dict[str, Any]], details: List[Dict[str, Any]]) -> str:
+        hotels = []
+        for i, listing in enumerate(listings):
+            hotel = self._summary(listing)
+            if i < len(details):
+                hotel.update({
+                    'amenities': details[i].get('amenities', []),
+                    'distance_center_km': details[i].get('distance_center_km'),
+                    'distance_airport_km': details[i].get('distance_airport_km'),
+                    'cancellation': details[i].get('cancellation'),
+                })
+            hotels.append(hotel)
+        match = _LOCATION_RE.search(user)
+        return json.dumps({'location': match.group(1).strip() if match else "", 'hotels': hotels})
+
+    def _markdown_answer(self, user: str, listings: List[Dict[str, Any]]) -> str:
+        lines = ["## 🏨 Quick Hotel Results", f"Results for: {user}"]
+        for listing in listings:
+            hotel = self._summary(listing)
+            lines += [f"**🏨 {hotel['name']}** ⭐ {hotel['rating']}/5",
+                      f"- 💰 **Price:** ${hotel['price']:,.0f}/night" if hotel['price'] else "- 💰 **Price:** N/A",
+                      f"- 🔗 **Book Now:** {hotel['link']}", "---"]
+        return "\n".join(lines)
+
+    def _chunks(self, response: ModelResponse) -> List[ModelResponse]:
+        if not response.content:
+            return [response]
+        text = response.content
+        pieces = [text[i:i + CHUNK_CHARS] for i in range(0, len(text), CHUNK_CHARS)]
+        chunks = [ModelResponse(role="assistant", content=piece) for piece in pieces]
+        chunks[-1].response_usage = response.response_usage
+        return chunks
+
+    async def ainvoke(self, messages: List[Message], **kwargs) -> ModelResponse:
+        await asyncio.sleep(self.think_ms / 1000)
+        return self._plan(messages, kwargs.get('tools'))
+
+    async def ainvoke_stream(self, messages: List[Message], **kwargs) -> AsyncIterator[ModelResponse]:
+        await asyncio.sleep(self.think_ms / 1000)
+        for chunk in self._chunks(self._plan(messages, kwargs.get('tools'))):
+            yield chunk
+            await asyncio.sleep(self.chunk_ms / 1000)
+
+    def invoke(self, messages: List[Message], **kwargs) -> ModelResponse:
+        time.sleep(self.think_ms / 1000)
+        return self._plan(messages, kwargs.get('tools'))
+
+    def invoke_stream(self, messages: List[Message], **kwargs) -> Iterator[ModelResponse]:
+        time.sleep(self.think_ms / 1000)
+        for chunk in self._chunks(self._plan(messages, kwargs.get('tools'))):
+            yield chunk
+            time.sleep(self.chunk_ms / 1000)
+
+    def parse_provider_response(self, response: ModelResponse, **kwargs) -> ModelResponse:
+        return response
+
+    def parse_provider_response_delta(self, response: ModelResponse) -> ModelResponse:
+        return response
@@ -0,0 +1,98 @@
+"""Import-time profile of the Streamlit app's start-up.
+
+Imports the modules ``Hotel_selection.py`` imports, in a fresh interpreter
+under ``python -X importtime``, and reports the total, the slowest
+modules, and whether any of the packages deferred to the first search
+(agno, the OpenAI SDK, the MCP SDK) were pulled in. It then times
+importing that deferred agent stack, which the first search pays instead.
+Run-time figures for reruns are shown in the app's sidebar.
+
+Usage (from the repository root):
+    python -m benchmarks.profile_startup
+    python -m benchmarks.profile_startup --top 25 --output startup.json
+"""
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+from typing import Any, Dict, List, Optional
+
+from app_profile import DEFERRED_PACKAGES
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_SCRIPT = os.path.join(REPO_DIR, "Hotel_selection.py")
+# What the first search imports on top of the app's own modules
+AGENT_STACK = ["agno.agent", "agno.models.perplexity", "agno.tools.mcp", "mcp.client.stdio"]
+
+
+def app_imports(path: str = APP_SCRIPT) -> List[str]:
+    """Top-level modules imported by the app script, in order."""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            modules.append(node.module)
+    return list(dict.fromkeys(modules))
+
+
+def import_profile(modules: List[str], preload: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Import ``modules`` in a fresh interpreter and parse its ``-X importtime`` output.
+
+    Modules in ``preload`` are imported first and left out of the figures.
+    """
+    code = "".join(f"import {m}\n" for m in preload or [])
+    code += "import sys; print('--- start', file=sys.stderr)\n"
+    code += "".join(f"import {m}\n" for m in modules)
+    code += f"import json; print(json.dumps({{p: p in sys.modules for p in {list(DEFERRED_PACKAGES)!r}}}))\n"
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=REPO_DIR,
+                               capture_output=True, text=True, check=True)
+    stderr = completed.stderr.split("--- start\n", 1)[-1]
+    timings = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        name = name.rstrip()
+        timings.append({'module': name.strip(), 'self_ms': int(self_us) / 1000,
+                        'cumulative_ms': int(cumulative_us) / 1000, 'depth': (len(name) - len(name.lstrip()) - 1) // 2})
+    top_level = [t for t in timings if t['depth'] == 0]
+    return {
+        'total_ms': round(sum(t['cumulative_ms'] for t in top_level), 1),
+        'modules': timings,
+        'deferred_loaded': json.loads(completed.stdout.strip().splitlines()[-1]),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Profile the app's import time.")
+    parser.add_argument("--top", type=int, default=15, help="Slowest modules to list")
+    parser.add_argument("--output", help="Also write the report to this JSON file")
+    args = parser.parse_args(argv)
+
+    modules = [m for m in app_imports() if m != "streamlit"]
+    # Streamlit is already imported by the server before the script first runs
+    startup = import_profile(modules, preload=["streamlit"])
+    first_search = import_profile(AGENT_STACK, preload=["streamlit"] + modules)
+
+    print(f"App start-up imports: {startup['total_ms']:.0f} ms")
+    print(f"  {'module':<50}{'self ms':>10}{'cumul. ms':>12}")
+    for t in sorted(startup['modules'], key=lambda t: t['cumulative_ms'], reverse=True)[:args.top]:
+        print(f"  {t['module']:<50}{t['self_ms']:>10.1f}{t['cumulative_ms']:>12.1f}")
+    loaded = [name for name, was_loaded in startup['deferred_loaded'].items() if was_loaded]
+    print(f"Deferred packages imported at start-up: {', '.join(loaded) or 'none'}")
+    print(f"Agent stack imported by the first search: {first_search['total_ms']:.0f} ms")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({'startup': startup, 'first_search': first_search}, f, indent=2)
+    # Fail when a deferred package creeps back into the start-up path
+    return 1 if loaded else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,235 @@
+"""Offline latency benchmarks for the hotel search pipeline.
+
+Runs ``run_hotel_agent`` end to end against the stub Airbnb MCP server and
+the fake model, so no API key or network is needed, and times each phase
+of every search: pool lease, server spawn, MCP handshake, tool listing,
+LLM turns, tool calls and local rendering. Two pool modes are measured:
+
+- ``cold``: a fresh single-server pool per search, as before pooling
+- ``pooled``: one warm pool sized to the concurrency level
+
+Searches go through the tool-using agent (``--pipelines agent``) and/or the
+direct Advanced Search pipeline (``--pipelines direct``). ``--slow-call-rate``
+gives the stub a latency tail, and ``--hedge`` turns on hedged tool calls to
+measure how much of that tail they remove.
+
+Per-phase p50/p95/p99 are compared with a stored baseline and the script
+exits non-zero when a p95 regresses beyond the tolerance.
+
+Usage (from the repository root):
+    python -m benchmarks.run_benchmarks
+    python -m benchmarks.run_benchmarks --concurrency 1 8 --searches 32
+    python -m benchmarks.run_benchmarks --update-baseline
+    python -m benchmarks.run_benchmarks --modes pooled --slow-call-rate 0.05 --hedge
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+from mcp import StdioServerParameters
+
+from benchmarks.fake_model import FakeHotelModel
+from hotel_agent import build_advanced_query, build_quick_query, is_error_result, run_hotel_agent
+from mcp_pool import MCPServerPool
+from tool_cache import ToolCallCache
+from tracing import Trace
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+STUB_SERVER = os.path.join(BENCHMARK_DIR, "stub_airbnb_server.py")
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, "baseline.json")
+LOCATIONS = ["Goa, India", "Lisbon, Portugal", "Kyoto, Japan", "Austin, Texas", "Cape Town, South Africa",
+             "Reykjavik, Iceland", "Hanoi, Vietnam", "Porto, Portugal"]
+# Span names reported as phases; tool spans are grouped by tool name
+PHASES = ["lease", "mcp.spawn", "mcp.handshake", "mcp.initialize", "llm",
+          "tool:airbnb_search", "tool:airbnb_listing_details", "render"]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    return {'n': len(values), 'p50': round(percentile(values, 50), 1),
+            'p95': round(percentile(values, 95), 1), 'p99': round(percentile(values, 99), 1)}
+
+
+def stub_server_params(search_latency_ms: float, details_latency_ms: float,
+                       slow_call_rate: float = 0.0) -> StdioServerParameters:
+    env = {**os.environ, 'STUB_SEARCH_LATENCY_MS': str(search_latency_ms),
+           'STUB_DETAILS_LATENCY_MS': str(details_latency_ms), 'STUB_SLOW_CALL_RATE': str(slow_call_rate)}
+    return StdioServerParameters(command=sys.executable, args=[STUB_SERVER], env=env)
+
+
+def search_params(index: int, pipeline: str = 'agent') -> tuple[str, Dict[str, Any]]:
+    params = {
+        'search_mode': 'Quick Search',
+        'location': LOCATIONS[index % len(LOCATIONS)],
+        'search_type': 'Find Hotels',
+        'ignoreRobotsText': True,
+        'output_format': 'json',
+        'timeout': 120,
+        'max_results': 10,
+    }
+    if pipeline == 'direct':
+        params.update({'search_mode': 'Advanced Search', 'pipeline': 'direct', 'adults': 2,
+                       'star_rating': '4+ Stars', 'amenities': ['WiFi', 'Pool']})
+        return build_advanced_query(params), params
+    return build_quick_query(params['location'], params['search_type']), params
+
+
+async def run_level(pipeline: str, mode: str, concurrency: int, searches: int,
+                    args: argparse.Namespace) -> Dict[str, Any]:
+    """Run ``searches`` searches, ``concurrency`` at a time, and summarize their phases."""
+    server_params = stub_server_params(args.search_latency_ms, args.details_latency_ms, args.slow_call_rate)
+
+    def new_pool(size: int) -> MCPServerPool:
+        # Tool results are not memoized unless asked, so every search does the real work
+        return MCPServerPool(server_params=server_params, size=size, health_check_interval=3600,
+                             tool_cache=None if args.tool_cache else ToolCallCache(ttls={}), hedge=args.hedge)
+
+    shared_pool = new_pool(concurrency) if mode == 'pooled' else None
+    if shared_pool is not None:
+        await shared_pool.start()
+    semaphore = asyncio.Semaphore(concurrency)
+    phases: Dict[str, List[float]] = defaultdict(list)
+    errors = 0
+
+    async def one(index: int) -> None:
+        nonlocal errors
+        query, params = search_params(index, pipeline)
+        model = FakeHotelModel(think_ms=args.think_ms, chunk_ms=args.chunk_ms,
+                               details_per_search=args.details_per_search)
+        async with semaphore:
+            pool = shared_pool or new_pool(1)
+            trace = Trace()
+            started = time.perf_counter()
+            try:
+                result = await run_hotel_agent(query, params, pool=pool, model=model, trace=trace)
+            finally:
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                if shared_pool is None:
+                    await pool.close()
+        if is_error_result(result):
+            errors += 1
+            print(f"  search {index} failed: {result[:200]}", file=sys.stderr)
+            return
+        phases['total'].append(elapsed_ms)
+        for name in PHASES:
+            durations = trace.durations(name)
+            if durations:
+                # Several LLM turns or tool calls per search: report their sum
+                phases[name].append(sum(durations))
+
+    try:
+        await asyncio.gather(*(one(i) for i in range(searches)))
+    finally:
+        if shared_pool is not None:
+            await shared_pool.close()
+    return {'errors': errors, 'phases': {name: summarize(values) for name, values in phases.items()}}
+
+
+def print_level(key: str, level: Dict[str, Any]) -> None:
+    print(f"\n{key}  (errors: {level['errors']})")
+    print(f"  {'phase':<30}{'n':>5}{'p50 ms':>11}{'p95 ms':>11}{'p99 ms':>11}")
+    for name, stats in level['phases'].items():
+        print(f"  {name:<30}{stats['n']:>5}{stats['p50']:>11.1f}{stats['p95']:>11.1f}{stats['p99']:>11.1f}")
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float, noise_floor_ms: float) -> List[str]:
+    """Phases whose p95 got slower than the baseline by more than the tolerance."""
+    regressions = []
+    for key, level in results.items():
+        base_level = baseline.get('results', {}).get(key)
+        if base_level is None:
+            continue
+        if level['errors'] > base_level.get('errors', 0):
+            regressions.append(f"{key}: {level['errors']} failed searches (baseline {base_level.get('errors', 0)})")
+        for name, stats in level['phases'].items():
+            base = base_level['phases'].get(name)
+            if base is None:
+                continue
+            slower = stats['p95'] - base['p95']
+            if slower > noise_floor_ms and stats['p95'] > base['p95'] * (1 + tolerance):
+                regressions.append(f"{key} {name}: p95 {stats['p95']:.1f} ms vs baseline {base['p95']:.1f} ms")
+    return regressions
+
+
+def settings(args: argparse.Namespace) -> Dict[str, Any]:
+    return {name: getattr(args, name) for name in
+            ('pipelines', 'searches', 'think_ms', 'chunk_ms', 'details_per_search', 'search_latency_ms',
+             'details_latency_ms', 'slow_call_rate', 'hedge', 'tool_cache')}
+
+
+async def run_all(args: argparse.Namespace) -> Dict[str, Any]:
+    results = {}
+    for pipeline in args.pipelines:
+        for mode in args.modes:
+            for concurrency in args.concurrency:
+                key = f"{pipeline}/{mode}/c{concurrency}"
+                print(f"Running {key} ...", file=sys.stderr)
+                results[key] = await run_level(pipeline, mode, concurrency, max(args.searches, concurrency), args)
+                print_level(key, results[key])
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the hotel search pipeline offline.")
+    parser.add_argument("--pipelines", nargs="+", choices=["agent", "direct"], default=["agent", "direct"])
+    parser.add_argument("--modes", nargs="+", choices=["cold", "pooled"], default=["cold", "pooled"])
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 4, 8])
+    parser.add_argument("--searches", type=int, default=16, help="Searches per mode and concurrency level")
+    parser.add_argument("--think-ms", type=float, default=300.0, help="Fake model delay before each turn")
+    parser.add_argument("--chunk-ms", type=float, default=5.0, help="Fake model delay between streamed chunks")
+    parser.add_argument("--details-per-search", type=int, default=3, help="Listing details fetched per search")
+    parser.add_argument("--search-latency-ms", type=float, default=150.0, help="Stub airbnb_search latency")
+    parser.add_argument("--details-latency-ms", type=float, default=80.0, help="Stub airbnb_listing_details latency")
+    parser.add_argument("--slow-call-rate", type=float, default=0.0,
+                        help="Share of stub tool calls that are ten times slower")
+    parser.add_argument("--hedge", action="store_true", help="Hedge slow tool calls on another pooled server")
+    parser.add_argument("--tool-cache", action="store_true", help="Keep the MCP tool result cache enabled")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON file")
+    parser.add_argument("--update-baseline", action="store_true", help="Write these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative p95 slowdown")
+    parser.add_argument("--noise-floor-ms", type=float, default=50.0, help="Ignore p95 slowdowns smaller than this")
+    parser.add_argument("--output", help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    report = {'settings': settings(args), 'results': asyncio.run(run_all(args))}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --update-baseline to create one")
+        return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get('settings') != report['settings']:
+        print("\nWarning: benchmark settings differ from the baseline's; comparison may not be meaningful")
+    regressions = compare(report['results'], baseline, args.tolerance, args.noise_floor_ms)
+    if regressions:
+        print("\nRegressions against baseline:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print("\nNo regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
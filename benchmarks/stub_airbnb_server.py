@@ -0,0 +1,117 @@
+"""Stand-in for @openbnb/mcp-server-airbnb that serves synthetic listings.
+
+Exposes the same two tools with the same argument names and response shape,
+so the pool, session proxies and agent run exactly as they do against the
+real server, minus the network. Listings are derived from the location, so
+every run sees the same data. Per-call latency is simulated with
+STUB_SEARCH_LATENCY_MS and STUB_DETAILS_LATENCY_MS; with STUB_SLOW_CALL_RATE,
+that share of calls takes STUB_SLOW_CALL_FACTOR times as long, as a slow
+upstream's tail would.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import random
+from typing import Any, Dict, List, Optional
+
+from mcp.server.fastmcp import FastMCP
+
+SEARCH_LATENCY_MS = float(os.getenv("STUB_SEARCH_LATENCY_MS", "150"))
+DETAILS_LATENCY_MS = float(os.getenv("STUB_DETAILS_LATENCY_MS", "80"))
+SLOW_CALL_RATE = float(os.getenv("STUB_SLOW_CALL_RATE", "0"))
+SLOW_CALL_FACTOR = float(os.getenv("STUB_SLOW_CALL_FACTOR", "10"))
+PAGE_SIZE = 18
+PAGES = 3
+
+AMENITIES = ["Wifi", "Pool", "Free parking", "Kitchen", "Air conditioning", "Gym",
+             "Breakfast", "Washer", "Hot tub", "Pet friendly", "Workspace", "Beach access"]
+AREAS = ["Old Town", "City Centre", "Riverside", "Harbour", "University District", "Airport Road", "Hillside"]
+KINDS = ["Apartment", "Boutique Hotel", "Guesthouse", "Villa", "Loft", "Studio", "Resort"]
+CANCELLATION = ["Free cancellation before check-in", "Free cancellation for 48 hours", "Non-refundable"]
+
+mcp = FastMCP("airbnb", log_level="WARNING")
+
+
+def _rng(*parts: Any) -> random.Random:
+    seed = hashlib.sha256("|".join(str(p).casefold() for p in parts).encode()).hexdigest()
+    return random.Random(int(seed[:16], 16))
+
+
+async def _latency(ms: float) -> None:
+    slow = SLOW_CALL_RATE and random.random() < SLOW_CALL_RATE
+    await asyncio.sleep(ms * (SLOW_CALL_FACTOR if slow else 1) / 1000)
+
+
+def _listing(location: str, index: int) -> Dict[str, Any]:
+    rng = _rng(location, index)
+    listing_id = str(10_000_000 + int(hashlib.sha256(f"{location.casefold()}|{index}".encode()).hexdigest()[:7], 16))
+    rating = round(rng.uniform(3.6, 5.0), 2)
+    reviews = rng.randint(3, 900)
+    price = rng.randint(35, 650)
+    name = f"{rng.choice(KINDS)} in {rng.choice(AREAS)}"
+    return {
+        'id': listing_id,
+        'url': f"https://www.airbnb.com/rooms/{listing_id}",
+        'demandStayListing': {
+            'description': {'name': {'localizedStringWithTranslationPreference': name}},
+            'location': {'coordinate': {'latitude': round(rng.uniform(-60, 60), 5),
+                                        'longitude': round(rng.uniform(-170, 170), 5)}},
+        },
+        'badges': "Guest favorite" if rating >= 4.8 else "",
+        'structuredContent': {'primaryLine': f"{rng.randint(1, 4)} bedrooms", 'secondaryLine': rng.choice(AREAS)},
+        'avgRatingA11yLabel': f"{rating} out of 5 average rating, {reviews} reviews",
+        'structuredDisplayPrice': {
+            'primaryLine': {'accessibilityLabel': f"${price} per night"},
+            'explanationData': {'title': "Price details", 'priceDetails': f"${price} x 1 night"},
+        },
+    }
+
+
+@mcp.tool()
+async def airbnb_search(location: str, placeId: Optional[str] = None, checkin: Optional[str] = None,
+                        checkout: Optional[str] = None, adults: Optional[int] = None, children: Optional[int] = None,
+                        infants: Optional[int] = None, pets: Optional[int] = None, minPrice: Optional[int] = None,
+                        maxPrice: Optional[int] = None, cursor: Optional[str] = None,
+                        ignoreRobotsText: Optional[bool] = None) -> str:
+    """Search for Airbnb listings with various filters and pagination."""
+    await _latency(SEARCH_LATENCY_MS)
+    page = int(cursor or 0)
+    listings: List[Dict[str, Any]] = [_listing(location, i) for i in range(page * PAGE_SIZE, (page + 1) * PAGE_SIZE)]
+    if minPrice is not None or maxPrice is not None:
+        def price(listing):
+            return int(listing['structuredDisplayPrice']['primaryLine']['accessibilityLabel'][1:].split()[0])
+        listings = [l for l in listings if (minPrice is None or price(l) >= minPrice)
+                    and (maxPrice is None or price(l) <= maxPrice)]
+    return json.dumps({
+        'searchUrl': f"https://www.airbnb.com/s/{location.replace(' ', '-')}/homes",
+        'searchResults': listings,
+        'paginationInfo': {'pageCursors': [str(p) for p in range(PAGES)],
+                           'nextPageCursor': str(page + 1) if page + 1 < PAGES else None},
+    })
+
+
+@mcp.tool()
+async def airbnb_listing_details(id: str, checkin: Optional[str] = None, checkout: Optional[str] = None,
+                                 adults: Optional[int] = None, children: Optional[int] = None,
+                                 infants: Optional[int] = None, pets: Optional[int] = None,
+                                 ignoreRobotsText: Optional[bool] = None) -> str:
+    """Get detailed information about a specific Airbnb listing."""
+    await _latency(DETAILS_LATENCY_MS)
+    rng = _rng("details", id)
+    return json.dumps({
+        'listingUrl': f"https://www.airbnb.com/rooms/{id}",
+        'details': [
+            {'id': "LOCATION_DEFAULT", 'lat': round(rng.uniform(-60, 60), 5), 'lng': round(rng.uniform(-170, 170), 5),
+             'subtitle': rng.choice(AREAS), 'distanceToCenterKm': round(rng.uniform(0.2, 15), 1),
+             'distanceToAirportKm': round(rng.uniform(3, 45), 1)},
+            {'id': "AMENITIES_DEFAULT", 'title': "What this place offers",
+             'seeAllAmenitiesGroups': [{'title': "Amenities", 'amenities': rng.sample(AMENITIES, rng.randint(3, 8))}]},
+            {'id': "POLICIES_DEFAULT", 'cancellationPolicy': rng.choice(CANCELLATION),
+             'houseRules': ["Check-in after 3:00 PM", "Checkout before 11:00 AM"]},
+        ],
+    })
+
+
+if __name__ == "__main__":
+    mcp.run(transport="stdio")
@@ -0,0 +1,140 @@
+import asyncio
+import math
+import os
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from session_proxy import SessionProxy
+
+# Breaker settings (overridable through .env)
+FAILURE_THRESHOLD = int(os.getenv("MCP_BREAKER_FAILURES", "5"))
+RESET_TIMEOUT = float(os.getenv("MCP_BREAKER_RESET", "30"))
+CALL_TIMEOUT = float(os.getenv("MCP_CALL_TIMEOUT", "30"))
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+# Tool results that mean the upstream itself failed; rate limits are the limiter's business
+_UPSTREAM_FAILURE_RE = re.compile(
+    r"\b50[0-4]\b|timed? ?out|fetch failed|socket hang up|ECONNRESET|ECONNREFUSED|ENOTFOUND", re.IGNORECASE)
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling an upstream whose circuit is open."""
+
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"{name} is unavailable; not calling it again for {math.ceil(retry_in)}s")
+        self.name = name
+        self.retry_in = retry_in
+
+
+def is_upstream_failure(result: Any) -> bool:
+    if not getattr(result, 'isError', False):
+        return False
+    text = " ".join(getattr(item, 'text', '') or '' for item in getattr(result, 'content', []))
+    return bool(_UPSTREAM_FAILURE_RE.search(text))
+
+
+class CircuitBreaker:
+    """Stops calling an upstream after repeated failures, then probes it.
+
+    Closed: calls go through, and ``failure_threshold`` failures in a row
+    open the circuit. Open: calls fail at once with ``CircuitOpenError``.
+    After ``reset_timeout`` seconds the circuit is half-open and a single
+    probe call is let through; its success closes the circuit and its
+    failure opens it again.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = FAILURE_THRESHOLD,
+                 reset_timeout: float = RESET_TIMEOUT, call_timeout: Optional[float] = CALL_TIMEOUT):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.call_timeout = call_timeout
+        self.failures = 0
+        self.opens = 0
+        self.rejected = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return CLOSED
+        return HALF_OPEN if self.retry_in() <= 0 else OPEN
+
+    def retry_in(self) -> float:
+        if self._opened_at is None:
+            return 0.0
+        return max(0.0, self._opened_at + self.reset_timeout - time.monotonic())
+
+    def check(self) -> None:
+        """Fail fast if the circuit is open; a half-open circuit lets the caller try."""
+        if self.state == OPEN:
+            self.rejected += 1
+            raise CircuitOpenError(self.name, self.retry_in())
+
+    async def call(self, fn: Callable[[], Awaitable[Any]],
+                   is_failure: Callable[[Any], bool] = lambda _: False) -> Any:
+        """Run ``fn`` through the breaker; a call that outlives ``call_timeout`` counts as failed."""
+        state = self.state
+        if state == OPEN or (state == HALF_OPEN and self._probing):
+            self.rejected += 1
+            raise CircuitOpenError(self.name, self.retry_in())
+        probe = state == HALF_OPEN
+        self._probing = self._probing or probe
+        try:
+            result = await asyncio.wait_for(fn(), self.call_timeout)
+        except asyncio.CancelledError:
+            # The caller gave up; that says nothing about the upstream
+            raise
+        except Exception:
+            self._on_failure(probe)
+            raise
+        finally:
+            if probe:
+                self._probing = False
+        if is_failure(result):
+            self._on_failure(probe)
+        else:
+            self._on_success()
+        return result
+
+    def _on_success(self) -> None:
+        self.failures = 0
+        self._opened_at = None
+
+    def _on_failure(self, probe: bool) -> None:
+        self.failures += 1
+        if probe or (self._opened_at is None and self.failures >= self.failure_threshold):
+            self._opened_at = time.monotonic()
+            self.opens += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {'name': self.name, 'state': self.state, 'failures': self.failures, 'opens': self.opens,
+                'rejected': self.rejected, 'retry_in': round(self.retry_in(), 1)}
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """The process-wide breaker for an upstream, created on first use."""
+    if name not in _breakers:
+        _breakers[name] = CircuitBreaker(name)
+    return _breakers[name]
+
+
+def breaker_stats() -> list:
+    return [breaker.stats() for breaker in _breakers.values()]
+
+
+class BreakerSession(SessionProxy):
+    """Sends MCP tool calls through the upstream's circuit breaker."""
+
+    def __init__(self, inner: Any, breaker: CircuitBreaker):
+        super().__init__(inner)
+        self.breaker = breaker
+
+    async def call_tool(self, name: str, arguments: Optional[Dict[str, Any]] = None, *args, **kwargs) -> Any:
+        return await self.breaker.call(lambda: self.inner.call_tool(name, arguments, *args, **kwargs),
+                                       is_upstream_failure)
@@ -1,47 +1,72 @@
+import asyncio
+import os
+from contextlib import AsyncExitStack
+
 from langchain_mcp_adapters.client import MultiServerMCPClient
+from langchain_mcp_adapters.tools import load_mcp_tools
 from langgraph.prebuilt import create_react_agent
 from langchain_groq import ChatGroq
 from dotenv import load_dotenv
 load_dotenv()
 os.environ["GROQ_API_KEY"]=os.getenv("GROQ_API_KEY")
-import asyncio
-import os
+
+from tool_schema_cache import SCHEMA_CACHE_DIR, SchemaCachingSession, ToolSchemaCache, server_identity
+
+SERVERS = {
+    "calculator":{
+        "command":"python",
+         "args":["calculator.py"],
+          "transport":"stdio"
+
+        },
+
+
+    "weather": {
+        "url": "http://localhost:8000/mcp",
+        "transport": "streamable_http"
+
+    }
+
+}
 
 async def main():
     """_summary_
     """
-    client = MultiServerMCPClient(
-        
-        {
-            "calculator":{
-                "command":"python",
-                 "args":["calculator.py"],
-                  "transport":"stdio"
-                 
-                },
-            
-            
-            "weather": {
-                "url": "http://localhost:8000/mcp",
-                "transport": "streamable_http"
-                
-            }
-            
-        }
-        
-    )
-    tools = await client.get_tools()
-    
-    model = ChatGroq(model="deepseek-r1-distill-llama-70b")
-    
-    agent = create_react_agent(model, tools)
-    
-    response = await agent.ainvoke(
-        {"messages": [{"role": "user", "content": "what's (3 + 5) x 12?"}]}
-    )
-    
-    print(response[-1].content)
-
-
-
-asyncio.run(main())
\ No newline at end of file
+    client = MultiServerMCPClient(SERVERS)
+    schema_cache = ToolSchemaCache() if SCHEMA_CACHE_DIR else None
+
+    async with AsyncExitStack() as stack:
+        # Load tools server by server so the tool schemas come from the on-disk cache
+        # when possible, instead of a tools/list round-trip on every start
+        sessions, server_tools = {}, {}
+        for name, config in SERVERS.items():
+            session = await stack.enter_async_context(client.session(name, auto_initialize=False))
+            # The handshake reports the server's name and version, which key its cached schema
+            init_result = await session.initialize()
+            if schema_cache is not None:
+                identity = server_identity(config.get("command") or config.get("url"), config.get("args", []),
+                                           init_result.serverInfo)
+
+                async def reload_tools(name=name):
+                    # The server's schema changed since it was cached; rebuild its tools from the fresh one
+                    server_tools[name] = await load_mcp_tools(sessions[name])
+
+                session = SchemaCachingSession(session, schema_cache, identity, on_change=reload_tools)
+                stack.callback(session.close)
+            sessions[name] = session
+            server_tools[name] = await load_mcp_tools(session)
+        tools = [tool for loaded in server_tools.values() for tool in loaded]
+
+        model = ChatGroq(model="deepseek-r1-distill-llama-70b")
+
+        agent = create_react_agent(model, tools)
+
+        response = await agent.ainvoke(
+            {"messages": [{"role": "user", "content": "what's (3 + 5) x 12?"}]}
+        )
+
+        print(response[-1].content)
+
+
+
+asyncio.run(main())
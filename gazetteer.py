@@ -0,0 +1,141 @@
+import bisect
+import csv
+import os
+import re
+import unicodedata
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+# Offline place list used to resolve and complete locations (overridable through .env)
+GAZETTEER_PATH = os.getenv("HOTEL_GAZETTEER_PATH") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "data", "gazetteer.csv")
+# Fewest typed characters before suggestions are offered
+MIN_PREFIX = int(os.getenv("HOTEL_GAZETTEER_MIN_PREFIX", "2"))
+# Index keys one suggestion lookup scans at most, so a one-letter prefix stays fast on a large file
+_MAX_SCAN = 5000
+
+# Common ways of writing a country besides its name in the file, by ISO code
+COUNTRY_ALIASES = {
+    'US': ("USA", "US", "United States of America", "America"),
+    'GB': ("UK", "England", "Great Britain", "Britain"),
+    'AE': ("UAE",),
+    'KR': ("Korea",),
+    'CZ': ("Czech Republic",),
+    'TR': ("Türkiye",),
+    'NL': ("Holland",),
+}
+
+
+def normalize(text: str) -> str:
+    """Case, accents and punctuation folded away: "São Paulo, BR." -> "sao paulo br"."""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    plain = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(re.findall(r"[a-z0-9]+", plain.casefold()))
+
+
+@dataclass(frozen=True)
+class Place:
+    id: str
+    name: str
+    region: str
+    country: str
+    country_code: str
+    latitude: float
+    longitude: float
+    population: int
+    aliases: Tuple[str, ...] = ()
+
+    @property
+    def display_name(self) -> str:
+        """The canonical spelling sent to the tools, e.g. "Mumbai, Maharashtra, India"."""
+        return ", ".join(part for part in dict.fromkeys((self.name, self.region, self.country)) if part)
+
+
+class Gazetteer:
+    """Places indexed by every normalized way of writing them, for lookup and prefix completion.
+
+    Each name and alias is indexed alone and followed by the region and/or
+    country, so "Bombay", "mumbai, India" and "Mumbai, Maharashtra" all
+    resolve to the same place. The index is one sorted array of keys
+    searched with ``bisect``; a prefix's matches are a contiguous slice.
+    """
+
+    def __init__(self, places: List[Place]):
+        self.places = places
+        self.by_id: Dict[str, Place] = {place.id: place for place in places}
+        entries = sorted({(key, i) for i, place in enumerate(places) for key in self._keys(place)})
+        self._keys_sorted = [key for key, _ in entries]
+        self._place_index = [i for _, i in entries]
+
+    @staticmethod
+    def _keys(place: Place) -> List[str]:
+        names = [place.name, *place.aliases]
+        countries = [place.country, place.country_code, *COUNTRY_ALIASES.get(place.country_code, ())]
+        qualifiers = [""] + [place.region] * bool(place.region) + countries
+        qualifiers += [f"{place.region} {country}" for country in countries if place.region]
+        keys = {normalize(f"{name} {qualifier}") for name in names for qualifier in qualifiers}
+        keys.discard("")
+        return list(keys)
+
+    @classmethod
+    def load(cls, path: str = GAZETTEER_PATH) -> "Gazetteer":
+        places = []
+        with open(path, encoding="utf-8", newline="") as f:
+            for row in csv.DictReader(f):
+                places.append(Place(
+                    id=row['id'], name=row['name'], region=row.get('region') or "", country=row['country'],
+                    country_code=row.get('country_code') or "", latitude=float(row['latitude']),
+                    longitude=float(row['longitude']), population=int(row.get('population') or 0),
+                    aliases=tuple(alias for alias in (row.get('aliases') or "").split("|") if alias)))
+        return cls(places)
+
+    def _range(self, prefix: str) -> Tuple[int, int]:
+        start = bisect.bisect_left(self._keys_sorted, prefix)
+        # "￿" sorts after every character a normalized key can contain
+        return start, bisect.bisect_right(self._keys_sorted, prefix + "￿", lo=start)
+
+    def resolve(self, text: str) -> Optional[Place]:
+        """The place ``text`` names exactly (any alias, with or without region and country), if known.
+
+        Only whole matches count: "Paris, Texas" must not quietly become
+        Paris, France. When one spelling names several places the most
+        populous wins.
+        """
+        key = normalize(text)
+        if not key:
+            return None
+        start = bisect.bisect_left(self._keys_sorted, key)
+        end = bisect.bisect_right(self._keys_sorted, key, lo=start)
+        matches = [self.places[i] for i in self._place_index[start:end]]
+        return max(matches, key=lambda place: place.population) if matches else None
+
+    def suggest(self, prefix: str, limit: int = 5) -> List[Place]:
+        """Places with a name or alias starting with ``prefix``, most populous first."""
+        key = normalize(prefix)
+        if len(key) < MIN_PREFIX:
+            return []
+        start, end = self._range(key)
+        seen = {i for i in self._place_index[start:min(end, start + _MAX_SCAN)]}
+        return sorted((self.places[i] for i in seen), key=lambda place: -place.population)[:limit]
+
+    def canonical_location(self, text: str) -> Tuple[str, Optional[str]]:
+        """``text`` in its canonical spelling and the place's ID; unknown places pass through unchanged."""
+        place = self.resolve(text)
+        if place is None:
+            return " ".join((text or "").split()), None
+        return place.display_name, place.id
+
+
+_gazetteer: Optional[Gazetteer] = None
+
+
+def get_gazetteer() -> Gazetteer:
+    """The process-wide gazetteer, loaded on first use; empty if the file cannot be read."""
+    global _gazetteer
+    if _gazetteer is None:
+        try:
+            _gazetteer = Gazetteer.load()
+        except (OSError, ValueError, KeyError):
+            # Without the file locations are simply searched as typed
+            _gazetteer = Gazetteer([])
+    return _gazetteer
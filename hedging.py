@@ -0,0 +1,88 @@
+import asyncio
+import math
+import os
+import time
+from collections import defaultdict, deque
+from typing import Any, Callable, Deque, Dict, Optional
+
+from session_proxy import SessionProxy
+
+# Hedged tool calls are off unless enabled (overridable through .env)
+HEDGE_ENABLED = os.getenv("MCP_HEDGE_REQUESTS", "0").lower() in ("1", "true", "yes")
+HEDGE_PERCENTILE = float(os.getenv("MCP_HEDGE_PERCENTILE", "95"))
+# Latencies remembered per tool, and how many are needed before hedging starts
+_WINDOW = 200
+_MIN_SAMPLES = 20
+
+
+class ToolLatencies:
+    """Recent successful call latencies per tool, and the hedging counters."""
+
+    def __init__(self, percentile: float = HEDGE_PERCENTILE):
+        self.percentile = percentile
+        self.hedged = 0
+        self.hedge_wins = 0
+        self._samples: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=_WINDOW))
+
+    def record(self, name: str, seconds: float) -> None:
+        self._samples[name].append(seconds)
+
+    def hedge_delay(self, name: str) -> Optional[float]:
+        """Seconds to wait before hedging a call to ``name``, or None while there is too little history."""
+        samples = self._samples.get(name)
+        if not samples or len(samples) < _MIN_SAMPLES:
+            return None
+        ordered = sorted(samples)
+        return ordered[max(1, math.ceil(self.percentile / 100 * len(ordered))) - 1]
+
+    def stats(self) -> Dict[str, Any]:
+        return {'hedged': self.hedged, 'hedge_wins': self.hedge_wins,
+                'delays_ms': {name: round(self.hedge_delay(name) * 1000) for name in self._samples
+                              if self.hedge_delay(name) is not None}}
+
+
+def _succeeded(task: asyncio.Task) -> bool:
+    return not task.cancelled() and task.exception() is None and not getattr(task.result(), 'isError', False)
+
+
+class HedgedSession(SessionProxy):
+    """Backs up slow tool calls with a second call on another server.
+
+    A call still running after the tool's p95 latency is sent again through
+    ``backup()`` (another pooled server's session, or None if there is none
+    to spare), and whichever call succeeds first is returned. Only for
+    read-only tools, which the Airbnb tools are.
+    """
+
+    def __init__(self, inner: Any, latencies: ToolLatencies, backup: Callable[[], Optional[Any]]):
+        super().__init__(inner)
+        self.latencies = latencies
+        self.backup = backup
+
+    async def call_tool(self, name: str, arguments: Optional[Dict[str, Any]] = None, *args, **kwargs) -> Any:
+        started = time.monotonic()
+        delay = self.latencies.hedge_delay(name)
+        primary = asyncio.ensure_future(self.inner.call_tool(name, arguments, *args, **kwargs))
+        pending = {primary}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if not done:
+                backup = self.backup()
+                if backup is not None:
+                    self.latencies.hedged += 1
+                    pending.add(asyncio.ensure_future(backup.call_tool(name, arguments, *args, **kwargs)))
+            finished = None
+            while pending and not (finished and _succeeded(finished)):
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # Prefer a success when both calls finish together
+                succeeded = [task for task in done if _succeeded(task)]
+                finished = succeeded[0] if succeeded else next(iter(done))
+            finished = finished or primary
+            if _succeeded(finished):
+                self.latencies.record(name, time.monotonic() - started)
+                if finished is not primary:
+                    self.latencies.hedge_wins += 1
+            return finished.result()
+        finally:
+            for task in pending:
+                task.cancel()
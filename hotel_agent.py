@@ -0,0 +1,580 @@
+import asyncio
+import inspect
+import json
+import os
+from datetime import datetime, date
+from textwrap import dedent
+from typing import TYPE_CHECKING, Optional, Dict, Any, AsyncIterator
+
+from hotel_rendering import (
+    JSON_RESPONSE_TEMPLATE, HotelSearchResult, parse_search_result, render_advanced_search,
+    render_search_result,
+)
+from listing_details import fetch_listing_details, listing_details_batch_tool
+from llm_clients import use_pooled_client
+from listings import apply_listing_details, filter_and_rank, listing_from_search, parse_search_page, tool_text
+from circuit_breaker import CircuitOpenError
+from mcp_pool import MCPServerPool
+from model_router import AUTO_MODEL_ID, get_model_router, route_model
+from search_limits import SearchLimits, current_limits, partial_listings_markdown
+from tool_compaction import COMPACTION_ENABLED, ToolResultCompactor, current_compactor
+from rate_limit import error_status, rate_limit_model
+from tracing import Trace, current_trace, instrument_model, span
+
+if TYPE_CHECKING:
+    # agno and the OpenAI SDK behind Perplexity take seconds to import, so they load on the first search
+    from agno.agent import Agent
+    from agno.models.perplexity import Perplexity
+
+DEFAULT_MODEL_ID = "llama-3-sonar-large-32k-online"
+DEFAULT_TEMPERATURE = 0.3
+
+# Direct Advanced Search pipeline: search pages to fetch, and listings to fetch details for
+DIRECT_SEARCH_PAGES = int(os.getenv("HOTEL_DIRECT_SEARCH_PAGES", "2"))
+DIRECT_DETAILS_LIMIT = int(os.getenv("HOTEL_DIRECT_DETAILS_LIMIT", "10"))
+
+# Query builders shared by the Streamlit tabs and the batch runner
+def build_quick_query(location: str, search_type: str) -> str:
+    if search_type == "Find Hotels":
+        return f"Find available hotels in {location}"
+    elif search_type == "Best Deals":
+        return f"Find hotels with best deals and discounts in {location}"
+    elif search_type == "Luxury Hotels":
+        return f"Find luxury and premium hotels in {location}"
+    elif search_type == "Budget Options":
+        return f"Find budget-friendly and affordable hotels in {location}"
+    return ""
+
+def build_advanced_query(params: Dict[str, Any]) -> str:
+    adv_query_parts = [f"Find hotels in {params.get('location', '')}"]
+    if params.get('checkin') and params.get('checkout'):
+        adv_query_parts.append(f"for dates {params['checkin']} to {params['checkout']}")
+    guest_info = []
+    adults, children = params.get('adults', 1), params.get('children', 0)
+    infants, pets = params.get('infants', 0), params.get('pets', 0)
+    if adults > 1: guest_info.append(f"{adults} adults")
+    if children > 0: guest_info.append(f"{children} children")
+    if infants > 0: guest_info.append(f"{infants} infants")
+    if pets > 0: guest_info.append(f"{pets} pets")
+    if guest_info: adv_query_parts.append(f"for {', '.join(guest_info)}")
+    room_type, star_rating = params.get('room_type', 'Any'), params.get('star_rating', 'Any')
+    if room_type != "Any": adv_query_parts.append(f"preferably {room_type.lower()}")
+    if star_rating != "Any": adv_query_parts.append(f"with {star_rating.lower()}")
+    if params.get('amenities'): adv_query_parts.append(f"with amenities: {', '.join(params['amenities'])}")
+    return " ".join(adv_query_parts)
+
+def build_search_query(params: Dict[str, Any]) -> str:
+    if params.get('search_mode') == "Advanced Search":
+        return build_advanced_query(params)
+    return build_quick_query(params.get('location', ''), params.get('search_type', 'Find Hotels'))
+
+# Response templates
+def get_response_template(search_mode: str, search_params: Dict[str, Any] = None) -> str:
+    # Static per mode: the templates sit in the cacheable part of the prompt
+    if search_mode == "Quick Search":
+        return f"""
+        **QUICK SEARCH RESPONSE FORMAT:**
+        ## 🏨 Quick Hotel Results
+        ### 📍 Search Summary
+        - **Location:** [location]
+        - **Hotels Found:** [number]
+        - **Search Type:** [search type from dropdown]
+        ### 🏨 Hotel List
+        For each hotel, use this format:
+        **🏨 [Hotel Name]** ⭐ [rating]/5
+        - 📍 **Location:** [address/area]
+        - 💰 **Price:** $[price]/night
+        - 🔗 **Book Now:** [booking link if available]
+        - ✨ **Top Features:** [2-3 key amenities]
+        - 📞 **Quick Info:** [phone or website]
+        ---
+        ### 🎯 Top Recommendations
+        - **Best Deal:** [hotel name] - $[price]
+        - **Highest Rated:** [hotel name] - [rating]⭐
+        - **Prime Location:** [hotel name]
+        ### 📞 Quick Actions
+        - Click booking links for instant reservations
+        - Call hotels directly for special rates
+        - Use advanced search for more filtering options
+        """
+    elif search_mode == "Advanced Search":
+        return f"""
+        **ADVANCED SEARCH RESPONSE FORMAT:**
+        ## 🎯 Advanced Hotel Search Results
+        ### 📊 Detailed Search Summary
+        - **Location:** [location]
+        - **Check-in:** [checkin date] | **Check-out:** [checkout date]
+        - **Guests:** [adults] adults, [children] children, [infants] infants, [pets] pets
+        - **Room Type:** [room preference]
+        - **Star Rating:** [star requirement]
+        - **Amenities:** [selected amenities]
+        - **Total Results:** [number] hotels found
+        ### 🏨 Detailed Hotel Listings
+        For each hotel, use this COMPREHENSIVE format:
+        ---
+        ## 🏨 [Hotel Name]
+        | **Property Details** | **Information** |
+        |---------------------|-----------------|
+        | ⭐ **Rating** | [rating]/5 stars ([number] reviews) |
+        | 📍 **Full Address** | [complete address with postal code] |
+        | 💰 **Nightly Rate** | $[price] per night (taxes: $[tax amount]) |
+        | 🏠 **Room Types** | [available room categories] |
+        | 📏 **Distance** | [km from city center] • [km from airport] |
+        | 🔗 **Booking Links** | [direct booking URL] |
+        | 📞 **Contact** | [phone] • [website] |
+        **✨ Complete Amenities List:**
+        - 🏊 **Recreation:** [pool, gym, spa details]
+        - 🍽️ **Dining:** [restaurant, bar, room service info]
+        - 🚗 **Transport:** [parking, shuttle services]
+        - 💼 **Business:** [meeting rooms, business center]
+        - 🐕 **Pet Policy:** [pet-friendly details]
+        - 🌐 **Connectivity:** [WiFi, internet details]
+        - 🛎️ **Services:** [concierge, laundry, etc.]
+        **📋 Booking Details:**
+        - **Check-in:** [time] | **Check-out:** [time]
+        - **Cancellation:** [detailed policy]
+        - **Payment:** [accepted methods]
+        - **Breakfast:** [inclusion/cost details]
+        - **Parking:** [availability/cost]
+        - **Extra Beds:** [policy and cost]
+        **🎯 Match Analysis:**
+        - **Budget Match:** [how it fits your budget]
+        - **Amenity Match:** [matches X of Y requested amenities]
+        - **Location Score:** [proximity ratings]
+        - **Guest Rating:** [recent review highlights]
+        **💡 Booking Recommendations:**
+        - **Best for:** [specific use case]
+        - **Special Offers:** [current promotions]
+        - **Booking Tips:** [best rates, timing advice]
+        [REPEAT FOR EACH HOTEL]
+        ### 📈 Comparison Summary
+        | Hotel | Rating | Price | Key Features | Booking Link |
+        |-------|--------|-------|--------------|--------------|
+        | [Hotel 1] | [rating]⭐ | $[price] | [top 2 features] | [link] |
+        | [Hotel 2] | [rating]⭐ | $[price] | [top 2 features] | [link] |
+        ### 🏆 Final Recommendations
+        - **Best Overall Value:** [hotel name and detailed reason]
+        - **Luxury Choice:** [hotel name and luxury features]
+        - **Budget Winner:** [hotel name and savings details]
+        - **Location Champion:** [hotel name and location benefits]
+        - **Amenity Leader:** [hotel name and standout amenities]
+        """
+    return ""
+
+# Leading markers of the error messages returned by run_hotel_agent
+ERROR_MARKERS = ("❌", "⏰", "🚦", "🔐", "🌐", "🔌")
+
+# Appended to answers cut short by the search deadline
+PARTIAL_RESULT_NOTE = "⏰ *The search time budget ran out, so these results may be incomplete. Increase the timeout in settings for a full answer.*"
+
+def is_error_result(result: str) -> bool:
+    return result.lstrip().startswith(ERROR_MARKERS)
+
+def is_cacheable_result(result: str) -> bool:
+    return not is_error_result(result) and PARTIAL_RESULT_NOTE not in result
+
+def build_hotel_model(search_params: Dict[str, Any] = None, api_key: Optional[str] = None) -> "Perplexity":
+    """The Perplexity model for a search; with ``model_id='auto'``, one routed across the model list."""
+    from agno.models.perplexity import Perplexity
+
+    params = search_params or {}
+    model_id = params.get('model_id', DEFAULT_MODEL_ID)
+    temperature = params.get('temperature', DEFAULT_TEMPERATURE)
+
+    def build(model_id: str) -> "Perplexity":
+        # Retries happen in rate_limit_model, where they also feed the adaptive limiter
+        model = Perplexity(id=model_id, api_key=api_key, temperature=temperature, max_retries=0)
+        # Requests reuse the warm connections of this API key's pooled client
+        return use_pooled_client(model, api_key)
+
+    if model_id == AUTO_MODEL_ID:
+        search_mode = params.get('search_mode', 'Quick Search')
+        return route_model(build(get_model_router().candidates(search_mode)[0]), build, search_mode)
+    return build(model_id)
+
+# Bump whenever the system prompt's wording changes
+PROMPT_VERSION = "2"
+
+# Identical for every search, so provider-side prompt caching can reuse it; nothing per-search goes in here
+SYSTEM_PROMPT_PREFIX = dedent(f"""\
+    Hotel Finder instructions, version {PROMPT_VERSION}.
+    You are an advanced Hotel Finder assistant powered by comprehensive Airbnb data through MCP tools.
+    Your goal is to help users find the best hotels based on their preferences and requirements.
+    The user's message is their hotel search query, followed by any limits for this search.
+
+    **CRITICAL REQUIREMENTS:**
+    - Process the user's query according to the response format of the current search mode, given below.
+    - Follow the EXACT format specified.
+    - Always use MCP tools to get real data before responding.
+    - To get details for several listings, call airbnb_listing_details_batch once with all their IDs rather than airbnb_listing_details per listing.
+    - MUST include direct Airbnb booking links whenever available.
+""")
+
+def build_system_prompt(search_mode: str, structured: bool = False) -> str:
+    """The agent's instructions: the static prefix, then the search mode's response format.
+
+    Nothing in them depends on the query, so all searches share the prefix
+    and searches in the same mode and output format share the whole prompt.
+    """
+    response_template = JSON_RESPONSE_TEMPLATE if structured else get_response_template(search_mode)
+    return f"{SYSTEM_PROMPT_PREFIX}\n**CURRENT SEARCH MODE: {search_mode}**\n{dedent(response_template).strip()}\n"
+
+def build_user_prompt(message: str, search_params: Dict[str, Any] = None) -> str:
+    """The user turn: the query, then this search's limits."""
+    max_results = search_params.get('max_results', 20) if search_params else 20
+    return f"{message}\n\nList at most {max_results} hotels."
+
+def build_hotel_agent(mcp_tools, search_params: Dict[str, Any] = None, api_key: Optional[str] = None,
+                      model=None, extra_tools: Optional[list] = None) -> "Agent":
+    from agno.agent import Agent
+
+    search_mode = search_params.get('search_mode', 'Quick Search') if search_params else 'Quick Search'
+    structured = bool(search_params) and search_params.get('output_format') == 'json'
+
+    return Agent(
+        tools=[mcp_tools, *(extra_tools or [])],
+        instructions=build_system_prompt(search_mode, structured),
+        markdown=not structured,
+        show_tool_calls=True,
+        # CHANGED: The model parameter is now instantiated with Perplexity
+        model=instrument_model(rate_limit_model(model if model is not None else build_hotel_model(search_params, api_key)))
+    )
+
+def format_agent_error(e: Exception) -> str:
+    if isinstance(e, asyncio.TimeoutError):
+        return "⏰ **Timeout Error**: The hotel search took too long. Please try again with a more specific query or increase the timeout in settings."
+    if isinstance(e, CircuitOpenError):
+        return f"🔌 **Service Unavailable**: Airbnb is not responding right now. Please try again in {max(1, round(e.retry_in))} seconds."
+    error_msg = str(e)
+    status = error_status(e)
+    # Only a status says 429; a bare "429" in a message may be a listing ID, port or price
+    if status == 429 or (status is None and any(marker in error_msg.lower() for marker in ("rate limit", "too many requests"))):
+        return "🚦 **Rate Limit Error**: Too many requests. Please wait a moment before searching again."
+    elif "authentication" in error_msg.lower():
+        return "🔐 **Authentication Error**: Please check your API tokens and try again."
+    elif "network" in error_msg.lower() or "connection" in error_msg.lower():
+        return "🌐 **Network Error**: Unable to connect to hotel services. Please check your internet connection."
+    else:
+        return f"❌ **Unexpected Error**: {error_msg}\n\nPlease try again or contact support if the issue persists."
+
+async def run_hotel_agent(message: str, search_params: Dict[str, Any] = None, *,
+                          pool: MCPServerPool, api_key: Optional[str] = None,
+                          model=None, trace: Optional[Trace] = None) -> str:
+    parts, error = [], None
+    async for event in stream_hotel_agent(message, search_params, pool=pool, api_key=api_key, model=model, trace=trace):
+        if event['event'] in ('token', 'deadline_exceeded'):
+            parts.append(event['content'])
+        elif event['event'] == 'error':
+            error = event['content']
+    return error or "".join(parts)
+
+def render_structured_answer(text: str, search_params: Dict[str, Any],
+                             compactor: Optional[ToolResultCompactor] = None) -> str:
+    """Turn the model's JSON answer into the Quick/Advanced markdown layout locally.
+
+    With the search's ``compactor``, fields the model saw only in compacted
+    form are filled back in from the full tool results.
+    """
+    try:
+        result = parse_search_result(text)
+    except ValueError:
+        return f"⚠️ *Could not read structured results from the model; showing its raw answer.*\n\n{text}"
+    if compactor is not None:
+        result = result.model_copy(update={'hotels': compactor.enrich(result.hotels)})
+    search_mode = search_params.get('search_mode', 'Quick Search')
+    if search_mode == "Advanced Search":
+        # Star rating, budget and amenity preferences are applied locally rather than trusted to the model
+        result = result.model_copy(update={'hotels': filter_and_rank(result.hotels, search_params)})
+    return render_search_result(result, search_mode, search_params)
+
+def _event_tool_name(chunk) -> str:
+    # agno reports the running tool either as `tool` or as the last entry of `tools`
+    tool = getattr(chunk, 'tool', None)
+    if tool is not None:
+        return getattr(tool, 'tool_name', None) or str(tool)
+    tools = getattr(chunk, 'tools', None) or []
+    if tools:
+        last = tools[-1]
+        return last.get('tool_name', 'tool') if isinstance(last, dict) else getattr(last, 'tool_name', 'tool')
+    return 'tool'
+
+async def _run_chunks(stream, deadline, failure: str) -> AsyncIterator[Any]:
+    """Chunks of an agno ``arun`` stream within the search deadline; the stream is closed however iteration ends."""
+    if inspect.isawaitable(stream):
+        stream = await stream
+    try:
+        while True:
+            # LLM generation and tool calls share whatever budget is left
+            try:
+                chunk = await asyncio.wait_for(stream.__anext__(), deadline.remaining() if deadline else None)
+            except StopAsyncIteration:
+                return
+            if getattr(chunk, 'event', '') == 'RunError':
+                raise RuntimeError(getattr(chunk, 'content', None) or failure)
+            yield chunk
+    finally:
+        if hasattr(stream, 'aclose'):
+            try:
+                await stream.aclose()
+            except Exception:
+                pass
+
+async def _agent_events(server, message: str, params: Dict[str, Any], streamed: list, *, api_key: Optional[str],
+                        model, deadline, sessions: list) -> AsyncIterator[Dict[str, Any]]:
+    """Events of the tool-using agent answering ``message`` on a leased server."""
+    structured = params.get('output_format') == 'json'
+    # Details for many listings cost the model one tool-call turn, fetched concurrently over the pool
+    batch_tool = listing_details_batch_tool(sessions, params)
+    agent = build_hotel_agent(server.tools, params, api_key=api_key, model=model, extra_tools=[batch_tool])
+    chunks = _run_chunks(agent.arun(build_user_prompt(message, params), stream=True, stream_intermediate_steps=True),
+                         deadline, "Agent run failed")
+    limits = current_limits.get()
+    try:
+        async for chunk in chunks:
+            # The model only sees a failed tool call as text; stop instead of letting it answer without the data
+            if limits is not None and limits.tool_error is not None:
+                raise limits.tool_error
+            event = getattr(chunk, 'event', '')
+            if event == 'ToolCallStarted':
+                yield {'event': 'tool_started', 'tool': _event_tool_name(chunk)}
+            elif event == 'ToolCallCompleted':
+                yield {'event': 'tool_finished', 'tool': _event_tool_name(chunk)}
+            elif event in ('RunResponse', 'RunResponseContent', 'RunContent') and isinstance(chunk.content, str) and chunk.content:
+                if not streamed:
+                    yield {'event': 'first_token'}
+                streamed.append(chunk.content)
+                if not structured:
+                    yield {'event': 'token', 'content': chunk.content}
+        if limits is not None and limits.tool_error is not None:
+            raise limits.tool_error
+        if structured:
+            with span('render'):
+                answer = render_structured_answer("".join(streamed), params, current_compactor.get())
+            yield {'event': 'token', 'content': answer}
+    finally:
+        await chunks.aclose()
+
+def direct_search_arguments(search_params: Dict[str, Any]) -> Dict[str, Any]:
+    """Map the Advanced Search form straight to ``airbnb_search`` arguments."""
+    args = {'location': search_params['location'].strip(), 'adults': search_params.get('adults') or 1,
+            'ignoreRobotsText': search_params.get('ignoreRobotsText', True)}
+    if search_params.get('checkin') and search_params.get('checkout'):
+        args.update(checkin=search_params['checkin'], checkout=search_params['checkout'])
+    for key in ('children', 'infants', 'pets'):
+        if search_params.get(key):
+            args[key] = search_params[key]
+    return args
+
+def wants_another_page(pages: int, cursor: Optional[str], raw_listings: list, search_params: Dict[str, Any]) -> bool:
+    """Whether the direct pipeline fetches another ``airbnb_search`` page."""
+    enough = 2 * (search_params.get('max_results') or 20)
+    return pages < DIRECT_SEARCH_PAGES and (pages == 0 or bool(cursor)) and len(raw_listings) < enough
+
+def direct_candidates(raw_listings: list, search_params: Dict[str, Any]) -> list:
+    """Every unique listing the direct pipeline found, filtered and ranked without amenities."""
+    seen, hotels = set(), []
+    for raw in raw_listings:
+        hotel = listing_from_search(raw)
+        if hotel.id not in seen:
+            seen.add(hotel.id)
+            hotels.append(hotel)
+    # Amenities are only known once details are in, so they cannot narrow the candidates
+    return filter_and_rank(hotels, {**search_params, 'amenities': []})
+
+def detail_candidates(candidates: list, search_params: Dict[str, Any]) -> list:
+    """The best ranked candidates the direct pipeline fetches listing details for."""
+    return candidates[:min(search_params.get('max_results') or 20, DIRECT_DETAILS_LIMIT)]
+
+def build_summary_agent(search_params: Dict[str, Any], api_key: Optional[str] = None, model=None) -> "Agent":
+    from agno.agent import Agent
+
+    return Agent(
+        instructions=dedent("""\
+            You are a Hotel Finder assistant. You are given hotels that were already searched,
+            filtered and ranked for the user, as JSON, together with the user's preferences.
+            Write a short recommendation summary in markdown (at most 150 words): which hotel to
+            pick for value, for comfort and for the requested amenities, and why. Only use the
+            data provided; do not list every hotel again.
+        """),
+        markdown=True,
+        model=instrument_model(rate_limit_model(model if model is not None else build_hotel_model(search_params, api_key)))
+    )
+
+async def _direct_events(server, params: Dict[str, Any], streamed: list, *, api_key: Optional[str],
+                         model, deadline, sessions: list) -> AsyncIterator[Dict[str, Any]]:
+    """Events of the deterministic Advanced Search pipeline.
+
+    The form maps straight to ``airbnb_search``, details for the best
+    candidates are fetched as one concurrent batch spread over the pooled
+    ``sessions``, and filtering and ranking happen
+    locally. The model is called once, without tools, to summarize.
+    """
+    session = server.tools.session
+    max_results = params.get('max_results') or 20
+    raw_listings: list = []
+    cursor, pages = None, 0
+    while wants_another_page(pages, cursor, raw_listings, params):
+        args = direct_search_arguments(params)
+        if cursor:
+            args['cursor'] = cursor
+        yield {'event': 'tool_started', 'tool': 'airbnb_search'}
+        result = await session.call_tool('airbnb_search', args)
+        yield {'event': 'tool_finished', 'tool': 'airbnb_search'}
+        if getattr(result, 'isError', False):
+            raise RuntimeError(tool_text(result) or "airbnb_search failed")
+        page, cursor = parse_search_page(tool_text(result))
+        raw_listings.extend(page)
+        pages += 1
+
+    candidates = direct_candidates(raw_listings, params)
+    detailed = detail_candidates(candidates, params)
+    if detailed:
+        yield {'event': 'tool_started', 'tool': f"airbnb_listing_details ×{len(detailed)}"}
+        fetched = await fetch_listing_details(sessions, [h.id for h in detailed if h.id], direct_search_arguments(params))
+        yield {'event': 'tool_finished', 'tool': f"airbnb_listing_details ×{len(detailed)}"}
+        # Out of budget ends the search; other failures just leave a listing without details
+        if deadline and deadline.expired:
+            raise asyncio.TimeoutError()
+        details = {listing_id: tool_text(result) for listing_id, result in fetched.items()
+                   if not isinstance(result, BaseException) and not getattr(result, 'isError', False)}
+        # Listings beyond the detail limit are still shown, ranked on what the search returned
+        candidates = [apply_listing_details(h, details[h.id]) if h.id in details else h for h in candidates]
+
+    ranked = filter_and_rank(candidates, params)[:max_results]
+    with span('render'):
+        answer = render_advanced_search(HotelSearchResult(location=params['location'], hotels=ranked), params)
+    yield {'event': 'first_token'}
+    streamed.append(answer)
+    yield {'event': 'token', 'content': answer}
+    if not ranked:
+        return
+
+    preferences = {k: params.get(k) for k in ('location', 'checkin', 'checkout', 'adults', 'children', 'infants',
+                                              'pets', 'room_type', 'star_rating', 'amenities')}
+    prompt = json.dumps({'preferences': preferences,
+                         'hotels': [h.model_dump(exclude_none=True, exclude={'link'}) for h in ranked]}, default=str)
+    chunks = _run_chunks(build_summary_agent(params, api_key, model).arun(prompt, stream=True), deadline, "Summary failed")
+    header = "\n\n### 🤖 AI Summary\n"
+    try:
+        async for chunk in chunks:
+            event = getattr(chunk, 'event', '')
+            if event in ('RunResponse', 'RunResponseContent', 'RunContent') and isinstance(chunk.content, str) and chunk.content:
+                content = header + chunk.content
+                header = ""
+                streamed.append(content)
+                yield {'event': 'token', 'content': content}
+    except asyncio.TimeoutError:
+        raise
+    except Exception as e:
+        # The listings are already on screen; a failed summary should not replace them
+        yield {'event': 'token', 'content': f"\n\n⚠️ *AI summary unavailable: {e}*"}
+    finally:
+        await chunks.aclose()
+
+def uses_direct_pipeline(search_params: Dict[str, Any]) -> bool:
+    return search_params.get('pipeline') == 'direct' and search_params.get('search_mode') == 'Advanced Search'
+
+async def stream_hotel_agent(message: str, search_params: Dict[str, Any] = None, *,
+                             pool: MCPServerPool, api_key: Optional[str] = None,
+                             model=None, trace: Optional[Trace] = None) -> AsyncIterator[Dict[str, Any]]:
+    """Streaming counterpart of run_hotel_agent.
+
+    Yields ``{'event': ...}`` dicts as the search progresses: ``server_ready``,
+    ``tools_listed``, ``tool_started``/``tool_finished`` per tool call,
+    ``first_token``, then ``token`` events carrying the response text. In the
+    structured output format the JSON answer is collected and rendered locally,
+    then sent as a single ``token`` event. Failures
+    are reported as a final ``error`` event.
+
+    With ``pipeline='direct'``, Advanced Searches skip the agent's tool-use
+    turns: the form is sent to the Airbnb tools directly and the model only
+    writes a summary after the locally rendered results.
+
+    ``timeout`` in the search parameters is one end-to-end budget shared by
+    server acquisition, server restarts, tool calls and generation; when it
+    runs out, outstanding work is cancelled and a ``deadline_exceeded`` event
+    carries the partial answer (or the listings fetched so far).
+
+    Tool results the agent reads are compacted first (see
+    ``tool_compaction.py``), and the full results are kept for rendering.
+
+    ``model`` replaces the Perplexity model (the benchmarks pass a fake one),
+    and a ``trace`` collects timing spans for each phase of the search.
+    """
+    api_key = api_key or os.getenv("PERPLEXITY_API_KEY")
+    if not api_key and model is None:
+        yield {'event': 'error', 'content': "❌ **Error**: Perplexity API key not provided. Please enter your API key in the sidebar."}
+        return
+    
+    params = search_params or {}
+    direct = uses_direct_pipeline(params)
+    structured = params.get('output_format') == 'json' and not direct
+    limits = SearchLimits(params.get('timeout'), params.get('max_results'))
+    deadline = limits.deadline
+    limits_token = current_limits.set(limits)
+    trace_token = current_trace.set(trace)
+    # Only the agent reads tool results through the model; the direct pipeline parses them whole
+    compactor_token = current_compactor.set(
+        ToolResultCompactor(params.get('max_results')) if COMPACTION_ENABLED and not direct else None)
+    streamed = []
+    try:
+        async with pool.lease(timeout=deadline.phase_timeout('acquire') if deadline else None,
+                                  startup_timeout=deadline.phase_timeout('initialize') if deadline else None) as server:
+            yield {'event': 'server_ready', 'server': server.index}
+            yield {'event': 'tools_listed', 'tools': list(server.tools.functions)}
+            if direct:
+                events = _direct_events(server, params, streamed, api_key=api_key, model=model, deadline=deadline,
+                                        sessions=pool.tool_sessions(first=server))
+            else:
+                events = _agent_events(server, message, params, streamed, api_key=api_key, model=model, deadline=deadline,
+                                       sessions=pool.tool_sessions(first=server))
+            try:
+                async for event in events:
+                    yield event
+            finally:
+                await events.aclose()
+    except asyncio.TimeoutError as e:
+        # Out of budget: hand back whatever was produced before the deadline
+        if streamed and not structured:
+            yield {'event': 'deadline_exceeded', 'content': f"\n\n{PARTIAL_RESULT_NOTE}"}
+        elif limits.listings:
+            yield {'event': 'deadline_exceeded', 'content': f"{partial_listings_markdown(limits.listings)}\n\n{PARTIAL_RESULT_NOTE}"}
+        else:
+            yield {'event': 'error', 'content': format_agent_error(e)}
+    except Exception as e:
+        yield {'event': 'error', 'content': format_agent_error(e)}
+    finally:
+        try:
+            current_compactor.reset(compactor_token)
+            current_trace.reset(trace_token)
+            current_limits.reset(limits_token)
+        except ValueError:
+            # Generator abandoned by its consumer and finalized from another context
+            pass
+
+# Helper function to validate search parameters
+def validate_search_params(params: Dict[str, Any], search_mode: str = "Advanced Search") -> tuple[bool, str]:
+    if search_mode == "Advanced Search":
+        return validate_advanced_search_params(params)
+    else:
+        return validate_quick_search_params(params)
+
+def validate_advanced_search_params(params: Dict[str, Any]) -> tuple[bool, str]:
+    location = params.get('location', '').strip()
+    if not location: return False, "Location is required for hotel search"
+    if len(location) < 2: return False, "Location must be at least 2 characters long"
+    if params.get('checkin') and params.get('checkout'):
+        try:
+            checkin = datetime.strptime(params['checkin'], '%Y-%m-%d').date()
+            checkout = datetime.strptime(params['checkout'], '%Y-%m-%d').date()
+            if checkin >= checkout: return False, "Check-out date must be after check-in date"
+            if checkin < date.today(): return False, "Check-in date cannot be in the past"
+        except ValueError: return False, "Invalid date format. Use YYYY-MM-DD"
+    if params.get('adults', 1) < 1: return False, "At least 1 adult is required"
+    return True, "Advanced search parameters are valid"
+
+def validate_quick_search_params(params: Dict[str, Any]) -> tuple[bool, str]:
+    location = params.get('location', '').strip()
+    if not location: return False, "Location is required for hotel search"
+    if len(location) < 2: return False, "Location must be at least 2 characters long"
+    return True, "Quick search parameters are valid"
@@ -0,0 +1,150 @@
+import json
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field, ValidationError
+
+from listing_engine import ListingTable
+
+
+class HotelListing(BaseModel):
+    id: Optional[str] = None
+    name: str
+    rating: Optional[float] = None
+    reviews: Optional[int] = None
+    price: Optional[float] = None
+    link: Optional[str] = None
+    area: Optional[str] = None
+    amenities: List[str] = Field(default_factory=list)
+    distance_center_km: Optional[float] = None
+    distance_airport_km: Optional[float] = None
+    cancellation: Optional[str] = None
+
+
+class HotelSearchResult(BaseModel):
+    location: str = ""
+    hotels: List[HotelListing] = Field(default_factory=list)
+
+
+# Sent instead of the markdown templates; a fraction of their output tokens
+JSON_RESPONSE_TEMPLATE = """
+        **STRUCTURED RESPONSE FORMAT:**
+        Respond with ONLY one JSON object, no markdown and no commentary:
+        {"location": str, "hotels": [{"id": str|null, "name": str, "rating": number|null, "reviews": int|null,
+         "price": number|null, "link": str|null, "area": str|null, "amenities": [str],
+         "distance_center_km": number|null, "distance_airport_km": number|null,
+         "cancellation": str|null}]}
+        Price is per night in USD. Use the listing's id from the tools. Use null for anything the tools did not return.
+        """
+
+
+def parse_search_result(text: str) -> HotelSearchResult:
+    """Parse the model's JSON answer, tolerating code fences or stray prose around it."""
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end <= start:
+        raise ValueError("No JSON object found in the model response")
+    try:
+        return HotelSearchResult.model_validate(json.loads(text[start:end + 1]))
+    except (json.JSONDecodeError, ValidationError) as e:
+        raise ValueError(f"Model response is not valid hotel JSON: {e}") from e
+
+
+def _fmt(value: Any, fmt: str = "{}", missing: str = "N/A") -> str:
+    return missing if value is None or value == "" else fmt.format(value)
+
+
+def render_quick_search(result: HotelSearchResult, search_params: Dict[str, Any]) -> str:
+    hotels = result.hotels
+    lines = [
+        "## 🏨 Quick Hotel Results",
+        "### 📍 Search Summary",
+        f"- **Location:** {result.location or search_params.get('location', '')}",
+        f"- **Hotels Found:** {len(hotels)}",
+        f"- **Search Type:** {search_params.get('search_type', 'Find Hotels')}",
+        "### 🏨 Hotel List",
+    ]
+    for hotel in hotels:
+        lines += [
+            f"**🏨 {hotel.name}** ⭐ {_fmt(hotel.rating)}/5",
+            f"- 📍 **Location:** {_fmt(hotel.area)}",
+            f"- 💰 **Price:** {_fmt(hotel.price, '${:,.0f}')}/night",
+            f"- 🔗 **Book Now:** {_fmt(hotel.link)}",
+            f"- ✨ **Top Features:** {', '.join(hotel.amenities[:3]) or 'N/A'}",
+            "---",
+        ]
+    picks = ListingTable(hotels).picks(search_params)
+    best_deal, highest_rated, prime_location = picks.get('best_deal'), picks.get('highest_rated'), picks.get('prime_location')
+    lines.append("### 🎯 Top Recommendations")
+    if best_deal:
+        lines.append(f"- **Best Deal:** {best_deal.name} - ${best_deal.price:,.0f}")
+    if highest_rated:
+        lines.append(f"- **Highest Rated:** {highest_rated.name} - {highest_rated.rating}⭐")
+    if prime_location:
+        lines.append(f"- **Prime Location:** {prime_location.name}")
+    lines += [
+        "### 📞 Quick Actions",
+        "- Click booking links for instant reservations",
+        "- Use advanced search for more filtering options",
+    ]
+    return "\n".join(lines)
+
+
+def render_advanced_search(result: HotelSearchResult, search_params: Dict[str, Any]) -> str:
+    hotels = result.hotels
+    requested = search_params.get('amenities') or []
+    table = ListingTable(hotels)
+    matches = table.amenity_matches(requested)
+    lines = [
+        "## 🎯 Advanced Hotel Search Results",
+        "### 📊 Detailed Search Summary",
+        f"- **Location:** {result.location or search_params.get('location', '')}",
+        f"- **Check-in:** {_fmt(search_params.get('checkin'))} | **Check-out:** {_fmt(search_params.get('checkout'))}",
+        f"- **Guests:** {search_params.get('adults', 1)} adults, {search_params.get('children', 0)} children, "
+        f"{search_params.get('infants', 0)} infants, {search_params.get('pets', 0)} pets",
+        f"- **Room Type:** {search_params.get('room_type', 'Any')}",
+        f"- **Star Rating:** {search_params.get('star_rating', 'Any')}",
+        f"- **Amenities:** {', '.join(requested) or 'Any'}",
+        f"- **Total Results:** {len(hotels)} hotels found",
+        "### 🏨 Detailed Hotel Listings",
+    ]
+    for i, hotel in enumerate(hotels):
+        lines += [
+            "---",
+            f"## 🏨 {hotel.name}",
+            "| **Property Details** | **Information** |",
+            "|---------------------|-----------------|",
+            f"| ⭐ **Rating** | {_fmt(hotel.rating)}/5 stars ({_fmt(hotel.reviews)} reviews) |",
+            f"| 📍 **Area** | {_fmt(hotel.area)} |",
+            f"| 💰 **Nightly Rate** | {_fmt(hotel.price, '${:,.0f}')} per night |",
+            f"| 📏 **Distance** | {_fmt(hotel.distance_center_km, '{} km')} from city center • "
+            f"{_fmt(hotel.distance_airport_km, '{} km')} from airport |",
+            f"| 🔗 **Booking Links** | {_fmt(hotel.link)} |",
+            "",
+            f"**✨ Amenities:** {', '.join(hotel.amenities) or 'N/A'}",
+            "",
+            f"**📋 Cancellation:** {_fmt(hotel.cancellation)}",
+            "",
+        ]
+        if requested:
+            lines.append(f"**🎯 Amenity Match:** matches {matches[i]} of {len(requested)} requested amenities")
+    lines += [
+        "### 📈 Comparison Summary",
+        "| Hotel | Rating | Price | Key Features | Booking Link |",
+        "|-------|--------|-------|--------------|--------------|",
+    ]
+    for hotel in hotels:
+        lines.append(f"| {hotel.name} | {_fmt(hotel.rating)}⭐ | {_fmt(hotel.price, '${:,.0f}')} | "
+                     f"{', '.join(hotel.amenities[:2]) or 'N/A'} | {_fmt(hotel.link)} |")
+    lines += ["", "### 🏆 Final Recommendations"]
+    picks = table.picks(search_params)
+    for label, key in [("Best Overall Value", 'best_value'), ("Luxury Choice", 'luxury'), ("Budget Winner", 'best_deal'),
+                       ("Location Champion", 'prime_location'), ("Amenity Leader", 'amenity_leader')]:
+        hotel = picks.get(key)
+        if hotel:
+            lines.append(f"- **{label}:** {hotel.name}")
+    return "\n".join(lines)
+
+
+def render_search_result(result: HotelSearchResult, search_mode: str, search_params: Dict[str, Any]) -> str:
+    if search_mode == "Advanced Search":
+        return render_advanced_search(result, search_params)
+    return render_quick_search(result, search_params)
@@ -0,0 +1,87 @@
+import asyncio
+import json
+import os
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from listings import tool_text
+from tool_compaction import current_compactor
+
+# Most listing-detail calls a batch runs at once (overridable through .env)
+DETAILS_CONCURRENCY = int(os.getenv("HOTEL_DETAILS_CONCURRENCY", "8"))
+
+
+async def fetch_listing_details(sessions: Sequence[Any], ids: Sequence[str], arguments: Optional[Dict[str, Any]] = None,
+                                concurrency: int = DETAILS_CONCURRENCY) -> Dict[str, Any]:
+    """``airbnb_listing_details`` results for many listings, keyed by listing ID.
+
+    Calls are spread round-robin over ``sessions`` (one per pooled server)
+    with at most ``concurrency`` in flight. A call that raised is returned
+    as its exception, so one failed listing does not lose the others.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def fetch(i: int, listing_id: str) -> Any:
+        async with semaphore:
+            return await sessions[i % len(sessions)].call_tool(
+                'airbnb_listing_details', {**(arguments or {}), 'id': listing_id})
+
+    unique = list(dict.fromkeys(str(listing_id) for listing_id in ids))
+    results = await asyncio.gather(*(fetch(i, listing_id) for i, listing_id in enumerate(unique)),
+                                   return_exceptions=True)
+    return dict(zip(unique, results))
+
+
+def merged_details(results: Dict[str, Any]) -> Dict[str, Any]:
+    """One payload with an entry per listing: its details, or the error fetching them."""
+    listings: List[Dict[str, Any]] = []
+    for listing_id, result in results.items():
+        if isinstance(result, BaseException):
+            listings.append({'id': listing_id, 'error': str(result) or type(result).__name__})
+            continue
+        text = tool_text(result)
+        if getattr(result, 'isError', False):
+            listings.append({'id': listing_id, 'error': text})
+            continue
+        try:
+            payload = json.loads(text)
+        except ValueError:
+            payload = None
+        entry = {'id': listing_id}
+        entry.update(payload if isinstance(payload, dict) else {'details': text})
+        entry['id'] = listing_id
+        listings.append(entry)
+    return {'listings': listings}
+
+
+def listing_details_batch_tool(sessions: Sequence[Any], search_params: Optional[Dict[str, Any]] = None) -> Callable:
+    """An agent tool fetching details for many listings in one call, over ``sessions``."""
+    ignore_robots = (search_params or {}).get('ignoreRobotsText', True)
+
+    async def airbnb_listing_details_batch(ids: List[str], checkin: Optional[str] = None,
+                                           checkout: Optional[str] = None, adults: Optional[int] = None,
+                                           children: Optional[int] = None, infants: Optional[int] = None,
+                                           pets: Optional[int] = None) -> str:
+        """Get detailed information about several Airbnb listings in one call.
+
+        Args:
+            ids: The Airbnb listing IDs to get details for.
+            checkin: Check-in date (YYYY-MM-DD).
+            checkout: Check-out date (YYYY-MM-DD).
+            adults: Number of adults.
+            children: Number of children.
+            infants: Number of infants.
+            pets: Number of pets.
+
+        Returns:
+            JSON with a `listings` array: each listing's details, or an `error` for listings that failed.
+        """
+        arguments = {key: value for key, value in (('checkin', checkin), ('checkout', checkout), ('adults', adults),
+                                                   ('children', children), ('infants', infants), ('pets', pets))
+                     if value is not None}
+        arguments['ignoreRobotsText'] = ignore_robots
+        payload = merged_details(await fetch_listing_details(sessions, ids, arguments))
+        # Each listing was compacted on its way in; the merged result gets the same token budget as any other
+        compactor = current_compactor.get()
+        return compactor.fit(payload) if compactor is not None else json.dumps(payload)
+
+    return airbnb_listing_details_batch
@@ -0,0 +1,192 @@
+import os
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Amenities offered in the Advanced Search form, with the words Airbnb uses for them
+AMENITY_TERMS = {
+    'WiFi': ("wifi", "wi-fi", "internet"),
+    'Pool': ("pool",),
+    'Gym': ("gym", "fitness", "exercise equipment"),
+    'Spa': ("spa", "sauna", "hot tub"),
+    'Restaurant': ("restaurant",),
+    'Bar': ("bar",),
+    'Parking': ("parking", "garage"),
+    'Pet Friendly': ("pets allowed", "pet friendly", "pet-friendly"),
+    'Business Center': ("business center", "dedicated workspace", "workspace"),
+    'Airport Shuttle': ("airport shuttle", "shuttle"),
+    'Room Service': ("room service",),
+    'Concierge': ("concierge", "host greets you"),
+}
+AMENITY_BITS = {name: 1 << i for i, name in enumerate(AMENITY_TERMS)}
+
+# Airbnb has no room classes; the form's choices are matched against listing names
+ROOM_TYPE_TERMS = {
+    'Single Room': ("private room", "single", "studio", "room"),
+    'Double Room': ("double", "queen", "king"),
+    'Suite': ("suite",),
+    'Family Room': ("family", "villa", "house", "home", "bedrooms"),
+    'Executive Room': ("executive", "luxury", "premium", "penthouse"),
+}
+ROOM_TYPE_BITS = {name: 1 << i for i, name in enumerate(ROOM_TYPE_TERMS)}
+
+# Airbnb has no star ratings; the form's minimum maps to a minimum guest rating
+STAR_RATING_MINIMUMS = {'3+ Stars': 3.0, '4+ Stars': 4.0, '5 Stars Only': 4.8}
+
+# Relative weight of each criterion in a listing's overall score
+SCORE_WEIGHTS = {
+    'price': float(os.getenv("HOTEL_SCORE_PRICE_WEIGHT", "0.3")),
+    'rating': float(os.getenv("HOTEL_SCORE_RATING_WEIGHT", "0.35")),
+    'distance': float(os.getenv("HOTEL_SCORE_DISTANCE_WEIGHT", "0.15")),
+    'amenities': float(os.getenv("HOTEL_SCORE_AMENITY_WEIGHT", "0.2")),
+}
+ROOM_TYPE_BONUS = 0.1
+# Reviews at which a listing's own rating counts as much as the average rating
+RATING_PRIOR_REVIEWS = 10
+
+
+def _pattern(terms: Sequence[str]) -> "re.Pattern":
+    return re.compile(r"\b(?:" + "|".join(re.escape(t) for t in terms) + r")\b")
+
+
+_AMENITY_PATTERNS = {name: _pattern(terms) for name, terms in AMENITY_TERMS.items()}
+_ROOM_TYPE_PATTERNS = {name: _pattern(terms) for name, terms in ROOM_TYPE_TERMS.items()}
+
+
+@lru_cache(maxsize=4096)
+def _single_amenity_mask(amenity: str) -> int:
+    text = amenity.casefold()
+    return sum(bit for name, bit in AMENITY_BITS.items() if _AMENITY_PATTERNS[name].search(text))
+
+
+def amenity_mask(amenities: Sequence[str]) -> int:
+    """Bitmask of the form amenities that a listing's amenity strings provide."""
+    # Listings share most amenity strings, so each distinct string is matched once
+    mask = 0
+    for amenity in amenities:
+        mask |= _single_amenity_mask(amenity)
+    return mask
+
+
+def requested_mask(requested: Sequence[str]) -> int:
+    return sum(AMENITY_BITS.get(name, 0) for name in set(requested))
+
+
+def room_type_mask(name: str) -> int:
+    text = (name or "").casefold()
+    return sum(bit for room_type, bit in ROOM_TYPE_BITS.items() if _ROOM_TYPE_PATTERNS[room_type].search(text))
+
+
+def min_rating_for(star_rating: Optional[str]) -> Optional[float]:
+    return STAR_RATING_MINIMUMS.get(star_rating or "Any")
+
+
+def _popcount(masks: np.ndarray) -> np.ndarray:
+    return np.unpackbits(masks.astype(">u4").view(np.uint8).reshape(-1, 4), axis=1).sum(axis=1)
+
+
+def _column(listings: Sequence[Any], attr: str) -> np.ndarray:
+    return np.array([np.nan if getattr(l, attr) is None else getattr(l, attr) for l in listings], dtype=float)
+
+
+def _normalized(values: np.ndarray, higher_is_better: bool = True) -> np.ndarray:
+    """Scale to 0..1 across the listings; unknown values score a neutral 0.5."""
+    known = ~np.isnan(values)
+    scores = np.full(values.shape, 0.5)
+    if known.any():
+        low, high = values[known].min(), values[known].max()
+        scaled = (values[known] - low) / (high - low) if high > low else np.full(known.sum(), 0.5)
+        scores[known] = scaled if higher_is_better else 1 - scaled
+    return scores
+
+
+def _best(values: np.ndarray, highest: bool) -> Optional[int]:
+    if values.size == 0 or np.isnan(values).all():
+        return None
+    return int(np.nanargmax(values) if highest else np.nanargmin(values))
+
+
+class ListingTable:
+    """Column-oriented listings for local filtering, scoring and picks.
+
+    Each attribute is one NumPy array, and amenities and room types are
+    bitmasks. All filters and scores are whole-array operations, so
+    thousands of listings are ranked in milliseconds with no model calls.
+    """
+
+    def __init__(self, listings: Sequence[Any]):
+        self.listings = list(listings)
+        count = len(self.listings)
+        self.price = _column(self.listings, 'price')
+        self.rating = _column(self.listings, 'rating')
+        self.reviews = _column(self.listings, 'reviews')
+        self.distance = _column(self.listings, 'distance_center_km')
+        self.amenities = np.fromiter((amenity_mask(l.amenities) for l in self.listings), dtype=np.uint32, count=count)
+        self.amenity_count = np.array([len(l.amenities) for l in self.listings], dtype=float)
+        self.room_types = np.fromiter((room_type_mask(l.name) for l in self.listings), dtype=np.uint32, count=count)
+
+    def __len__(self) -> int:
+        return len(self.listings)
+
+    def mask(self, search_params: Dict[str, Any]) -> np.ndarray:
+        """Listings that pass the hard filters: minimum rating and price bounds."""
+        keep = np.ones(len(self), dtype=bool)
+        minimum = min_rating_for(search_params.get('star_rating'))
+        if minimum is not None:
+            keep &= self.rating >= minimum
+        # Listings without a price are kept; they cannot be said to be out of budget
+        if search_params.get('min_price') is not None:
+            keep &= ~(self.price < search_params['min_price'])
+        if search_params.get('max_price') is not None:
+            keep &= ~(self.price > search_params['max_price'])
+        return keep
+
+    def amenity_matches(self, requested: Sequence[str]) -> np.ndarray:
+        return _popcount(self.amenities & np.uint32(requested_mask(requested)))
+
+    def scores(self, search_params: Dict[str, Any]) -> np.ndarray:
+        """Weighted 0..1 score per listing over price, rating, distance and amenity match."""
+        requested = search_params.get('amenities') or []
+        # Few reviews pull a rating towards the average, so 5.0 from 2 guests does not win outright
+        known = ~np.isnan(self.rating)
+        mean = self.rating[known].mean() if known.any() else np.nan
+        reviews = np.nan_to_num(self.reviews, nan=RATING_PRIOR_REVIEWS)
+        rating = (self.rating * reviews + mean * RATING_PRIOR_REVIEWS) / (reviews + RATING_PRIOR_REVIEWS)
+        wanted = requested_mask(requested)
+        amenity = self.amenity_matches(requested) / bin(wanted).count("1") if wanted else np.full(len(self), 0.5)
+        score = (SCORE_WEIGHTS['price'] * _normalized(self.price, higher_is_better=False)
+                 + SCORE_WEIGHTS['rating'] * _normalized(rating)
+                 + SCORE_WEIGHTS['distance'] * _normalized(self.distance, higher_is_better=False)
+                 + SCORE_WEIGHTS['amenities'] * amenity)
+        room_bit = ROOM_TYPE_BITS.get(search_params.get('room_type') or "Any")
+        if room_bit:
+            score += ROOM_TYPE_BONUS * ((self.room_types & np.uint32(room_bit)) != 0)
+        return score
+
+    def rank(self, search_params: Dict[str, Any], limit: Optional[int] = None) -> List[Any]:
+        """Filtered listings, best score first."""
+        indices = np.flatnonzero(self.mask(search_params))
+        order = indices[np.argsort(-self.scores(search_params)[indices], kind="stable")]
+        return [self.listings[i] for i in order[:limit]]
+
+    def picks(self, search_params: Dict[str, Any]) -> Dict[str, Optional[Any]]:
+        """The standout listings used for the recommendation sections."""
+        requested = search_params.get('amenities') or []
+        if not len(self):
+            return {}
+        matches = self.amenity_matches(requested).astype(float) if requested else self.amenity_count
+        # Ties on amenities go to the better rated listing
+        amenity_leader = matches + np.nan_to_num(self.rating, nan=0.0) / 10
+        # Ties on rating go to the listing with more reviews
+        highest_rated = self.rating + np.nan_to_num(self.reviews, nan=0.0) / 1e7
+        indices = {
+            'best_value': _best(self.scores(search_params), highest=True),
+            'best_deal': _best(self.price, highest=False),
+            'luxury': _best(self.price, highest=True),
+            'highest_rated': _best(highest_rated, highest=True),
+            'prime_location': _best(self.distance, highest=False),
+            'amenity_leader': _best(amenity_leader, highest=True),
+        }
+        return {key: None if i is None else self.listings[i] for key, i in indices.items()}
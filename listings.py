@@ -0,0 +1,92 @@
+import json
+import re
+from typing import Any, Dict, List, Optional
+
+from hotel_rendering import HotelListing
+from listing_engine import ListingTable
+
+
+def parse_search_page(text: str) -> tuple[List[Dict[str, Any]], Optional[str]]:
+    """Raw listings and the next page cursor from an ``airbnb_search`` result."""
+    try:
+        payload = json.loads(text)
+    except ValueError:
+        return [], None
+    if not isinstance(payload, dict):
+        return [], None
+    listings = payload.get('searchResults')
+    cursor = (payload.get('paginationInfo') or {}).get('nextPageCursor')
+    return listings if isinstance(listings, list) else [], cursor
+
+
+def tool_text(result) -> str:
+    """The text content of an MCP tool result."""
+    return "\n".join(getattr(item, 'text', '') for item in result.content)
+
+
+def _price_per_night(label: str) -> Optional[float]:
+    # "$120 per night", "$1,234 for 5 nights", "$98 night"
+    amount = re.search(r"(\d[\d,]*(?:\.\d+)?)", label or "")
+    if amount is None:
+        return None
+    price = float(amount.group(1).replace(",", ""))
+    nights = re.search(r"for (\d+) nights?", label)
+    return round(price / int(nights.group(1)), 2) if nights else price
+
+
+def listing_from_search(raw: Dict[str, Any]) -> HotelListing:
+    """A HotelListing from one ``airbnb_search`` result, before details are known."""
+    description = (raw.get('demandStayListing') or {}).get('description') or {}
+    name = (description.get('name') or {}).get('localizedStringWithTranslationPreference') or raw.get('name')
+    rating_label = raw.get('avgRatingA11yLabel') or ""
+    rating = re.match(r"\s*(\d+(?:\.\d+)?) out of 5", rating_label)
+    reviews = re.search(r"(\d[\d,]*) reviews?", rating_label)
+    price_line = ((raw.get('structuredDisplayPrice') or {}).get('primaryLine') or {})
+    area = (raw.get('structuredContent') or {}).get('secondaryLine')
+    return HotelListing(
+        id=str(raw['id']) if raw.get('id') is not None else None,
+        name=name or f"Listing {raw.get('id', '')}",
+        rating=float(rating.group(1)) if rating else None,
+        reviews=int(reviews.group(1).replace(",", "")) if reviews else None,
+        price=_price_per_night(price_line.get('accessibilityLabel') or price_line.get('price') or ""),
+        link=raw.get('url'),
+        area=area if isinstance(area, str) else None,
+    )
+
+
+def listing_details_fields(text: str) -> Optional[Dict[str, Any]]:
+    """The HotelListing fields in an ``airbnb_listing_details`` result, or None if it is not one."""
+    try:
+        sections = {s.get('id'): s for s in json.loads(text).get('details', []) if isinstance(s, dict)}
+    except (ValueError, AttributeError):
+        return None
+    update: Dict[str, Any] = {}
+    groups = (sections.get('AMENITIES_DEFAULT') or {}).get('seeAllAmenitiesGroups') or []
+    amenities = [a for g in groups for a in g.get('amenities', []) if isinstance(a, str)]
+    if amenities:
+        update['amenities'] = amenities
+    location = sections.get('LOCATION_DEFAULT') or {}
+    if location.get('subtitle'):
+        update['area'] = location['subtitle']
+    if location.get('distanceToCenterKm') is not None:
+        update['distance_center_km'] = location['distanceToCenterKm']
+    if location.get('distanceToAirportKm') is not None:
+        update['distance_airport_km'] = location['distanceToAirportKm']
+    policies = sections.get('POLICIES_DEFAULT') or {}
+    cancellation = policies.get('cancellationPolicy') or policies.get('cancellationPolicyTitle')
+    if isinstance(cancellation, str):
+        update['cancellation'] = cancellation
+    return update
+
+
+def apply_listing_details(hotel: HotelListing, text: str) -> HotelListing:
+    """Fill in amenities, area and cancellation from an ``airbnb_listing_details`` result."""
+    update = listing_details_fields(text) or {}
+    if hotel.area:
+        update.pop('area', None)
+    return hotel.model_copy(update=update)
+
+
+def filter_and_rank(hotels: List[HotelListing], search_params: Dict[str, Any]) -> List[HotelListing]:
+    """Apply the Advanced Search filters locally and order listings by their weighted score."""
+    return ListingTable(hotels).rank(search_params)
@@ -0,0 +1,158 @@
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+if TYPE_CHECKING:
+    # httpx comes with the OpenAI SDK and loads with it, on the first search
+    import httpx
+
+# Pooled LLM HTTP client settings (overridable through .env)
+HTTP2_ENABLED = os.getenv("HOTEL_LLM_HTTP2", "1").lower() in ("1", "true", "yes")
+MAX_CONNECTIONS = int(os.getenv("HOTEL_LLM_MAX_CONNECTIONS", "20"))
+# Seconds an idle connection, and an idle tenant's whole client, are kept open
+KEEPALIVE_EXPIRY = float(os.getenv("HOTEL_LLM_KEEPALIVE_EXPIRY", "60"))
+CLIENT_IDLE_TTL = float(os.getenv("HOTEL_LLM_CLIENT_IDLE_TTL", "600"))
+
+
+def tenant_key(api_key: Optional[str]) -> str:
+    """Registry key for an API key; the key itself is never stored."""
+    return hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:32]
+
+
+class _Entry:
+    def __init__(self, client: "httpx.AsyncClient"):
+        self.client = client
+        self.last_used = time.monotonic()
+        self.in_flight = 0
+
+
+class LLMClientRegistry:
+    """One keep-alive HTTP client per API key, shared by every model call made with that key.
+
+    Clients hold an HTTP/2 connection pool, so concurrent searches by the
+    same user multiplex over warm connections instead of each paying for a
+    TLS handshake, while users with different keys never share a client.
+    Clients unused for ``idle_ttl`` seconds are closed by a reaper task on
+    the event loop, started with the first client, so they are let go even
+    when no more requests arrive.
+    """
+
+    def __init__(self, http2: bool = HTTP2_ENABLED, max_connections: int = MAX_CONNECTIONS,
+                 keepalive_expiry: float = KEEPALIVE_EXPIRY, idle_ttl: float = CLIENT_IDLE_TTL):
+        self.http2 = http2
+        self.max_connections = max_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.idle_ttl = idle_ttl
+        self.created = 0
+        self.evicted = 0
+        self._entries: Dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+        self._reaper: Optional[asyncio.Task] = None
+
+    def _new_client(self) -> "httpx.AsyncClient":
+        import httpx
+
+        limits = httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections,
+                              keepalive_expiry=self.keepalive_expiry)
+        try:
+            return httpx.AsyncClient(http2=self.http2, limits=limits)
+        except ImportError:
+            # HTTP/2 needs the optional h2 package; keep-alive still works over HTTP/1.1
+            return httpx.AsyncClient(limits=limits)
+
+    def acquire(self, api_key: Optional[str]) -> "httpx.AsyncClient":
+        """The tenant's client, created if needed; pair with ``release``. Must run on the event loop."""
+        key = tenant_key(api_key)
+        with self._lock:
+            self._evict_idle(exclude=key)
+            entry = self._entries.get(key)
+            if entry is None or entry.client.is_closed:
+                entry = self._entries[key] = _Entry(self._new_client())
+                self.created += 1
+            entry.in_flight += 1
+            entry.last_used = time.monotonic()
+            self._start_reaper()
+            return entry.client
+
+    def release(self, api_key: Optional[str]) -> None:
+        with self._lock:
+            entry = self._entries.get(tenant_key(api_key))
+            if entry is not None:
+                entry.in_flight = max(0, entry.in_flight - 1)
+                entry.last_used = time.monotonic()
+
+    def _start_reaper(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._reaper is None or self._reaper.done() or self._reaper.get_loop() is not loop:
+            self._reaper = loop.create_task(self._reap())
+
+    async def _reap(self) -> None:
+        while True:
+            await asyncio.sleep(max(1.0, min(self.idle_ttl, 60.0)))
+            with self._lock:
+                self._evict_idle(exclude=None)
+
+    def _evict_idle(self, exclude: Optional[str]) -> None:
+        now = time.monotonic()
+        for key, entry in list(self._entries.items()):
+            if key != exclude and entry.in_flight == 0 and now - entry.last_used > self.idle_ttl:
+                del self._entries[key]
+                self.evicted += 1
+                asyncio.ensure_future(entry.client.aclose())
+
+    async def aclose(self) -> None:
+        if self._reaper is not None:
+            self._reaper.cancel()
+            self._reaper = None
+        with self._lock:
+            entries, self._entries = list(self._entries.values()), {}
+        await asyncio.gather(*(entry.client.aclose() for entry in entries), return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'tenants': len(self._entries), 'created': self.created, 'evicted': self.evicted,
+                    'in_flight': sum(entry.in_flight for entry in self._entries.values()), 'http2': self.http2}
+
+
+_registry: Optional[LLMClientRegistry] = None
+
+
+def get_client_registry() -> LLMClientRegistry:
+    """The process-wide registry, created on first use."""
+    global _registry
+    if _registry is None:
+        _registry = LLMClientRegistry()
+    return _registry
+
+
+def use_pooled_client(model: Any, api_key: Optional[str], registry: Optional[LLMClientRegistry] = None) -> Any:
+    """Make an agno OpenAI-style model send its requests through the tenant's pooled client.
+
+    The client is looked up on every call rather than stored once, so a
+    model that outlives an evicted client simply gets a fresh one.
+    """
+    registry = registry or get_client_registry()
+    original_ainvoke = model.ainvoke
+    original_ainvoke_stream = model.ainvoke_stream
+
+    async def ainvoke(*args, **kwargs):
+        model.http_client = registry.acquire(api_key)
+        try:
+            return await original_ainvoke(*args, **kwargs)
+        finally:
+            registry.release(api_key)
+
+    async def ainvoke_stream(*args, **kwargs):
+        model.http_client = registry.acquire(api_key)
+        try:
+            async for delta in original_ainvoke_stream(*args, **kwargs):
+                yield delta
+        finally:
+            registry.release(api_key)
+
+    model.ainvoke = ainvoke
+    model.ainvoke_stream = ainvoke_stream
+    return model
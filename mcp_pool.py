@@ -0,0 +1,311 @@
+import asyncio
+import os
+from contextlib import AsyncExitStack, asynccontextmanager
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Callable, Optional, List
+
+from circuit_breaker import BreakerSession, CircuitBreaker, get_breaker
+from hedging import HEDGE_ENABLED, HedgedSession, ToolLatencies
+from rate_limit import AIRBNB_CONCURRENCY, AdaptiveLimiter, RateLimitedSession, get_limiter
+from search_limits import LimitedSession
+from session_proxy import SessionProxy
+from tool_cache import CachingSession, ToolCallCache
+from tool_compaction import CompactingSession
+from tool_schema_cache import SCHEMA_CACHE_DIR, SchemaCachingSession, ToolSchemaCache, server_identity
+from tracing import TracingSession, span
+
+if TYPE_CHECKING:
+    # The MCP SDK and agno's MCP toolkit are imported when the pool starts, off the script's thread
+    from agno.tools.mcp import MCPTools
+    from mcp import ClientSession, StdioServerParameters
+
+# Pool sizing and health-check settings (overridable through .env)
+DEFAULT_POOL_SIZE = int(os.getenv("MCP_POOL_SIZE", "2"))
+HEALTH_CHECK_INTERVAL = float(os.getenv("MCP_HEALTH_CHECK_INTERVAL", "30"))
+PING_TIMEOUT = float(os.getenv("MCP_PING_TIMEOUT", "5"))
+STARTUP_TIMEOUT = float(os.getenv("MCP_STARTUP_TIMEOUT", "90"))
+
+AIRBNB_SERVER_COMMAND = "npx"
+AIRBNB_SERVER_ARGS = ["-y", "@openbnb/mcp-server-airbnb", "--ignore-robots-txt"]
+
+
+@lru_cache(maxsize=None)
+def airbnb_server_params() -> "StdioServerParameters":
+    from mcp import StdioServerParameters
+
+    return StdioServerParameters(command=AIRBNB_SERVER_COMMAND, args=AIRBNB_SERVER_ARGS)
+
+
+class _HandshakeDoneSession(SessionProxy):
+    """Answers MCPTools' own ``initialize()`` with the handshake the pool already did."""
+
+    def __init__(self, inner: "ClientSession", init_result: Any):
+        super().__init__(inner)
+        self.init_result = init_result
+
+    async def initialize(self) -> Any:
+        return self.init_result
+
+
+class PooledServer:
+    """One MCP server process with its client session and initialized MCPTools.
+
+    The stdio transport and session are entered and exited inside a single
+    owner task, as anyio requires, so the process can be restarted from any
+    task on the pool's event loop.
+    """
+
+    def __init__(self, index: int, server_params: "StdioServerParameters",
+                 wrap_session: Optional[Callable[["ClientSession"], Any]] = None,
+                 schema_cache: Optional[ToolSchemaCache] = None):
+        self.index = index
+        self.server_params = server_params
+        self.wrap_session = wrap_session
+        self.schema_cache = schema_cache
+        self.session: Optional["ClientSession"] = None
+        self.tools: Optional["MCPTools"] = None
+        self.healthy = False
+        self.restarts = 0
+        self.lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._ready: Optional[asyncio.Event] = None
+        self._tools_session: Any = None
+        self._stop: Optional[asyncio.Event] = None
+        self._error: Optional[BaseException] = None
+
+    async def start(self, timeout: float = STARTUP_TIMEOUT) -> None:
+        self._ready, self._stop, self._error = asyncio.Event(), asyncio.Event(), None
+        self._task = asyncio.create_task(self._run())
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            await self.stop()
+            raise
+        if self._error is not None:
+            raise self._error
+
+    async def _run(self) -> None:
+        from agno.tools.mcp import MCPTools
+        from mcp import ClientSession
+        from mcp.client.stdio import stdio_client
+
+        schema_session = None
+        try:
+            async with AsyncExitStack() as stack:
+                with span('mcp.spawn', server=self.index):
+                    read, write = await stack.enter_async_context(stdio_client(self.server_params))
+                session = await stack.enter_async_context(ClientSession(read, write))
+                with span('mcp.handshake', server=self.index):
+                    init_result = await session.initialize()
+                handshaken = _HandshakeDoneSession(session, init_result)
+                if self.schema_cache is not None:
+                    identity = server_identity(self.server_params.command, self.server_params.args,
+                                               init_result.serverInfo)
+                    handshaken = schema_session = SchemaCachingSession(handshaken, self.schema_cache, identity,
+                                                                       on_change=self._reload_tools)
+                self._tools_session = self.wrap_session(handshaken) if self.wrap_session else handshaken
+                tools = MCPTools(session=self._tools_session)
+                with span('mcp.initialize', server=self.index):
+                    await tools.initialize()
+                self.session, self.tools, self.healthy = session, tools, True
+                self._ready.set()
+                await self._stop.wait()
+        except Exception as e:
+            self._error = e
+        finally:
+            if schema_session is not None:
+                schema_session.close()
+            self.session, self.tools, self.healthy = None, None, False
+            self._ready.set()
+
+    async def _reload_tools(self) -> None:
+        """Rebuild the tool wrappers after the server's schema turned out to have changed."""
+        from agno.tools.mcp import MCPTools
+
+        tools = MCPTools(session=self._tools_session)
+        await tools.initialize()
+        # Searches already running keep the wrappers they started with
+        self.tools = tools
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._stop.set()
+        try:
+            await asyncio.wait_for(asyncio.shield(self._task), PING_TIMEOUT)
+        except (asyncio.TimeoutError, Exception):
+            self._task.cancel()
+        self._task = None
+        self.healthy = False
+
+    async def restart(self, timeout: float = STARTUP_TIMEOUT) -> None:
+        await self.stop()
+        self.restarts += 1
+        await self.start(timeout)
+
+    async def ping(self, timeout: float = PING_TIMEOUT) -> bool:
+        if not self.healthy or self.session is None:
+            return False
+        try:
+            await asyncio.wait_for(self.session.send_ping(), timeout)
+            return True
+        except Exception:
+            self.healthy = False
+            return False
+
+
+class MCPServerPool:
+    """A fixed-size pool of warm MCP servers leased out to searches.
+
+    All methods must run on one long-lived event loop (see
+    ``background_loop.py``). Servers are started once and kept alive between
+    searches. A background
+    task pings idle servers and restarts any that have crashed or hung; a
+    server that fails during a lease is restarted before it is handed out again.
+    Tool calls that reach the upstream pass a circuit breaker shared by
+    everything calling it, so while Airbnb is down they fail at once instead
+    of waiting out their timeout; calls the tool cache answers still succeed.
+    """
+
+    def __init__(self, server_params: Optional["StdioServerParameters"] = None,
+                 size: int = DEFAULT_POOL_SIZE, health_check_interval: float = HEALTH_CHECK_INTERVAL,
+                 tool_cache: Optional[ToolCallCache] = None, schema_cache: Optional[ToolSchemaCache] = None,
+                 limiter: Optional[AdaptiveLimiter] = None, breaker: Optional[CircuitBreaker] = None,
+                 hedge: bool = HEDGE_ENABLED):
+        self.server_params = server_params
+        self.size = max(1, size)
+        self.health_check_interval = health_check_interval
+        self.tool_cache = tool_cache if tool_cache is not None else ToolCallCache()
+        # Shared by every pool talking to the same upstream
+        self.limiter = limiter if limiter is not None else get_limiter("mcp:airbnb", AIRBNB_CONCURRENCY)
+        self.breaker = breaker if breaker is not None else get_breaker("mcp:airbnb")
+        # Slow tool calls are backed up on another server when hedging is on
+        self.latencies = ToolLatencies() if hedge else None
+        self.schema_cache = schema_cache if schema_cache is not None else (
+            ToolSchemaCache() if SCHEMA_CACHE_DIR else None)
+        self.servers: List[PooledServer] = []
+        self._idle: Optional[asyncio.Queue] = None
+        self._health_task: Optional[asyncio.Task] = None
+        self._start_lock: Optional[asyncio.Lock] = None
+        self._started = False
+        self._rotation = 0
+
+    async def start(self) -> None:
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self._started:
+                return
+            self._idle = asyncio.Queue()
+            if self.server_params is None:
+                self.server_params = airbnb_server_params()
+            self.servers = [PooledServer(i, self.server_params, lambda session, i=i: self._wrap_session(session, i),
+                                         self.schema_cache) for i in range(self.size)]
+            # Failed servers still join the queue; they are restarted when leased.
+            await asyncio.gather(*(server.start() for server in self.servers), return_exceptions=True)
+            for server in self.servers:
+                self._idle.put_nowait(server)
+            self._health_task = asyncio.create_task(self._health_loop())
+            self._started = True
+
+    def _wrap_session(self, session: "ClientSession", index: int) -> Any:
+        """Build the session stack that MCPTools calls tools through."""
+        upstream = self._upstream_session(session)
+        if self.latencies is not None:
+            upstream = HedgedSession(upstream, self.latencies, lambda: self._backup_session(index))
+        return TracingSession(CompactingSession(LimitedSession(CachingSession(upstream, self.tool_cache))))
+
+    def _upstream_session(self, session: Any) -> Any:
+        return RateLimitedSession(BreakerSession(session, self.breaker), self.limiter)
+
+    def _backup_session(self, index: int) -> Optional[Any]:
+        """Another healthy server's session to hedge a slow call on, if the limiter has room for it."""
+        if self.limiter.in_flight >= int(self.limiter.limit):
+            return None
+        others = [s for s in self.servers if s.index != index and s.healthy and s.session is not None]
+        if not others:
+            return None
+        self._rotation += 1
+        return self._upstream_session(others[self._rotation % len(others)].session)
+
+    async def close(self) -> None:
+        if self._health_task:
+            self._health_task.cancel()
+        await asyncio.gather(*(server.stop() for server in self.servers), return_exceptions=True)
+        self._started = False
+
+    @asynccontextmanager
+    async def lease(self, timeout: Optional[float] = None, startup_timeout: Optional[float] = None):
+        """Borrow a healthy server for the duration of one search.
+
+        ``timeout`` bounds the wait for a free server and ``startup_timeout``
+        bounds restarting it if it turns out to be unhealthy.
+        """
+        with span('lease') as record:
+            await asyncio.wait_for(asyncio.shield(self.start()), timeout)
+            # Unlike wait_for, a timeout cannot cancel get() after it took a server, losing it from the pool
+            async with asyncio.timeout(timeout):
+                server = await self._idle.get()
+            record['server'] = server.index
+        try:
+            async with server.lock:
+                if not server.healthy:
+                    with span('mcp.restart', server=server.index):
+                        await server.restart(startup_timeout or STARTUP_TIMEOUT)
+                try:
+                    yield server
+                except Exception:
+                    # Leave a dead server marked unhealthy; the next lease restarts it.
+                    await server.ping()
+                    raise
+        finally:
+            self._idle.put_nowait(server)
+
+    def shared_session(self) -> Optional[Any]:
+        """A healthy server's tool session for background work that should not hold a lease.
+
+        MCP sessions multiplex requests, so calls made through it run
+        alongside the search that has the server leased.
+        """
+        healthy = [s for s in self.servers if s.healthy and s.tools is not None]
+        if not healthy:
+            return None
+        self._rotation += 1
+        return healthy[self._rotation % len(healthy)].tools.session
+
+    def tool_sessions(self, first: Optional[PooledServer] = None) -> List[Any]:
+        """Every healthy server's tool session, ``first``'s (the leased server) leading.
+
+        Lets one search spread a batch of independent calls over the pool;
+        the shared limiter still bounds the total in flight.
+        """
+        sessions = [first.tools.session] if first is not None and first.tools is not None else []
+        sessions += [s.tools.session for s in self.servers
+                     if s is not first and s.healthy and s.tools is not None]
+        return sessions
+
+    async def _health_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            for server in self.servers:
+                if server.lock.locked():
+                    continue
+                async with server.lock:
+                    if not await server.ping():
+                        try:
+                            await server.restart()
+                        except Exception:
+                            pass
+
+    def stats(self) -> dict:
+        return {
+            'size': self.size,
+            'healthy': sum(1 for s in self.servers if s.healthy),
+            'idle': self._idle.qsize() if self._idle else 0,
+            'restarts': sum(s.restarts for s in self.servers),
+            'tool_cache': self.tool_cache.stats(),
+            'limiter': self.limiter.stats(),
+            'breaker': self.breaker.stats(),
+            'hedging': self.latencies.stats() if self.latencies else None,
+            'schema_cache': self.schema_cache.stats() if self.schema_cache else None,
+        }
@@ -0,0 +1,196 @@
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from app_profile import percentile
+from rate_limit import classify_error, rate_limit_model
+from search_limits import current_limits
+from tracing import span
+
+# The Perplexity models offered in the app, by size
+SMALL_MODELS = ("llama-3-sonar-small-32k-online", "llama-3-8b-instruct")
+LARGE_MODELS = ("llama-3-sonar-large-32k-online", "llama-3-70b-instruct")
+AUTO_MODEL_ID = "auto"
+
+# Routing settings (overridable through .env)
+TURN_TIMEOUT = float(os.getenv("HOTEL_ROUTER_TURN_TIMEOUT", "20"))
+MAX_ERROR_RATE = float(os.getenv("HOTEL_ROUTER_MAX_ERROR_RATE", "0.5"))
+COOLDOWN = float(os.getenv("HOTEL_ROUTER_COOLDOWN", "60"))
+# Calls remembered per model, and how many are needed before the error rate counts
+_WINDOW = 100
+_MIN_SAMPLES = 4
+# Consecutive failures that take a model out of rotation whatever its error rate
+_MAX_CONSECUTIVE_FAILURES = 3
+
+
+class ModelHealth:
+    """Rolling latency and error rate of one model."""
+
+    def __init__(self):
+        self.latencies: Deque[float] = deque(maxlen=_WINDOW)
+        self.outcomes: Deque[bool] = deque(maxlen=_WINDOW)
+        self.consecutive_failures = 0
+        self.unhealthy_until = 0.0
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.unhealthy_until
+
+    @property
+    def error_rate(self) -> float:
+        return self.outcomes.count(False) / len(self.outcomes) if self.outcomes else 0.0
+
+    def latency(self, pct: float) -> Optional[float]:
+        return percentile(list(self.latencies), pct) if self.latencies else None
+
+    def on_success(self, seconds: float) -> None:
+        self.latencies.append(seconds)
+        self.outcomes.append(True)
+        self.consecutive_failures = 0
+
+    def on_failure(self) -> None:
+        self.outcomes.append(False)
+        self.consecutive_failures += 1
+        if (self.consecutive_failures >= _MAX_CONSECUTIVE_FAILURES
+                or (len(self.outcomes) >= _MIN_SAMPLES and self.error_rate >= MAX_ERROR_RATE)):
+            self.unhealthy_until = time.monotonic() + COOLDOWN
+            # A model back from its cooldown starts over rather than being ejected by old failures
+            self.outcomes.clear()
+            self.consecutive_failures = 0
+
+
+class ModelRouter:
+    """Picks the model for each LLM turn of an "Auto" search from live latency and errors.
+
+    Quick Searches prefer the small models and Advanced Searches the large
+    ones. Within that tier, healthy models are tried fastest first (by p50
+    response latency; models without samples yet are tried first so every
+    model gets measured), then the other tier, then models that are cooling
+    down after failing. Process-wide, so every session learns from all searches.
+    """
+
+    def __init__(self, small: tuple = SMALL_MODELS, large: tuple = LARGE_MODELS):
+        self.small = small
+        self.large = large
+        self.failovers = 0
+        self.health: Dict[str, ModelHealth] = {model_id: ModelHealth() for model_id in small + large}
+
+    def candidates(self, search_mode: str) -> List[str]:
+        """Model IDs to try for one turn, in order."""
+        preferred, other = (self.large, self.small) if search_mode == "Advanced Search" else (self.small, self.large)
+
+        def by_latency(tier: tuple) -> List[str]:
+            healthy = [m for m in tier if self.health[m].healthy]
+            return sorted(healthy, key=lambda m: (self.health[m].latency(50) or 0.0, tier.index(m)))
+
+        ordered = by_latency(preferred) + by_latency(other)
+        return ordered + [m for m in preferred + other if m not in ordered]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'failovers': self.failovers,
+            'models': {model_id: {'healthy': h.healthy, 'calls': len(h.outcomes), 'error_rate': round(h.error_rate, 2),
+                                  'p50_ms': round(h.latency(50) * 1000) if h.latencies else None,
+                                  'p95_ms': round(h.latency(95) * 1000) if h.latencies else None}
+                       for model_id, h in self.health.items()},
+        }
+
+
+_router: Optional[ModelRouter] = None
+
+
+def get_model_router() -> ModelRouter:
+    """The process-wide router, created on first use."""
+    global _router
+    if _router is None:
+        _router = ModelRouter()
+    return _router
+
+
+def _turn_timeout() -> Optional[float]:
+    limits = current_limits.get()
+    if limits is None or limits.deadline is None:
+        return TURN_TIMEOUT
+    return min(TURN_TIMEOUT, limits.deadline.remaining())
+
+
+def _should_fail_over(error: BaseException) -> bool:
+    # A spent search budget is not the model's fault, and no other model would do better
+    limits = current_limits.get()
+    if limits is not None and limits.deadline is not None and limits.deadline.expired:
+        return False
+    return isinstance(error, asyncio.TimeoutError) or classify_error(error)[0]
+
+
+def route_model(front: Any, build: Callable[[str], Any], search_mode: str,
+                router: Optional[ModelRouter] = None) -> Any:
+    """Make ``front`` (an agno model) send each turn to the router's best model, failing over on errors.
+
+    ``build(model_id)`` creates the model for a candidate. A turn that times
+    out (``HOTEL_ROUTER_TURN_TIMEOUT`` to the first response), is rate limited
+    or hits a server error moves on to the next candidate at once, so failover
+    replaces retrying the same model. Streams only fail over before their
+    first chunk.
+    """
+    router = router or get_model_router()
+    # Candidates keep their limiter but not its retries
+    models: Dict[str, Any] = {}
+
+    def model(model_id: str) -> Any:
+        if model_id not in models:
+            models[model_id] = rate_limit_model(build(model_id), max_retries=0)
+        return models[model_id]
+
+    async def ainvoke(*args, **kwargs):
+        error: Optional[BaseException] = None
+        for attempt, model_id in enumerate(router.candidates(search_mode)):
+            if attempt:
+                router.failovers += 1
+            started = time.monotonic()
+            try:
+                with span('llm.route', model=model_id):
+                    response = await asyncio.wait_for(model(model_id).ainvoke(*args, **kwargs), _turn_timeout())
+            except Exception as e:
+                if not _should_fail_over(e):
+                    raise
+                router.health[model_id].on_failure()
+                error = e
+                continue
+            router.health[model_id].on_success(time.monotonic() - started)
+            return response
+        raise error
+
+    async def ainvoke_stream(*args, **kwargs):
+        error: Optional[BaseException] = None
+        for attempt, model_id in enumerate(router.candidates(search_mode)):
+            if attempt:
+                router.failovers += 1
+            started = time.monotonic()
+            stream = model(model_id).ainvoke_stream(*args, **kwargs)
+            try:
+                with span('llm.route', model=model_id):
+                    first = await asyncio.wait_for(stream.__anext__(), _turn_timeout())
+            except StopAsyncIteration:
+                router.health[model_id].on_success(time.monotonic() - started)
+                return
+            except Exception as e:
+                await stream.aclose()
+                if not _should_fail_over(e):
+                    raise
+                router.health[model_id].on_failure()
+                error = e
+                continue
+            router.health[model_id].on_success(time.monotonic() - started)
+            yield first
+            async for delta in stream:
+                yield delta
+            return
+        raise error
+
+    front.ainvoke = ainvoke
+    front.ainvoke_stream = ainvoke_stream
+    # Each candidate has its own limiter slot; the front must not be wrapped again
+    front._rate_limited = True
+    return front
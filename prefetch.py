@@ -0,0 +1,121 @@
+import asyncio
+import json
+import os
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from hotel_agent import (
+    detail_candidates, direct_candidates, direct_search_arguments, tool_text, uses_direct_pipeline, wants_another_page,
+)
+from listing_details import fetch_listing_details
+from listings import parse_search_page
+from mcp_pool import MCPServerPool
+from search_limits import SearchLimits, current_limits
+
+# Seconds the Advanced Search form must stay unchanged before a prefetch starts (overridable through .env)
+PREFETCH_DEBOUNCE = float(os.getenv("HOTEL_PREFETCH_DEBOUNCE", "1.0"))
+# Finished prefetches remembered (one per browser session, least recently scheduled forgotten first)
+_MAX_FINISHED = 256
+
+
+def prefetch_key(search_params: Dict[str, Any]) -> str:
+    """Identifies the Airbnb tool calls a search will make; other form fields do not change them."""
+    # Star rating and room type rank the candidates, so they pick which listings get details
+    relevant = {'arguments': direct_search_arguments(search_params), 'star_rating': search_params.get('star_rating'),
+                'room_type': search_params.get('room_type'), 'max_results': search_params.get('max_results')}
+    return json.dumps(relevant, sort_keys=True, default=str)
+
+
+class SpeculativePrefetcher:
+    """Warms the tool cache with the Airbnb calls a direct Advanced Search is about to make.
+
+    Each browser session has at most one prefetch. ``schedule`` is called on
+    every rerun with the current form; once the form has been left alone
+    for the debounce window, the search pages and listing details the
+    direct pipeline would fetch are requested through the pool's shared
+    tool cache. A changed form cancels the previous prefetch (calls already
+    sent still finish into the cache), and when the search finally runs its
+    identical tool calls are cache hits, or join the prefetch's calls still
+    in flight.
+    """
+
+    def __init__(self, pool: MCPServerPool, debounce: float = PREFETCH_DEBOUNCE):
+        self.pool = pool
+        self.debounce = debounce
+        self.started = 0
+        self.completed = 0
+        self.cancelled = 0
+        self._tasks: "OrderedDict[str, tuple[str, asyncio.Task]]" = OrderedDict()
+
+    async def schedule(self, session_id: str, search_params: Optional[Dict[str, Any]]) -> None:
+        """Prefetch for this form unless it is already being prefetched; must run on the pool's loop.
+
+        ``None`` (or a form the direct pipeline does not handle) just cancels
+        the session's prefetch.
+        """
+        if (search_params is None or not uses_direct_pipeline(search_params)
+                or not (search_params.get('location') or "").strip()
+                or self.pool.tool_cache.ttls.get('airbnb_search', 0) <= 0):
+            self.cancel(session_id)
+            return
+        key = prefetch_key(search_params)
+        current = self._tasks.get(session_id)
+        if current is not None and current[0] == key:
+            self._tasks.move_to_end(session_id)
+            return
+        self.cancel(session_id)
+        task = asyncio.ensure_future(self._prefetch(dict(search_params)))
+        self._tasks[session_id] = (key, task)
+        task.add_done_callback(lambda _: self._forget(session_id, task))
+        self._prune()
+
+    def cancel(self, session_id: str) -> None:
+        current = self._tasks.pop(session_id, None)
+        if current is not None and not current[1].done():
+            current[1].cancel()
+            self.cancelled += 1
+
+    def _forget(self, session_id: str, task: asyncio.Task) -> None:
+        # A finished prefetch stays registered so the same form is not fetched twice;
+        # only a failed one is dropped, so the next rerun can try again
+        if not task.cancelled() and task.exception() is not None:
+            current = self._tasks.get(session_id)
+            if current is not None and current[1] is task:
+                del self._tasks[session_id]
+
+    def _prune(self) -> None:
+        # Sessions that went away leave their finished prefetch behind; keep only the most recent
+        finished = [sid for sid, (_, task) in self._tasks.items() if task.done()]
+        for session_id in finished[:max(0, len(finished) - _MAX_FINISHED)]:
+            del self._tasks[session_id]
+
+    async def _prefetch(self, search_params: Dict[str, Any]) -> None:
+        await asyncio.sleep(self.debounce)
+        session = self.pool.shared_session()
+        if session is None:
+            return
+        self.started += 1
+        # The search caps result pages the same way, so it picks the same listings for details.
+        # This task runs in its own copy of the context, so the setting never leaks out.
+        current_limits.set(SearchLimits(max_results=search_params.get('max_results')))
+        # Calls go through the caching session stack, so their results land in the tool cache
+        raw_listings: list = []
+        cursor, pages = None, 0
+        while wants_another_page(pages, cursor, raw_listings, search_params):
+            args = direct_search_arguments(search_params)
+            if cursor:
+                args['cursor'] = cursor
+            result = await session.call_tool('airbnb_search', args)
+            if getattr(result, 'isError', False):
+                return
+            page, cursor = parse_search_page(tool_text(result))
+            raw_listings.extend(page)
+            pages += 1
+        candidates = detail_candidates(direct_candidates(raw_listings, search_params), search_params)
+        await fetch_listing_details(self.pool.tool_sessions() or [session], [h.id for h in candidates if h.id],
+                                    direct_search_arguments(search_params))
+        self.completed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {'started': self.started, 'completed': self.completed, 'cancelled': self.cancelled,
+                'pending': sum(1 for _, task in self._tasks.values() if not task.done())}
@@ -0,0 +1,255 @@
+import asyncio
+import os
+import random
+import re
+import time
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from search_limits import current_limits
+from session_proxy import SessionProxy
+
+# Starting and largest concurrency per upstream (overridable through .env)
+LLM_CONCURRENCY = float(os.getenv("HOTEL_LLM_CONCURRENCY", "8"))
+AIRBNB_CONCURRENCY = float(os.getenv("HOTEL_AIRBNB_CONCURRENCY", "10"))
+MAX_CONCURRENCY = float(os.getenv("HOTEL_MAX_CONCURRENCY", "32"))
+# Retries of rate-limited and failed upstream calls
+MAX_RETRIES = int(os.getenv("HOTEL_RETRY_MAX", "3"))
+BACKOFF_BASE = float(os.getenv("HOTEL_BACKOFF_BASE", "0.5"))
+BACKOFF_MAX = float(os.getenv("HOTEL_BACKOFF_MAX", "8"))
+
+# Halve the limit at most once per this many seconds, however many calls are throttled at once
+_DECREASE_COOLDOWN = 1.0
+_STATUS_RE = re.compile(r"\b(429|50[0-4])\b|rate limit|too many requests", re.IGNORECASE)
+_RETRY_AFTER_RE = re.compile(r"retry[- ]after\D{0,3}(\d+(?:\.\d+)?)", re.IGNORECASE)
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit for one upstream service.
+
+    Calls beyond the current limit wait in a queue. Each successful call
+    raises the limit by ``1/limit`` (about one per round of calls), and a
+    rate-limited call halves it, so the limit settles just under what the
+    upstream accepts.
+    """
+
+    def __init__(self, name: str, initial_limit: float, min_limit: float = 1, max_limit: float = MAX_CONCURRENCY):
+        self.name = name
+        self.limit = initial_limit
+        self.min_limit = min_limit
+        self.max_limit = max(max_limit, initial_limit)
+        self.in_flight = 0
+        self.queued = 0
+        self.throttled = 0
+        self.retries = 0
+        self._last_decrease = 0.0
+        self._cond: Optional[asyncio.Condition] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _condition(self) -> asyncio.Condition:
+        # Limiters are shared per process; a condition belongs to one event loop
+        loop = asyncio.get_running_loop()
+        if self._cond is None or self._loop is not loop:
+            self._cond, self._loop = asyncio.Condition(), loop
+        return self._cond
+
+    @asynccontextmanager
+    async def slot(self):
+        cond = self._condition()
+        async with cond:
+            self.queued += 1
+            try:
+                await cond.wait_for(lambda: self.in_flight < max(1, int(self.limit)))
+            finally:
+                self.queued -= 1
+            self.in_flight += 1
+        try:
+            yield
+        finally:
+            async with cond:
+                self.in_flight -= 1
+                cond.notify_all()
+
+    def on_success(self) -> None:
+        self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    def on_throttle(self) -> None:
+        self.throttled += 1
+        now = time.monotonic()
+        if now - self._last_decrease >= _DECREASE_COOLDOWN:
+            self.limit = max(self.min_limit, self.limit / 2)
+            self._last_decrease = now
+
+    def stats(self) -> Dict[str, Any]:
+        return {'name': self.name, 'limit': round(self.limit, 1), 'in_flight': self.in_flight,
+                'queued': self.queued, 'throttled': self.throttled, 'retries': self.retries}
+
+
+_limiters: Dict[str, AdaptiveLimiter] = {}
+
+
+def get_limiter(name: str, initial_limit: float) -> AdaptiveLimiter:
+    """The process-wide limiter for an upstream, created on first use."""
+    if name not in _limiters:
+        _limiters[name] = AdaptiveLimiter(name, initial_limit)
+    return _limiters[name]
+
+
+def limiter_stats() -> list:
+    return [limiter.stats() for limiter in _limiters.values()]
+
+
+def parse_retry_after(value: Any) -> Optional[float]:
+    """Seconds to wait from a Retry-After header, given in seconds or as an HTTP date."""
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(str(value)).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _error_response(error: BaseException) -> Any:
+    # agno wraps the HTTP client's error in ``ModelProviderError``; the response is on the cause
+    return getattr(error, 'response', None) or getattr(error.__cause__, 'response', None)
+
+
+def error_status(error: BaseException) -> Optional[int]:
+    """HTTP status an upstream exception carries, on itself or on its response."""
+    status = getattr(error, 'status_code', None)
+    if status is None:
+        status = getattr(_error_response(error), 'status_code', None)
+    return status if isinstance(status, int) else None
+
+
+def classify_error(error: BaseException) -> Tuple[bool, Optional[float]]:
+    """Whether an upstream exception is worth retrying, and any Retry-After it carried.
+
+    Rate limits and server errors are retried. agno wraps the HTTP client's
+    error in ``ModelProviderError``, so headers are looked up on the cause.
+    """
+    if isinstance(error, asyncio.TimeoutError):
+        return False, None
+    status = error_status(error)
+    headers = getattr(_error_response(error), 'headers', None) or {}
+    retry_after = parse_retry_after(headers.get('retry-after'))
+    if retry_after is None and headers.get('retry-after-ms') is not None:
+        retry_after = (parse_retry_after(headers.get('retry-after-ms')) or 0) / 1000
+    if status is not None:
+        return status == 429 or 500 <= status <= 504, retry_after
+    return bool(_STATUS_RE.search(str(error))), retry_after
+
+
+def classify_tool_result(result: Any) -> Tuple[bool, Optional[float]]:
+    """Tool errors come back as results; retry those that report a rate limit or server error."""
+    if not getattr(result, 'isError', False):
+        return False, None
+    text = " ".join(getattr(item, 'text', '') or '' for item in getattr(result, 'content', []))
+    if not _STATUS_RE.search(text):
+        return False, None
+    retry_after = _RETRY_AFTER_RE.search(text)
+    return True, float(retry_after.group(1)) if retry_after else None
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """Full-jitter exponential backoff, never shorter than the upstream's Retry-After."""
+    delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+    return max(delay, retry_after) if retry_after is not None else delay
+
+
+def _fits_deadline(delay: float) -> bool:
+    limits = current_limits.get()
+    return limits is None or limits.deadline is None or delay < limits.deadline.remaining()
+
+
+async def call_with_backoff(limiter: AdaptiveLimiter, call: Callable[[], Awaitable[Any]],
+                            classify_result: Callable[[Any], Tuple[bool, Optional[float]]] = lambda _: (False, None),
+                            max_retries: int = MAX_RETRIES) -> Any:
+    """Run ``call`` under the limiter, retrying throttled attempts with backoff.
+
+    Retries stop early rather than sleep past the current search's deadline;
+    the last error (or error result) is then returned to the caller as is.
+    """
+    attempt = 0
+    while True:
+        error, result = None, None
+        async with limiter.slot():
+            try:
+                result = await call()
+            except Exception as e:
+                error = e
+        retryable, retry_after = classify_error(error) if error is not None else classify_result(result)
+        if not retryable:
+            if error is not None:
+                raise error
+            limiter.on_success()
+            return result
+        limiter.on_throttle()
+        delay = backoff_delay(attempt, retry_after)
+        if attempt >= max_retries or not _fits_deadline(delay):
+            if error is not None:
+                raise error
+            return result
+        limiter.retries += 1
+        attempt += 1
+        await asyncio.sleep(delay)
+
+
+class RateLimitedSession(SessionProxy):
+    """Sends MCP tool calls through the upstream's adaptive limiter, with retries."""
+
+    def __init__(self, inner: Any, limiter: AdaptiveLimiter):
+        super().__init__(inner)
+        self.limiter = limiter
+
+    async def call_tool(self, name: str, arguments: Optional[Dict[str, Any]] = None, *args, **kwargs) -> Any:
+        return await call_with_backoff(self.limiter, lambda: self.inner.call_tool(name, arguments, *args, **kwargs),
+                                       classify_tool_result)
+
+
+def rate_limit_model(model: Any, limiter: Optional[AdaptiveLimiter] = None, max_retries: int = MAX_RETRIES) -> Any:
+    """Wrap an agno model's async invoke methods with its provider's limiter and retries.
+
+    A streamed response is only retried if it failed before its first chunk.
+    """
+    if getattr(model, '_rate_limited', False):
+        return model
+    limiter = limiter or get_limiter(f"llm:{getattr(model, 'provider', None) or type(model).__name__}", LLM_CONCURRENCY)
+    original_ainvoke = model.ainvoke
+    original_ainvoke_stream = model.ainvoke_stream
+
+    async def ainvoke(*args, **kwargs):
+        return await call_with_backoff(limiter, lambda: original_ainvoke(*args, **kwargs), max_retries=max_retries)
+
+    async def ainvoke_stream(*args, **kwargs):
+        attempt = 0
+        while True:
+            started = False
+            try:
+                async with limiter.slot():
+                    async for delta in original_ainvoke_stream(*args, **kwargs):
+                        started = True
+                        yield delta
+                limiter.on_success()
+                return
+            except Exception as e:
+                retryable, retry_after = classify_error(e)
+                if started or not retryable:
+                    raise
+                limiter.on_throttle()
+                delay = backoff_delay(attempt, retry_after)
+                if attempt >= max_retries or not _fits_deadline(delay):
+                    raise
+                limiter.retries += 1
+                attempt += 1
+                await asyncio.sleep(delay)
+
+    model.ainvoke = ainvoke
+    model.ainvoke_stream = ainvoke_stream
+    model._rate_limited = True
+    return model
@@ -0,0 +1,132 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any
+
+# Cache sizing and expiry settings (overridable through .env)
+DEFAULT_MAX_ENTRIES = int(os.getenv("HOTEL_RESULT_CACHE_SIZE", "128"))
+DEFAULT_TTL = float(os.getenv("HOTEL_RESULT_CACHE_TTL", "3600"))
+DATED_TTL = float(os.getenv("HOTEL_RESULT_CACHE_DATED_TTL", "600"))
+DEFAULT_DB_PATH = os.getenv("HOTEL_RESULT_CACHE_DB") or None
+
+# Parameters that change how a search runs but not what it returns
+NON_SEMANTIC_PARAMS = {'timeout', 'ignoreRobotsText'}
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, str):
+        return " ".join(value.split()).casefold()
+    if isinstance(value, float):
+        return round(value, 2)
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items() if v is not None}
+    if isinstance(value, (list, tuple, set)):
+        return sorted(_normalize(v) for v in value)
+    return value
+
+
+def canonical_search_key(query: str, search_params: Dict[str, Any]) -> str:
+    """Build a stable cache key from a query and its ``search_parameters`` dict.
+
+    Whitespace and case differences, amenity ordering and settings that do
+    not affect the answer (such as the request timeout) are ignored. A
+    gazetteer ``location_id`` stands in for the location as typed.
+    """
+    params = {k: v for k, v in search_params.items() if k not in NON_SEMANTIC_PARAMS}
+    if params.get('location_id'):
+        params.pop('location', None)
+    canonical = json.dumps({'query': _normalize(query), 'params': _normalize(params)},
+                           sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def ttl_for_params(search_params: Dict[str, Any]) -> float:
+    """Date-specific searches go stale quickly as availability changes."""
+    if search_params.get('checkin') or search_params.get('checkout'):
+        return DATED_TTL
+    return DEFAULT_TTL
+
+
+class SearchResultCache:
+    """Two-tier cache of finished search results.
+
+    An in-memory LRU tier answers repeated searches instantly; an optional
+    SQLite tier keeps results across app restarts. Every entry carries its
+    own expiry time.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, db_path: Optional[str] = DEFAULT_DB_PATH):
+        self.max_entries = max(1, max_entries)
+        self.db_path = db_path
+        self.hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[str, tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS search_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._memory[key]
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM search_cache WHERE key = ? AND expires_at > ?", (key, now)
+                ).fetchone()
+                if row is not None:
+                    value = json.loads(row[0])
+                    self._remember(key, row[1], value)
+                    self.hits += 1
+                    return value
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: Dict[str, Any], ttl: float = DEFAULT_TTL) -> None:
+        expires_at = time.time() + ttl
+        with self._lock:
+            self._remember(key, expires_at, value)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO search_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value, default=str), expires_at),
+                )
+                self._db.execute("DELETE FROM search_cache WHERE expires_at <= ?", (time.time(),))
+                self._db.commit()
+
+    def _remember(self, key: str, expires_at: float, value: Dict[str, Any]) -> None:
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM search_cache")
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'entries': len(self._memory),
+        }
@@ -0,0 +1,91 @@
+import asyncio
+from typing import Any, AsyncIterator, Dict, Optional
+
+from hotel_agent import is_error_result, stream_hotel_agent
+from mcp_pool import MCPServerPool
+from singleflight import SingleFlight
+from tracing import Trace, current_trace, span
+
+_EVENTS_END = object()
+
+
+class SearchCoalescer:
+    """Shares one agent run between identical searches that overlap in time.
+
+    Searches are keyed like the result cache, by the normalized query and
+    parameters. The first search for a key runs the agent and streams its
+    events as usual; searches arriving while it is in flight wait for the
+    same run and receive its final answer. The shared run lives in its own
+    task, so it keeps going for the others if its first caller goes away.
+    A failed run is never shared: its error may belong to the leader's API
+    key (authentication, rate limits), so each follower then runs its own search.
+    """
+
+    def __init__(self):
+        self._flight = SingleFlight()
+
+    @property
+    def coalesced(self) -> int:
+        return self._flight.coalesced
+
+    def in_flight(self) -> int:
+        return self._flight.in_flight()
+
+    async def stream(self, key: str, message: str, search_params: Dict[str, Any] = None, *,
+                     pool: MCPServerPool, api_key: Optional[str] = None, model=None,
+                     trace: Optional[Trace] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Coalescing counterpart of ``stream_hotel_agent``.
+
+        Searches that join a run in flight get a ``coalesced`` event, then the
+        shared answer as one ``token`` event. If the shared run failed they
+        get their own run's events instead.
+        """
+        events: "asyncio.Queue" = asyncio.Queue()
+
+        async def lead() -> str:
+            parts, error = [], None
+            try:
+                async for event in stream_hotel_agent(message, search_params, pool=pool, api_key=api_key,
+                                                      model=model, trace=trace):
+                    events.put_nowait(event)
+                    if event['event'] in ('token', 'deadline_exceeded'):
+                        parts.append(event['content'])
+                    elif event['event'] == 'error':
+                        error = event['content']
+            finally:
+                events.put_nowait(_EVENTS_END)
+            return error or "".join(parts)
+
+        task, leader = self._flight.start(key, lead)
+        if leader:
+            while (event := await events.get()) is not _EVENTS_END:
+                yield event
+            return
+
+        yield {'event': 'coalesced'}
+        token = current_trace.set(trace)
+        try:
+            with span('coalesced'):
+                result = await asyncio.shield(task)
+        finally:
+            current_trace.reset(token)
+        if not is_error_result(result):
+            yield {'event': 'token', 'content': result}
+            return
+        # The leader's failure may be specific to its key; try again with ours
+        async for event in stream_hotel_agent(message, search_params, pool=pool, api_key=api_key,
+                                              model=model, trace=trace):
+            yield event
+
+    async def run(self, key: str, message: str, search_params: Dict[str, Any] = None, *,
+                  pool: MCPServerPool, api_key: Optional[str] = None, model=None,
+                  trace: Optional[Trace] = None) -> str:
+        """Coalescing counterpart of ``run_hotel_agent``."""
+        parts, error = [], None
+        async for event in self.stream(key, message, search_params, pool=pool, api_key=api_key,
+                                       model=model, trace=trace):
+            if event['event'] in ('token', 'deadline_exceeded'):
+                parts.append(event['content'])
+            elif event['event'] == 'error':
+                error = event['content']
+        return error or "".join(parts)
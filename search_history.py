@@ -0,0 +1,140 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+# Where past searches are kept; set to an empty string to disable (overridable through .env)
+DEFAULT_DB_PATH = os.getenv(
+    "HOTEL_HISTORY_DB", os.path.join(os.path.expanduser("~"), ".cache", "hotel-finder", "history.sqlite3"))
+# Retention: searches older than this many days, or beyond this many, are deleted
+MAX_AGE_DAYS = float(os.getenv("HOTEL_HISTORY_MAX_AGE_DAYS", "30"))
+MAX_ENTRIES = int(os.getenv("HOTEL_HISTORY_MAX_ENTRIES", "1000"))
+
+_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS searches ("
+    "id INTEGER PRIMARY KEY, created_at REAL NOT NULL, query TEXT NOT NULL, mode TEXT, location TEXT, "
+    "checkin TEXT, parameters TEXT NOT NULL, result TEXT NOT NULL, timings TEXT)",
+    "CREATE INDEX IF NOT EXISTS searches_created_at ON searches (created_at)",
+    "CREATE INDEX IF NOT EXISTS searches_location ON searches (location COLLATE NOCASE, created_at)",
+    "CREATE INDEX IF NOT EXISTS searches_checkin ON searches (checkin)",
+    # Full-text index over the query and answer, kept in step with the table by triggers
+    "CREATE VIRTUAL TABLE IF NOT EXISTS searches_fts USING fts5("
+    "query, location, result, content='searches', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS searches_ai AFTER INSERT ON searches BEGIN "
+    "INSERT INTO searches_fts (rowid, query, location, result) VALUES (new.id, new.query, new.location, new.result); END",
+    "CREATE TRIGGER IF NOT EXISTS searches_ad AFTER DELETE ON searches BEGIN "
+    "INSERT INTO searches_fts (searches_fts, rowid, query, location, result) "
+    "VALUES ('delete', old.id, old.query, old.location, old.result); END",
+]
+_SUMMARY_COLUMNS = "id, created_at, query, mode, location, checkin"
+
+
+def fts_query(text: str) -> Optional[str]:
+    """An FTS5 expression matching every word of ``text`` as a prefix, or None if it has no words."""
+    words = re.findall(r"\w+", text)
+    return " ".join(f'"{word}"*' for word in words) or None
+
+
+def _summary(row: tuple) -> Dict[str, Any]:
+    return dict(zip(('id', 'created_at', 'query', 'mode', 'location', 'checkin'), row))
+
+
+class SearchHistory:
+    """Past searches with their parameters, timings and answers, in SQLite.
+
+    Answers are indexed with FTS5 so any past search can be found by the
+    words in its query or results, and re-opened without a new agent run.
+    Old entries are pruned on every write, and freed pages are returned to
+    the file system, so the database stays within the retention limits.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, max_age_days: float = MAX_AGE_DAYS,
+                 max_entries: int = MAX_ENTRIES):
+        self.db_path = db_path
+        self.max_age_days = max_age_days
+        self.max_entries = max(1, max_entries)
+        self._lock = threading.Lock()
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        # Only takes effect on a new database, before any table exists
+        self._db.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        self._db.execute("PRAGMA journal_mode = WAL")
+        for statement in _SCHEMA:
+            self._db.execute(statement)
+        self._db.commit()
+
+    def add(self, query: str, search_params: Dict[str, Any], result: str,
+            timings: Optional[List[Dict[str, Any]]] = None, created_at: Optional[float] = None) -> int:
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO searches (created_at, query, mode, location, checkin, parameters, result, timings) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (created_at or time.time(), query, search_params.get('search_mode'),
+                 (search_params.get('location') or "").strip() or None, search_params.get('checkin'),
+                 json.dumps(search_params, default=str), result,
+                 json.dumps(timings) if timings is not None else None),
+            )
+            self._prune()
+            self._db.commit()
+            return cursor.lastrowid
+
+    def _prune(self) -> None:
+        deleted = self._db.execute("DELETE FROM searches WHERE created_at < ?",
+                                   (time.time() - self.max_age_days * 86400,)).rowcount
+        deleted += self._db.execute(
+            "DELETE FROM searches WHERE id NOT IN (SELECT id FROM searches ORDER BY created_at DESC LIMIT ?)",
+            (self.max_entries,)).rowcount
+        if deleted:
+            self._db.execute("PRAGMA incremental_vacuum").fetchall()
+
+    def recent(self, limit: int = 20, location: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Newest searches first, optionally only those for one location."""
+        with self._lock:
+            if location:
+                rows = self._db.execute(
+                    f"SELECT {_SUMMARY_COLUMNS} FROM searches WHERE location = ? COLLATE NOCASE "
+                    "ORDER BY created_at DESC LIMIT ?", (location.strip(), limit)).fetchall()
+            else:
+                rows = self._db.execute(
+                    f"SELECT {_SUMMARY_COLUMNS} FROM searches ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+        return [_summary(row) for row in rows]
+
+    def search(self, text: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """Searches whose query, location or answer contain every word of ``text``, best match first."""
+        expression = fts_query(text)
+        if expression is None:
+            return self.recent(limit)
+        columns = ", ".join(f"s.{c.strip()}" for c in _SUMMARY_COLUMNS.split(","))
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT {columns}, snippet(searches_fts, 2, '«', '»', '…', 12) FROM searches_fts "
+                "JOIN searches s ON s.id = searches_fts.rowid WHERE searches_fts MATCH ? "
+                "ORDER BY bm25(searches_fts) LIMIT ?", (expression, limit)).fetchall()
+        return [{**_summary(row[:-1]), 'snippet': row[-1]} for row in rows]
+
+    def get(self, entry_id: int) -> Optional[Dict[str, Any]]:
+        """One past search in full, ready to show again."""
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT {_SUMMARY_COLUMNS}, parameters, result, timings FROM searches WHERE id = ?",
+                (entry_id,)).fetchone()
+        if row is None:
+            return None
+        entry = _summary(row[:6])
+        entry.update(parameters=json.loads(row[6]), result=row[7], timings=json.loads(row[8]) if row[8] else None)
+        return entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM searches")
+            self._db.execute("PRAGMA incremental_vacuum").fetchall()
+            self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM searches").fetchone()[0]
+        return {'entries': entries, 'max_entries': self.max_entries, 'max_age_days': self.max_age_days}
@@ -0,0 +1,128 @@
+import asyncio
+import contextvars
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from circuit_breaker import CircuitOpenError
+from session_proxy import SessionProxy
+
+# Largest share of the overall budget each phase may use. LLM generation gets
+# whatever is left once the earlier phases are done.
+PHASE_SHARES = {
+    'acquire': float(os.getenv("HOTEL_BUDGET_ACQUIRE_SHARE", "0.2")),
+    'initialize': float(os.getenv("HOTEL_BUDGET_INITIALIZE_SHARE", "0.3")),
+    'tool_call': float(os.getenv("HOTEL_BUDGET_TOOL_CALL_SHARE", "0.4")),
+}
+
+
+class Deadline:
+    """One end-to-end time budget for a search, split across its phases."""
+
+    def __init__(self, budget: float):
+        self.budget = budget
+        self.expires_at = time.monotonic() + budget
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def phase_timeout(self, phase: str) -> float:
+        """Timeout for one phase: its share of the budget, never past the deadline."""
+        return min(self.remaining(), self.budget * PHASE_SHARES.get(phase, 1.0))
+
+
+class SearchLimits:
+    """Per-search limits shared with the session layer through a context variable.
+
+    Tool calls made by the agent run in the search's context, so the session
+    proxies can see the deadline and result cap without any plumbing through
+    agno. Listings returned by tools are also kept here as the best partial
+    result, should the deadline expire before the model has answered.
+    A tool call that timed out or hit an open circuit is recorded in
+    ``tool_error``: the agent framework hands tool exceptions to the model
+    as text, so the search checks it to stop rather than let the model
+    answer without the data.
+    """
+
+    def __init__(self, timeout: Optional[float] = None, max_results: Optional[int] = None):
+        self.deadline = Deadline(timeout) if timeout else None
+        self.max_results = max_results
+        self.listings: List[Dict[str, Any]] = []
+        self.tool_error: Optional[BaseException] = None
+
+
+current_limits: contextvars.ContextVar[Optional[SearchLimits]] = contextvars.ContextVar('current_limits', default=None)
+
+
+def cap_search_results(text: str, max_results: Optional[int]) -> tuple[str, List[Dict[str, Any]]]:
+    """Trim an ``airbnb_search`` JSON payload to its first ``max_results`` listings."""
+    try:
+        payload = json.loads(text)
+    except ValueError:
+        return text, []
+    listings = payload.get('searchResults') if isinstance(payload, dict) else None
+    if not isinstance(listings, list):
+        return text, []
+    payload['searchResults'] = listings[:max_results]
+    return json.dumps(payload), payload['searchResults']
+
+
+class LimitedSession(SessionProxy):
+    """Applies the current search's deadline and ``max_results`` cap to tool calls."""
+
+    async def call_tool(self, name: str, arguments: Optional[Dict[str, Any]] = None, *args, **kwargs) -> Any:
+        limits = current_limits.get()
+        if limits is None:
+            return await self.inner.call_tool(name, arguments, *args, **kwargs)
+        call = self.inner.call_tool(name, arguments, *args, **kwargs)
+        try:
+            if limits.deadline is not None:
+                result = await asyncio.wait_for(call, limits.deadline.phase_timeout('tool_call'))
+            else:
+                result = await call
+        except (CircuitOpenError, asyncio.TimeoutError) as e:
+            limits.tool_error = limits.tool_error or e
+            raise
+        if name == 'airbnb_search' and not getattr(result, 'isError', False):
+            result = self._cap(result, limits)
+        return result
+
+    @staticmethod
+    def _cap(result: Any, limits: SearchLimits) -> Any:
+        # Results may be shared through the tool cache, so copy rather than mutate
+        content = []
+        for item in result.content:
+            text = getattr(item, 'text', None)
+            if text is not None:
+                capped, listings = cap_search_results(text, limits.max_results)
+                limits.listings = listings or limits.listings
+                item = item.model_copy(update={'text': capped})
+            content.append(item)
+        return result.model_copy(update={'content': content})
+
+
+def _listing_name(listing: Dict[str, Any]) -> str:
+    name = listing.get('demandStayListing', {}).get('description', {}).get('name', {})
+    return name.get('localizedStringWithTranslationPreference') or listing.get('name') or f"Listing {listing.get('id', '')}"
+
+
+def partial_listings_markdown(listings: List[Dict[str, Any]]) -> str:
+    """Plain markdown of raw Airbnb listings, used when no model answer is available."""
+    lines = ["## 🏨 Hotels Found So Far"]
+    for listing in listings:
+        lines.append(f"**🏨 {_listing_name(listing)}**")
+        rating = listing.get('avgRatingA11yLabel')
+        if rating:
+            lines.append(f"- ⭐ **Rating:** {rating}")
+        price = listing.get('structuredDisplayPrice', {}).get('primaryLine', {}).get('accessibilityLabel')
+        if price:
+            lines.append(f"- 💰 **Price:** {price}")
+        if listing.get('url'):
+            lines.append(f"- 🔗 **Book Now:** {listing['url']}")
+        lines.append("---")
+    return "\n".join(lines)
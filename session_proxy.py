@@ -0,0 +1,17 @@
+from typing import Any
+
+
+class SessionProxy:
+    """Base class for wrappers around an MCP ``ClientSession``.
+
+    Subclasses override the session methods they care about (usually
+    ``call_tool``) and everything else is delegated to the wrapped session,
+    so a proxy can be handed to ``MCPTools(session=...)`` in place of the
+    real session. Proxies can be stacked.
+    """
+
+    def __init__(self, inner: Any):
+        self.inner = inner
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.inner, name)
@@ -0,0 +1,38 @@
+import asyncio
+import sys
+import time
+
+from mcp import StdioServerParameters
+
+from benchmarks.fake_model import FakeHotelModel
+from benchmarks.run_benchmarks import STUB_SERVER
+from circuit_breaker import CircuitBreaker
+from hotel_agent import build_quick_query, is_cacheable_result, run_hotel_agent
+from mcp_pool import MCPServerPool
+from result_cache import SearchResultCache, canonical_search_key, ttl_for_params
+
+
+def test_agent_search_with_open_circuit_is_not_cached():
+    params = {'search_mode': 'Quick Search', 'location': 'Goa, India', 'search_type': 'Find Hotels',
+              'max_results': 5, 'timeout': 60, 'output_format': 'markdown'}
+    query = build_quick_query(params['location'], params['search_type'])
+    cache = SearchResultCache(db_path=None)
+
+    async def search() -> str:
+        pool = MCPServerPool(StdioServerParameters(command=sys.executable, args=[STUB_SERVER]), size=1,
+                             breaker=CircuitBreaker("test:airbnb"))
+        try:
+            await pool.start()
+            # Open the circuit as repeated upstream failures would
+            pool.breaker._opened_at = time.monotonic()
+            return await run_hotel_agent(query, params, pool=pool, model=FakeHotelModel())
+        finally:
+            await pool.close()
+
+    result = asyncio.run(search())
+    # The app and the batch runner cache only results that pass this check
+    if is_cacheable_result(result):
+        cache.set(canonical_search_key(query, params), {'result': result}, ttl_for_params(params))
+
+    assert result.startswith("🔌 **Service Unavailable**")
+    assert cache.get(canonical_search_key(query, params)) is None
@@ -0,0 +1,91 @@
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from session_proxy import SessionProxy
+from singleflight import SingleFlight
+
+# Per-tool freshness policy in seconds; tools not listed here are never cached
+TOOL_TTLS = {
+    'airbnb_search': float(os.getenv("MCP_TOOL_CACHE_SEARCH_TTL", "600")),
+    'airbnb_listing_details': float(os.getenv("MCP_TOOL_CACHE_DETAILS_TTL", "3600")),
+}
+DEFAULT_MAX_ENTRIES = int(os.getenv("MCP_TOOL_CACHE_SIZE", "512"))
+
+
+def tool_call_key(name: str, arguments: Optional[Dict[str, Any]]) -> str:
+    return name + ":" + json.dumps(arguments or {}, sort_keys=True, separators=(",", ":"), default=str)
+
+
+class ToolCallCache:
+    """Memoizes MCP tool results by tool name and canonical JSON arguments.
+
+    Lives on the shared event loop and is shared by every pooled server, so
+    repeated calls within one agent run and across runs skip the MCP server.
+    Identical calls that overlap in time are collapsed into one request.
+    """
+
+    def __init__(self, ttls: Optional[Dict[str, float]] = None, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.ttls = dict(TOOL_TTLS if ttls is None else ttls)
+        self.max_entries = max(1, max_entries)
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        self._flight = SingleFlight()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def put(self, key: str, name: str, result: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttls[name], result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def call(self, name: str, arguments: Optional[Dict[str, Any]],
+                   fetch: Callable[[], Awaitable[Any]]) -> Any:
+        if self.ttls.get(name, 0) <= 0:
+            return await fetch()
+        key = tool_call_key(name, arguments)
+        cached = self.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        self.misses += 1
+
+        async def fetch_and_store():
+            result = await fetch()
+            # Tool errors are returned, not raised; never memoize them
+            if not getattr(result, 'isError', False):
+                self.put(key, name, result)
+            return result
+
+        return await self._flight.do(key, fetch_and_store)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self._flight.coalesced,
+            'entries': len(self._entries),
+        }
+
+
+class CachingSession(SessionProxy):
+    """Routes ``call_tool`` through a shared ToolCallCache."""
+
+    def __init__(self, inner: Any, cache: ToolCallCache):
+        super().__init__(inner)
+        self.cache = cache
+
+    async def call_tool(self, name: str, arguments: Optional[Dict[str, Any]] = None, *args, **kwargs) -> Any:
+        return await self.cache.call(name, arguments, lambda: self.inner.call_tool(name, arguments, *args, **kwargs))
@@ -0,0 +1,152 @@
+import contextvars
+import json
+import os
+import re
+from typing import Any, Dict, List, Optional
+
+from hotel_rendering import HotelListing
+from listings import listing_details_fields, listing_from_search
+from session_proxy import SessionProxy
+from tracing import span
+
+# Tool results are compacted before the agent sees them unless disabled (overridable through .env)
+COMPACTION_ENABLED = os.getenv("HOTEL_TOOL_COMPACTION", "1").lower() in ("1", "true", "yes")
+# Most tokens one tool result may take in the model's context; 0 for no budget
+RESULT_TOKEN_BUDGET = int(os.getenv("HOTEL_TOOL_RESULT_TOKENS", "2000"))
+
+_LINK_ID_RE = re.compile(r"/rooms/(\d+)")
+
+
+def estimate_tokens(text: str) -> int:
+    # About four characters per token for English prose and JSON
+    return (len(text) + 3) // 4
+
+
+def _dumps(payload: Dict[str, Any]) -> str:
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False)
+
+
+class ToolResultCompactor:
+    """Shrinks one search's Airbnb tool results before they enter the model's context.
+
+    Search listings are projected to the fields the response templates use,
+    deduplicated across the pages of one query and cut to ``max_results``; listing details
+    are reduced to amenities, location and cancellation. Each result is then
+    fit into ``token_budget`` by dropping trailing entries. The full
+    listings and details stay here, by listing ID, for rendering locally.
+    """
+
+    def __init__(self, max_results: Optional[int] = None, token_budget: int = RESULT_TOKEN_BUDGET):
+        self.max_results = max_results
+        self.token_budget = token_budget
+        self.listings: Dict[str, Dict[str, Any]] = {}
+        self.details: Dict[str, Dict[str, Any]] = {}
+        # Listing IDs the model has seen, per search query (its arguments without the page cursor)
+        self._sent: Dict[str, set] = {}
+
+    def compact(self, name: str, arguments: Optional[Dict[str, Any]], text: str) -> str:
+        if name == 'airbnb_search':
+            # A search with other dates or guests has other prices, so only its own earlier pages dedupe
+            query = json.dumps({k: v for k, v in (arguments or {}).items() if k != 'cursor'},
+                               sort_keys=True, default=str)
+            sent = self._sent.setdefault(query, set())
+            payload = self._search(text, sent)
+            if payload is not None:
+                compacted = self.fit(payload)
+                # Only listings that survived the budget count as seen by the model
+                sent.update(listing['id'] for listing in payload['searchResults'])
+                return compacted
+        elif name == 'airbnb_listing_details':
+            payload = self._details(str((arguments or {}).get('id', "")), text)
+        else:
+            payload = None
+        return self.fit(payload) if payload is not None else self._truncate(text)
+
+    def _search(self, text: str, sent: set) -> Optional[Dict[str, Any]]:
+        try:
+            raw = json.loads(text)
+        except ValueError:
+            return None
+        if not isinstance(raw, dict) or not isinstance(raw.get('searchResults'), list):
+            return None
+        listings = []
+        for listing in raw['searchResults']:
+            listing_id = str(listing.get('id')) if isinstance(listing, dict) and listing.get('id') is not None else None
+            # Listings already sent on an earlier page add nothing for the model
+            if listing_id is None or listing_id in sent or any(l['id'] == listing_id for l in listings):
+                continue
+            self.listings[listing_id] = listing
+            listings.append(listing_from_search(listing).model_dump(exclude_none=True, exclude={'amenities'}))
+        payload: Dict[str, Any] = {'searchResults': listings[:self.max_results]}
+        cursor = (raw.get('paginationInfo') or {}).get('nextPageCursor')
+        if cursor:
+            payload['nextPageCursor'] = cursor
+        return payload
+
+    def _details(self, listing_id: str, text: str) -> Optional[Dict[str, Any]]:
+        fields = listing_details_fields(text)
+        if fields is None:
+            return None
+        self.details[listing_id] = fields
+        return {'id': listing_id, **fields}
+
+    def fit(self, payload: Dict[str, Any]) -> str:
+        """``payload`` as JSON within the token budget, dropping trailing list entries if needed."""
+        text = _dumps(payload)
+        lists = [key for key, value in payload.items() if isinstance(value, list)]
+        omitted = 0
+        while self.token_budget and estimate_tokens(text) > self.token_budget and any(payload[k] for k in lists):
+            longest = max(lists, key=lambda k: len(payload[k]))
+            payload[longest] = payload[longest][:-1]
+            omitted += 1
+            payload['omitted'] = omitted
+            text = _dumps(payload)
+        return self._truncate(text)
+
+    def _truncate(self, text: str) -> str:
+        if not self.token_budget or estimate_tokens(text) <= self.token_budget:
+            return text
+        return text[:self.token_budget * 4] + " …[truncated]"
+
+    def enrich(self, hotels: List[HotelListing]) -> List[HotelListing]:
+        """Fill fields the model left out of its answer from the full tool results kept here."""
+        enriched = []
+        for hotel in hotels:
+            listing_id = hotel.id
+            if listing_id is None and hotel.link:
+                match = _LINK_ID_RE.search(hotel.link)
+                listing_id = match.group(1) if match else None
+            known: Dict[str, Any] = {}
+            if listing_id in self.listings:
+                known.update(listing_from_search(self.listings[listing_id]).model_dump(exclude_none=True))
+            known.update(self.details.get(listing_id, {}))
+            missing = {k: v for k, v in known.items() if getattr(hotel, k, None) in (None, [], "")}
+            enriched.append(hotel.model_copy(update=missing) if missing else hotel)
+        return enriched
+
+
+current_compactor: contextvars.ContextVar[Optional[ToolResultCompactor]] = contextvars.ContextVar(
+    'current_compactor', default=None)
+
+
+class CompactingSession(SessionProxy):
+    """Compacts tool results for the agent when the current search has a compactor."""
+
+    async def call_tool(self, name: str, arguments: Optional[Dict[str, Any]] = None, *args, **kwargs) -> Any:
+        result = await self.inner.call_tool(name, arguments, *args, **kwargs)
+        compactor = current_compactor.get()
+        if compactor is None or getattr(result, 'isError', False):
+            return result
+        with span('compact', tool=name) as record:
+            # Results may be shared through the tool cache, so copy rather than mutate
+            content, raw_tokens, tokens = [], 0, 0
+            for item in result.content:
+                text = getattr(item, 'text', None)
+                if text is not None:
+                    compacted = compactor.compact(name, arguments, text)
+                    raw_tokens += estimate_tokens(text)
+                    tokens += estimate_tokens(compacted)
+                    item = item.model_copy(update={'text': compacted})
+                content.append(item)
+            record.update(raw_tokens=raw_tokens, tokens=tokens)
+        return result.model_copy(update={'content': content})
@@ -0,0 +1,129 @@
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Optional, Sequence
+
+from session_proxy import SessionProxy
+
+if TYPE_CHECKING:
+    from mcp.types import ListToolsResult
+
+# Where tool schemas are kept between runs; set to an empty string to disable
+SCHEMA_CACHE_DIR = os.getenv(
+    "MCP_SCHEMA_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "hotel-finder", "mcp-schemas"))
+
+
+def server_identity(command: str, args: Sequence[str], server_info: Any = None) -> str:
+    """Identify a server by how it is launched and the name and version it reports."""
+    identity = {
+        'command': command,
+        'args': list(args),
+        'name': getattr(server_info, 'name', None),
+        'version': getattr(server_info, 'version', None),
+    }
+    return hashlib.sha256(json.dumps(identity, sort_keys=True).encode()).hexdigest()
+
+
+def schema_hash(result: "ListToolsResult") -> str:
+    payload = result.model_dump(mode='json', exclude_none=True)
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+class ToolSchemaCache:
+    """``tools/list`` results stored on disk, one file per server identity.
+
+    Each file records the content hash of its schema, so a damaged or
+    hand-edited file is ignored rather than trusted.
+    """
+
+    def __init__(self, cache_dir: str = SCHEMA_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    def _path(self, identity: str) -> str:
+        return os.path.join(self.cache_dir, f"{identity}.json")
+
+    def load(self, identity: str) -> Optional[tuple["ListToolsResult", str]]:
+        from mcp.types import ListToolsResult
+
+        try:
+            with open(self._path(identity), encoding="utf-8") as f:
+                entry = json.load(f)
+            result = ListToolsResult.model_validate(entry['result'])
+        except (OSError, ValueError, KeyError):
+            return None
+        digest = schema_hash(result)
+        return (result, digest) if digest == entry.get('hash') else None
+
+    def save(self, identity: str, result: "ListToolsResult") -> str:
+        digest = schema_hash(result)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # Write then rename, so concurrent readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({'hash': digest, 'result': result.model_dump(mode='json', exclude_none=True)}, f)
+        os.replace(tmp_path, self._path(identity))
+        return digest
+
+    def stats(self) -> dict:
+        return {'hits': self.hits, 'misses': self.misses, 'refreshes': self.refreshes}
+
+
+class SchemaCachingSession(SessionProxy):
+    """Answers ``list_tools()`` from the on-disk schema cache.
+
+    On a cache hit the server is asked for its tools in the background, and
+    if the schema has changed the cache is updated and ``on_change`` is
+    awaited, so warm-up never waits on the extra round-trip.
+    """
+
+    def __init__(self, inner: Any, cache: ToolSchemaCache, identity: str,
+                 on_change: Optional[Callable[[], Awaitable[None]]] = None):
+        super().__init__(inner)
+        self.cache = cache
+        self.identity = identity
+        self.on_change = on_change
+        self._verify_task: Optional[asyncio.Task] = None
+
+    async def list_tools(self, *args, **kwargs) -> "ListToolsResult":
+        if args or kwargs.get('cursor'):
+            # Later pages are never cached
+            return await self.inner.list_tools(*args, **kwargs)
+        cached = self.cache.load(self.identity)
+        if cached is None:
+            self.cache.misses += 1
+            result = await self.inner.list_tools()
+            self._store(result)
+            return result
+        self.cache.hits += 1
+        result, digest = cached
+        if self._verify_task is None or self._verify_task.done():
+            self._verify_task = asyncio.ensure_future(self._verify(digest))
+        return result
+
+    async def _verify(self, cached_digest: str) -> None:
+        try:
+            fresh = await self.inner.list_tools()
+        except Exception:
+            # A broken server is the health check's business
+            return
+        if schema_hash(fresh) != cached_digest:
+            self._store(fresh)
+            self.cache.refreshes += 1
+            if self.on_change is not None:
+                await self.on_change()
+
+    def _store(self, result: "ListToolsResult") -> None:
+        try:
+            self.cache.save(self.identity, result)
+        except OSError:
+            # An unwritable cache directory only costs the next start-up a round-trip
+            pass
+
+    def close(self) -> None:
+        if self._verify_task is not None:
+            self._verify_task.cancel()
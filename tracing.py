@@ -0,0 +1,178 @@
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+from session_proxy import SessionProxy
+
+
+class Trace:
+    """Timing spans recorded while one search runs.
+
+    Offsets are relative to the trace's creation, so spans from concurrent
+    tool calls and model turns can be laid out on one timeline.
+    """
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.spans: List[Dict[str, Any]] = []
+        self.llm_turns = 0
+
+    def next_turn(self) -> int:
+        """Number for this search's next LLM turn; models are shared, so the count lives here."""
+        self.llm_turns += 1
+        return self.llm_turns
+
+    @contextmanager
+    def span(self, name: str, **attrs: Any):
+        record = {'name': name, 'start_ms': (time.perf_counter() - self.origin) * 1000, **attrs}
+        try:
+            yield record
+        except BaseException as e:
+            record['error'] = type(e).__name__
+            raise
+        finally:
+            record['duration_ms'] = (time.perf_counter() - self.origin) * 1000 - record['start_ms']
+            self.spans.append(record)
+
+    def durations(self, name: str) -> List[float]:
+        return [s['duration_ms'] for s in self.spans if s['name'] == name]
+
+    def total_ms(self) -> float:
+        return max((s['start_ms'] + s['duration_ms'] for s in self.spans), default=0.0)
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        return sorted(({k: round(v, 2) if isinstance(v, float) else v for k, v in s.items()} for s in self.spans),
+                      key=lambda s: s['start_ms'])
+
+
+# Display names for the span kinds recorded during a search
+PHASE_LABELS = {
+    'lease': "Wait for MCP server",
+    'mcp.restart': "Restart MCP server",
+    'mcp.spawn': "Spawn MCP server",
+    'mcp.handshake': "MCP handshake (server start-up)",
+    'mcp.initialize': "List MCP tools",
+    'llm': "LLM turn",
+    'render': "Render results",
+    'compact': "Compact tool result",
+    'llm.route': "Routed model call",
+    'coalesced': "Wait for identical search in progress",
+}
+
+
+def span_label(span_record: Dict[str, Any]) -> str:
+    name = span_record['name']
+    if name.startswith('tool:'):
+        return f"Tool {name[5:]}"
+    label = PHASE_LABELS.get(name, name)
+    if 'model' in span_record:
+        return f"{label} ({span_record['model']})"
+    return f"{label} {span_record['turn']}" if 'turn' in span_record else label
+
+
+def summarize_spans(spans: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Total time per phase and token counts for a recorded trace."""
+    phases: Dict[str, float] = {}
+    for s in spans:
+        phases[s['name']] = round(phases.get(s['name'], 0.0) + s['duration_ms'], 2)
+    return {
+        'total_ms': round(max((s['start_ms'] + s['duration_ms'] for s in spans), default=0.0), 2),
+        'phases_ms': phases,
+        'llm_turns': sum(1 for s in spans if s['name'] == 'llm'),
+        'tool_calls': sum(1 for s in spans if s['name'].startswith('tool:')),
+        'input_tokens': sum(s.get('input_tokens', 0) for s in spans),
+        'output_tokens': sum(s.get('output_tokens', 0) for s in spans),
+        # Input tokens split by whether the provider's prompt cache served them
+        'cached_input_tokens': sum(s.get('cached_tokens', 0) for s in spans),
+        'uncached_input_tokens': sum(s.get('input_tokens', 0) - s.get('cached_tokens', 0) for s in spans),
+        # Estimated size of tool results before and after compaction for the model
+        'tool_result_tokens': sum(s.get('raw_tokens', 0) for s in spans if s['name'] == 'compact'),
+        'compacted_tool_result_tokens': sum(s.get('tokens', 0) for s in spans if s['name'] == 'compact'),
+    }
+
+
+current_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar('current_trace', default=None)
+
+
+@contextmanager
+def span(name: str, **attrs: Any):
+    """Record a span on the current search's trace; a no-op outside a traced search."""
+    trace = current_trace.get()
+    if trace is None:
+        yield dict(attrs)
+        return
+    with trace.span(name, **attrs) as record:
+        yield record
+
+
+class TracingSession(SessionProxy):
+    """Records a ``tool:<name>`` span for every MCP tool call."""
+
+    async def call_tool(self, name: str, arguments: Optional[Dict[str, Any]] = None, *args, **kwargs) -> Any:
+        with span(f"tool:{name}") as record:
+            result = await self.inner.call_tool(name, arguments, *args, **kwargs)
+            if getattr(result, 'isError', False):
+                record['error'] = 'ToolError'
+            return result
+
+
+def _usage_value(usage: Any, *names: str) -> Optional[int]:
+    for name in names:
+        value = usage.get(name) if isinstance(usage, dict) else getattr(usage, name, None)
+        if value is not None:
+            return value
+    return None
+
+
+def _record_usage(record: Dict[str, Any], response: Any) -> None:
+    """Copy token counts from a provider response (OpenAI-style ``usage`` or agno's ``response_usage``)."""
+    usage = getattr(response, 'usage', None) or getattr(response, 'response_usage', None)
+    if usage is None:
+        return
+    input_tokens = _usage_value(usage, 'prompt_tokens', 'input_tokens')
+    output_tokens = _usage_value(usage, 'completion_tokens', 'output_tokens')
+    # Prompt tokens the provider served from its prompt cache (OpenAI-style details, or a flat count)
+    details = _usage_value(usage, 'prompt_tokens_details')
+    cached_tokens = _usage_value(details, 'cached_tokens') if details is not None else None
+    if cached_tokens is None:
+        cached_tokens = _usage_value(usage, 'cached_tokens', 'cache_read_input_tokens')
+    if input_tokens is not None:
+        record['input_tokens'] = input_tokens
+    if output_tokens is not None:
+        record['output_tokens'] = output_tokens
+    if cached_tokens is not None:
+        record['cached_tokens'] = cached_tokens
+
+
+def instrument_model(model: Any) -> Any:
+    """Wrap an agno model's invoke methods so each LLM turn records an ``llm`` span."""
+    if getattr(model, '_traced', False):
+        return model
+    original_ainvoke = model.ainvoke
+    original_ainvoke_stream = model.ainvoke_stream
+
+    def turn() -> Optional[int]:
+        trace = current_trace.get()
+        return trace.next_turn() if trace is not None else None
+
+    async def ainvoke(*args, **kwargs):
+        with span('llm', turn=turn()) as record:
+            response = await original_ainvoke(*args, **kwargs)
+            _record_usage(record, response)
+            return response
+
+    async def ainvoke_stream(*args, **kwargs):
+        with span('llm', turn=turn()) as record:
+            started = time.perf_counter()
+            async for delta in original_ainvoke_stream(*args, **kwargs):
+                if 'ttft_ms' not in record:
+                    record['ttft_ms'] = (time.perf_counter() - started) * 1000
+                # Streamed usage normally arrives with the last chunk
+                _record_usage(record, delta)
+                yield delta
+
+    model.ainvoke = ainvoke
+    model.ainvoke_stream = ainvoke_stream
+    model._traced = True
+    return model